@@ -1,9 +1,62 @@
 from __future__ import annotations
 
+from collections.abc import Sequence
+from contextlib import ExitStack
 from pathlib import Path
 
-from RPCDPGAnalysis.NanoAODTnP.HistBuild import write_histogram_shard  # type: ignore
-from RPCDPGAnalysis.NanoAODTnP.TreeBuild import build_pair_tree, build_rpc_tree, read_nanoaod_base  # type: ignore
+import uproot
+
+from RPCDPGAnalysis.NanoAODTnP.HistBuild import (  # type: ignore
+    FULL_PROFILE,
+    HISTOGRAM_COMPRESSION,
+    HISTOGRAM_PROFILES,
+    HistogramVariant,
+    MatchPolicy,
+    accumulate_histograms,
+    build_variant_histograms,
+    write_histograms,
+)
+from RPCDPGAnalysis.NanoAODTnP.HistFill import BinnedHistogram, FillPool  # type: ignore
+from RPCDPGAnalysis.NanoAODTnP.SkimIO import SkimWriter, read_skim, skim_branches  # type: ignore
+from RPCDPGAnalysis.NanoAODTnP.TreeBuild import (  # type: ignore
+    build_pair_tree,
+    build_rpc_tree,
+    iterate_nanoaod_base,
+    read_nanoaod_base,
+)
+
+
+def _variant_outputs(
+    output_path: Path,
+    variants: Sequence[HistogramVariant] | None,
+    apply_roll_blacklist: bool,
+    apply_run_blacklist: bool,
+    tight_match: bool,
+    probe_pt_gt15: bool,
+    bx_zero: bool,
+) -> dict[HistogramVariant, Path]:
+    """Without ``variants`` the selection flags form one variant written to ``output_path``."""
+    if variants is None:
+        variant = HistogramVariant(
+            tight_match=tight_match,
+            probe_pt_gt15=probe_pt_gt15,
+            bx_zero=bx_zero,
+            apply_roll_blacklist=apply_roll_blacklist,
+            apply_run_blacklist=apply_run_blacklist,
+        )
+        return {variant: output_path}
+    return {variant: variant.output_path(output_path) for variant in dict.fromkeys(variants)}
+
+
+def _write_outputs(
+    outputs: dict[HistogramVariant, Path],
+    histograms: dict[HistogramVariant, dict[str, BinnedHistogram]],
+    integer_counts: bool = False,
+    compression: uproot.compression.Compression = HISTOGRAM_COMPRESSION,
+) -> None:
+    for variant, path in outputs.items():
+        write_histograms(path, histograms[variant], integer_counts, compression)
+        print(f"[info] wrote variant={variant.suffix or 'default'} output={path}", flush=True)
 
 
 def analyze(
@@ -17,19 +70,74 @@ def analyze(
     tight_match: bool = False,
     probe_pt_gt15: bool = True,
     bx_zero: bool = False,
+    step_size: int | str | None = None,
+    skim_path: Path | None = None,
+    variants: Sequence[HistogramVariant] | None = None,
+    threads: int = 1,
+    profile: str = FULL_PROFILE,
+    integer_counts: bool = False,
+    compression: uproot.compression.Compression = HISTOGRAM_COMPRESSION,
+    match_policies: Sequence[MatchPolicy] = (),
+) -> None:
+    outputs = _variant_outputs(
+        output_path, variants, apply_roll_blacklist, apply_run_blacklist, tight_match, probe_pt_gt15, bx_zero,
+    )
+    histogram_names = HISTOGRAM_PROFILES[profile]
+    if skim_path is None:
+        branches = [variant.branches(histogram_names, match_policies) for variant in outputs]
+        rpc_keys = frozenset().union(*(rpc for rpc, _ in branches))
+        pair_keys = frozenset().union(*(pair for _, pair in branches))
+    else:
+        rpc_keys, pair_keys = skim_branches()
+    keys = rpc_keys | pair_keys
+    if step_size is None:
+        base_tables = [read_nanoaod_base(input_path, cert_path, keys)]
+    else:
+        base_tables = iterate_nanoaod_base(input_path, cert_path, step_size, keys)
+
+    histograms = dict.fromkeys(outputs)
+    with ExitStack() as stack:
+        pool = stack.enter_context(FillPool(threads))
+        skim = None if skim_path is None else stack.enter_context(SkimWriter(skim_path))
+        for base_table in base_tables:
+            pair_tree = build_pair_tree(base_table, pair_keys)
+            rpc_tree = build_rpc_tree(base_table, rpc_keys)
+            del base_table
+            if skim is not None:
+                skim.write(pair_tree, rpc_tree)
+            chunk = build_variant_histograms(
+                pair_tree, rpc_tree, roll_blacklist_path, run_blacklist_path, tuple(outputs), pool, histogram_names,
+                match_policies,
+            )
+            for variant, variant_histograms in chunk.items():
+                histograms[variant] = accumulate_histograms(histograms[variant], variant_histograms)
+    _write_outputs(outputs, histograms, integer_counts, compression)
+
+
+def analyze_skim(
+    skim_path: Path,
+    output_path: Path,
+    roll_blacklist_path: Path | None,
+    run_blacklist_path: Path | None = None,
+    apply_roll_blacklist: bool = True,
+    apply_run_blacklist: bool = True,
+    tight_match: bool = False,
+    probe_pt_gt15: bool = True,
+    bx_zero: bool = False,
+    variants: Sequence[HistogramVariant] | None = None,
+    threads: int = 1,
+    profile: str = FULL_PROFILE,
+    integer_counts: bool = False,
+    compression: uproot.compression.Compression = HISTOGRAM_COMPRESSION,
+    match_policies: Sequence[MatchPolicy] = (),
 ) -> None:
-    base_tree = read_nanoaod_base(input_path, cert_path)
-    rpc_tree = build_rpc_tree(base_tree)
-    pair_tree = build_pair_tree(base_tree)
-    write_histogram_shard(
-        output_path,
-        pair_tree,
-        rpc_tree,
-        roll_blacklist_path=roll_blacklist_path,
-        run_blacklist_path=run_blacklist_path,
-        apply_roll_blacklist=apply_roll_blacklist,
-        apply_run_blacklist=apply_run_blacklist,
-        tight_match=tight_match,
-        probe_pt_gt15=probe_pt_gt15,
-        bx_zero=bx_zero,
+    outputs = _variant_outputs(
+        output_path, variants, apply_roll_blacklist, apply_run_blacklist, tight_match, probe_pt_gt15, bx_zero,
     )
+    pair_tree, rpc_tree = read_skim(skim_path)
+    with FillPool(threads) as pool:
+        histograms = build_variant_histograms(
+            pair_tree, rpc_tree, roll_blacklist_path, run_blacklist_path, tuple(outputs), pool, HISTOGRAM_PROFILES[profile],
+            match_policies,
+        )
+    _write_outputs(outputs, histograms, integer_counts, compression)
@@ -1,21 +1,44 @@
 from __future__ import annotations
 
 import csv
-from functools import lru_cache
+from dataclasses import dataclass
+from functools import lru_cache, partial
 from pathlib import Path
+from typing import Callable, Sequence
 
-import hist
 import numpy as np
 import uproot
 
+from RPCDPGAnalysis.NanoAODTnP.HistFill import (  # type: ignore
+    BinAxis,
+    BinIndexCache,
+    BinnedHistogram,
+    FillPool,
+    category_axis,
+    key_axis,
+    write_sparse,
+)
 from RPCDPGAnalysis.NanoAODTnP.ReadGeoMeta import load_roll_blacklist  # type: ignore
-from RPCDPGAnalysis.NanoAODTnP.RPCGeomServ import is_irpc_roll_name  # type: ignore
+from RPCDPGAnalysis.NanoAODTnP.RPCGeomServ import (  # type: ignore
+    RPC_GEOMETRY_KEY_BITS,
+    RPC_GEOMETRY_KEYS,
+    get_roll_name,
+    is_irpc_roll_name,
+    pack_geometry_key,
+    unpack_geometry_key,
+)
 
 
 PACKAGE_DIR = Path(__file__).resolve().parents[1]
 RUN_CATEGORY_PATH = PACKAGE_DIR / "data" / "lumi" / "run3.csv"
 ROLL_CATEGORY_PATH = PACKAGE_DIR / "data" / "geometry" / "run3.csv"
-HISTOGRAM_COMPRESSION = uproot.ZLIB(1)
+HISTOGRAM_CODECS = {
+    "zlib": uproot.ZLIB,
+    "lzma": uproot.LZMA,
+    "lz4": uproot.LZ4,
+    "zstd": uproot.ZSTD,
+}
+DEFAULT_HISTOGRAM_COMPRESSION = "zlib:1"
 PAIR_MASS_HISTOGRAM = "count_pair_mass"
 PAIR_Q_OVER_P_HISTOGRAM = "count_pair_probe_q_over_p"
 STATION_NAMES = (
@@ -25,6 +48,17 @@ STATION_NAMES = (
 )
 
 
+def parse_compression(spec: str) -> uproot.compression.Compression:
+    """``CODEC:LEVEL`` such as ``zlib:1`` or ``zstd:5`` as an uproot compression setting."""
+    codec, _, level = spec.partition(":")
+    if codec not in HISTOGRAM_CODECS or not level.isdigit() or not 1 <= int(level) <= 9:
+        raise ValueError(f"Compression must be CODEC:LEVEL with CODEC in {sorted(HISTOGRAM_CODECS)} and LEVEL 1-9: {spec!r}")
+    return HISTOGRAM_CODECS[codec](int(level))
+
+
+HISTOGRAM_COMPRESSION = parse_compression(DEFAULT_HISTOGRAM_COMPRESSION)
+
+
 @lru_cache(maxsize=1)
 def run_categories() -> tuple[int, ...]:
     with RUN_CATEGORY_PATH.open(newline="") as stream:
@@ -61,6 +95,49 @@ def roll_names() -> tuple[str, ...]:
     return tuple(sorted(roll_geometry()))
 
 
+@dataclass(frozen=True)
+class RollLookup:
+    """Dense roll index per packed geometry key plus per-roll attributes."""
+
+    index_by_key: np.ndarray
+    station: np.ndarray
+    irpc: np.ndarray
+
+
+@lru_cache(maxsize=1)
+def roll_lookup() -> RollLookup:
+    names = roll_names()
+    index_by_name = {name: index for index, name in enumerate(names)}
+    with ROLL_CATEGORY_PATH.open(newline="") as stream:
+        rows = list(csv.DictReader(stream))
+    geometry_key = pack_geometry_key({key: [int(row[key]) for row in rows] for key in RPC_GEOMETRY_KEYS})
+    index_by_key = np.full(1 << RPC_GEOMETRY_KEY_BITS, -1, dtype=np.int16)
+    index_by_key[geometry_key] = [index_by_name[str(row["roll_name"]).strip()] for row in rows]
+
+    station_index = {station: index for index, station in enumerate(STATION_NAMES)}
+    station_by_name = roll_geometry()
+    station = np.asarray([station_index[station_by_name[name]] for name in names], dtype=np.int8)
+    irpc = np.asarray([is_irpc_roll_name(name) for name in names], dtype=bool)
+    return RollLookup(index_by_key, station, irpc)
+
+
+def roll_indices(geometry_key: np.ndarray) -> np.ndarray:
+    roll_index = roll_lookup().index_by_key[geometry_key]
+    unknown = roll_index < 0
+    if np.any(unknown):
+        geometry = unpack_geometry_key(np.unique(geometry_key[unknown]))
+        names = [
+            get_roll_name(*(int(geometry[key][index]) for key in RPC_GEOMETRY_KEYS))
+            for index in range(len(geometry[RPC_GEOMETRY_KEYS[0]]))
+        ]
+        raise RuntimeError(f"Rolls missing from {ROLL_CATEGORY_PATH}: {', '.join(names)}")
+    return roll_index
+
+
+def roll_mask(names: set[str]) -> np.ndarray:
+    return np.isin(np.asarray(roll_names(), dtype=str), tuple(names))
+
+
 def regular_edges(low: float, high: float, n_bins: int) -> np.ndarray:
     return np.linspace(low, high, n_bins + 1, dtype=np.float64)
 
@@ -102,6 +179,7 @@ TIGHT_MATCH_PULL_X = 4.0
 PROBE_PT_THRESHOLD_GEV = 15.0
 PROBE_ABS_ETA_MAX = 1.9
 CLS_RUN_STATION_PROFILE = f"profile_rpc_{MATCHED_SELECTION}_cls_by_run_station"
+CLS_RUN_ROLL_PROFILE = f"profile_rpc_{MATCHED_SELECTION}_cls_by_run_roll"
 
 RPC_AXIS_EDGES = {
     "probe_pt": RPC_PT_EDGES,
@@ -154,6 +232,10 @@ def count_run_station_name(selection: str) -> str:
     return f"count_rpc_{selection}_by_run_station"
 
 
+def count_run_roll_name(selection: str) -> str:
+    return f"count_rpc_{selection}_by_run_roll"
+
+
 def cls_profile_station_name(branch: str) -> str:
     return f"profile_rpc_{MATCHED_SELECTION}_cls_by_{branch}_station"
 
@@ -183,12 +265,31 @@ KINEMATIC_2D_HISTOGRAM_NAMES = tuple(sorted(
     ]
     + [cls_profile_2d_station_name(name) for name in KINEMATIC_2D_AXES]
 ))
+RUN_STATION_HISTOGRAM_NAMES = (
+    count_run_station_name(FIDUCIAL_SELECTION),
+    count_run_station_name(MATCHED_SELECTION),
+    CLS_RUN_STATION_PROFILE,
+)
+RUN_ROLL_HISTOGRAM_NAMES = (
+    count_run_roll_name(FIDUCIAL_SELECTION),
+    count_run_roll_name(MATCHED_SELECTION),
+    CLS_RUN_ROLL_PROFILE,
+)
+# Mostly empty per shard, or keyed by the runs a shard saw, so written as sparse trees.
+SPARSE_HISTOGRAM_NAMES = tuple(sorted(
+    KINEMATIC_2D_HISTOGRAM_NAMES + RUN_STATION_HISTOGRAM_NAMES + RUN_ROLL_HISTOGRAM_NAMES
+))
 OPTIONAL_HISTOGRAM_NAMES = tuple(sorted((
     PAIR_Q_OVER_P_HISTOGRAM,
     *KINEMATIC_2D_HISTOGRAM_NAMES,
 )))
 
 
+def is_profile_histogram(name: str) -> bool:
+    """Profiles keep value sums and sums of squares; every other histogram holds plain counts."""
+    return name.startswith("profile_")
+
+
 def _histogram_names() -> tuple[str, ...]:
     names = [
         PAIR_MASS_HISTOGRAM,
@@ -206,101 +307,101 @@ def _histogram_names() -> tuple[str, ...]:
     names.extend(cls_profile_station_name(branch) for branch in CLS_PROFILE_BRANCHES)
     names.extend(KINEMATIC_2D_HISTOGRAM_NAMES)
     names.append(CLS_RUN_STATION_PROFILE)
+    names.extend(RUN_ROLL_HISTOGRAM_NAMES)
     return tuple(sorted(names))
 
 
 HISTOGRAM_NAMES = _histogram_names()
+MINIMAL_PROFILE = "minimal"
+STANDARD_PROFILE = "standard"
+FULL_PROFILE = "full"
+HISTOGRAM_PROFILES = {
+    MINIMAL_PROFILE: tuple(sorted(
+        name
+        for selection in (FIDUCIAL_SELECTION, MATCHED_SELECTION)
+        for name in (count_roll_name(selection), count_run_station_name(selection))
+    )),
+    STANDARD_PROFILE: tuple(name for name in HISTOGRAM_NAMES if name not in KINEMATIC_2D_HISTOGRAM_NAMES),
+    FULL_PROFILE: HISTOGRAM_NAMES,
+}
+# Families a shard may omit, either from an older schema or a smaller profile.
+PROFILE_OPTIONAL_HISTOGRAM_NAMES = tuple(sorted(
+    set(OPTIONAL_HISTOGRAM_NAMES) | (set(HISTOGRAM_NAMES) - set(HISTOGRAM_PROFILES[MINIMAL_PROFILE]))
+))
+# Histograms built from the matched selection; each extra match policy fills its own copy.
+NUMERATOR_HISTOGRAM_NAMES = tuple(name for name in HISTOGRAM_NAMES if MATCHED_SELECTION in name)
+DERIVED_BRANCHES = {
+    "probe_p": ("probe_pt", "probe_eta"),
+    "probe_q_over_p": ("probe_pt", "probe_eta", "probe_q"),
+}
+PAIR_TABLE = "pair"
+RPC_TABLE = "rpc"
 
 
-def _category_coordinates(values: np.ndarray, categories: tuple, missing: float | None = None) -> np.ndarray:
-    index_by_category = {category: index + 0.5 for index, category in enumerate(categories)}
-    if missing is None:
-        return np.asarray([index_by_category[value] for value in values], dtype=np.float64)
-    return np.asarray([index_by_category.get(value, missing) for value in values], dtype=np.float64)
-
-
-def _hist1d(name: str, axis_name: str, edges: np.ndarray, values: np.ndarray, mask: np.ndarray, weights: np.ndarray | None = None):
-    values = np.asarray(values, dtype=np.float64)
-    selected = np.asarray(mask, dtype=bool) & np.isfinite(values)
-    storage = hist.storage.Double()
-    if weights is not None:
-        weights = np.asarray(weights, dtype=np.float64)
-        selected &= np.isfinite(weights)
-        storage = hist.storage.Weight()
-    histogram = hist.Hist(hist.axis.Variable(edges, name=axis_name, label=axis_name), storage=storage, name=name)
-    histogram.fill(values[selected], weight=None if weights is None else weights[selected])
-    return histogram
-
-
-def _hist2d(
-    name: str,
-    x_name: str,
-    x_edges: np.ndarray,
-    x_values: np.ndarray,
-    y_name: str,
-    y_edges: np.ndarray,
-    y_values: np.ndarray,
-    mask: np.ndarray,
-    weights: np.ndarray | None = None,
-):
-    x_values = np.asarray(x_values, dtype=np.float64)
-    y_values = np.asarray(y_values, dtype=np.float64)
-    selected = np.asarray(mask, dtype=bool) & np.isfinite(x_values) & np.isfinite(y_values)
-    storage = hist.storage.Double()
-    if weights is not None:
-        weights = np.asarray(weights, dtype=np.float64)
-        selected &= np.isfinite(weights)
-        storage = hist.storage.Weight()
-    histogram = hist.Hist(
-        hist.axis.Variable(x_edges, name=x_name, label=x_name),
-        hist.axis.Variable(y_edges, name=y_name, label=y_name),
-        storage=storage,
-        name=name,
-    )
-    histogram.fill(x_values[selected], y_values[selected], weight=None if weights is None else weights[selected])
-    return histogram
-
-
-def _hist3d(
-    name: str,
-    x_name: str,
-    x_edges: np.ndarray,
-    x_values: np.ndarray,
-    y_name: str,
-    y_edges: np.ndarray,
-    y_values: np.ndarray,
-    z_name: str,
-    z_edges: np.ndarray,
-    z_values: np.ndarray,
-    mask: np.ndarray,
-    weights: np.ndarray | None = None,
-):
-    x_values = np.asarray(x_values, dtype=np.float64)
-    y_values = np.asarray(y_values, dtype=np.float64)
-    z_values = np.asarray(z_values, dtype=np.float64)
-    selected = np.asarray(mask, dtype=bool) & np.isfinite(x_values) & np.isfinite(y_values) & np.isfinite(z_values)
-    storage = hist.storage.Double()
-    if weights is not None:
-        weights = np.asarray(weights, dtype=np.float64)
-        selected &= np.isfinite(weights)
-        storage = hist.storage.Weight()
-    histogram = hist.Hist(
-        hist.axis.Variable(x_edges, name=x_name, label=x_name),
-        hist.axis.Variable(y_edges, name=y_name, label=y_name),
-        hist.axis.Variable(z_edges, name=z_name, label=z_name),
-        storage=storage,
-        name=name,
-    )
-    histogram.fill(x_values[selected], y_values[selected], z_values[selected], weight=None if weights is None else weights[selected])
-    return histogram
+def _histogram_branches() -> dict[str, tuple[str, tuple[str, ...]]]:
+    branches = {
+        PAIR_MASS_HISTOGRAM: (PAIR_TABLE, ("pair_mass",)),
+        PAIR_Q_OVER_P_HISTOGRAM: (PAIR_TABLE, ("probe_q_over_p",)),
+    }
+    for prefix in ("probe", "tag"):
+        branches[pair_kinematics_name(prefix)] = (PAIR_TABLE, (f"{prefix}_eta", f"{prefix}_pt"))
+        branches[pair_eta_phi_name(prefix)] = (PAIR_TABLE, (f"{prefix}_eta", f"{prefix}_phi"))
+    for selection, selection_branches in RPC_SELECTION_BRANCHES.items():
+        for branch in selection_branches:
+            branches[count_station_name(selection, branch)] = (RPC_TABLE, (branch,))
+        branches[count_roll_name(selection)] = (RPC_TABLE, ())
+        branches[count_run_station_name(selection)] = (RPC_TABLE, ())
+        branches[count_run_roll_name(selection)] = (RPC_TABLE, ())
+        for plot_name, (x_branch, _, y_branch, _) in KINEMATIC_2D_AXES.items():
+            branches[count_2d_station_name(selection, plot_name)] = (RPC_TABLE, (x_branch, y_branch))
+    branches[CLS_ROLL_PROFILE] = (RPC_TABLE, ("cls",))
+    for sample, sample_branches in RMS_PROFILE_BRANCHES.items():
+        for branch in sample_branches:
+            branches[profile_1d_station_name(sample, branch)] = (RPC_TABLE, (sample, branch))
+    for branch in CLS_PROFILE_BRANCHES:
+        branches[cls_profile_station_name(branch)] = (RPC_TABLE, ("cls", branch))
+    for plot_name, (x_branch, _, y_branch, _) in KINEMATIC_2D_AXES.items():
+        branches[cls_profile_2d_station_name(plot_name)] = (RPC_TABLE, ("cls", x_branch, y_branch))
+    branches[CLS_RUN_STATION_PROFILE] = (RPC_TABLE, ("cls",))
+    branches[CLS_RUN_ROLL_PROFILE] = (RPC_TABLE, ("cls",))
+    return branches
+
+
+HISTOGRAM_BRANCHES = _histogram_branches()
+
+
+def _expand_derived_branches(branches: set[str]) -> frozenset[str]:
+    expanded = set(branches)
+    for branch in branches:
+        expanded.update(DERIVED_BRANCHES.get(branch, ()))
+    return frozenset(expanded - set(DERIVED_BRANCHES))
+
+
+def required_branches(
+    histogram_names: Sequence[str] = HISTOGRAM_NAMES,
+    tight_match: bool = False,
+    probe_pt_gt15: bool = True,
+    bx_zero: bool = False,
+) -> tuple[frozenset[str], frozenset[str]]:
+    """Return the NanoAOD table columns needed per crossing and per pair."""
+    rpc = {"probe_eta", "is_fiducial", *RPC_GEOMETRY_KEYS}
+    pair = {"probe_eta"}
+    if probe_pt_gt15:
+        rpc.add("probe_pt")
+        pair.add("probe_pt")
+    rpc.update(("residual_x", "pull_x") if tight_match else ("is_matched",))
+    if bx_zero:
+        rpc.add("bx")
+    for name in histogram_names:
+        table, branches = HISTOGRAM_BRANCHES[name]
+        (pair if table == PAIR_TABLE else rpc).update(branches)
+    return _expand_derived_branches(rpc), _expand_derived_branches(pair)
 
 
 def matched_selection_mask(rpc_tree: dict[str, np.ndarray], tight_match: bool = False) -> np.ndarray:
     if not tight_match:
         return np.asarray(rpc_tree["is_matched"], dtype=bool)
-    residual_x = np.asarray(rpc_tree["residual_x"], dtype=np.float64)
-    pull_x = np.asarray(rpc_tree["pull_x"], dtype=np.float64)
-    return (np.abs(residual_x) <= TIGHT_MATCH_RESIDUAL_X_CM) | (np.abs(pull_x) <= TIGHT_MATCH_PULL_X)
+    return (np.abs(rpc_tree["residual_x"]) <= TIGHT_MATCH_RESIDUAL_X_CM) | (np.abs(rpc_tree["pull_x"]) <= TIGHT_MATCH_PULL_X)
 
 
 def load_run_blacklist(path: Path | str) -> set[int]:
@@ -313,6 +414,322 @@ def load_run_blacklist(path: Path | str) -> set[int]:
     return runs
 
 
+@dataclass(frozen=True)
+class MatchPolicy:
+    """One numerator matching definition, stored under its own selection name next to the variant's own."""
+
+    tight_match: bool = False
+    bx_zero: bool = False
+
+    TOKENS = {"tight": "tight_match", "bx-zero": "bx_zero"}
+
+    @classmethod
+    def parse(cls, spec: str) -> MatchPolicy:
+        """Parse ``default``, ``tight``, ``bx-zero`` or ``tight+bx-zero``."""
+        fields = {}
+        for token in spec.strip().split("+"):
+            if token == "default":
+                continue
+            if token not in cls.TOKENS:
+                raise ValueError(f"Unknown match policy token {token!r}; expected default or {', '.join(cls.TOKENS)}")
+            fields[cls.TOKENS[token]] = True
+        return cls(**fields)
+
+    @property
+    def spec(self) -> str:
+        return "+".join(token for token, field in self.TOKENS.items() if getattr(self, field)) or "default"
+
+    @property
+    def selection(self) -> str:
+        return f"{MATCHED_SELECTION}_{self.spec.replace('-', '_').replace('+', '_')}"
+
+    def histogram_name(self, name: str) -> str:
+        return name.replace(MATCHED_SELECTION, self.selection, 1)
+
+    def mask(self, rpc_tree: dict[str, np.ndarray]) -> np.ndarray:
+        matched = matched_selection_mask(rpc_tree, tight_match=self.tight_match)
+        if self.bx_zero:
+            # Not in place: the default mask is the tree's own is_matched column.
+            matched = matched & (rpc_tree["bx"] == 0)
+        return matched
+
+
+MATCH_POLICIES = tuple(MatchPolicy.parse(spec) for spec in ("default", "tight", "bx-zero", "tight+bx-zero"))
+_MATCH_POLICY_BASE_NAMES = {
+    policy.histogram_name(name): name for policy in MATCH_POLICIES for name in NUMERATOR_HISTOGRAM_NAMES
+}
+
+
+def base_histogram_name(name: str) -> str:
+    """Map a match-policy numerator name back to the histogram it copies."""
+    return _MATCH_POLICY_BASE_NAMES.get(name, name)
+
+
+@dataclass(frozen=True)
+class HistogramVariant:
+    """One combination of the selection policies, named like the campaign output suffixes."""
+
+    tight_match: bool = False
+    probe_pt_gt15: bool = True
+    bx_zero: bool = False
+    apply_roll_blacklist: bool = True
+    apply_run_blacklist: bool = True
+
+    TOKENS = {
+        "tight": ("tight_match", True),
+        "all-probe-pt": ("probe_pt_gt15", False),
+        "bx-zero": ("bx_zero", True),
+        "wo-blacklist": ("apply_roll_blacklist", False),
+        "wo-run-blacklist": ("apply_run_blacklist", False),
+    }
+
+    @classmethod
+    def parse(cls, spec: str) -> HistogramVariant:
+        """Parse ``default`` or ``+``-joined tokens such as ``tight+bx-zero``."""
+        fields = {}
+        for token in spec.strip().split("+"):
+            if token == "default":
+                continue
+            if token not in cls.TOKENS:
+                raise ValueError(f"Unknown histogram variant token {token!r}; expected default or {', '.join(cls.TOKENS)}")
+            field, value = cls.TOKENS[token]
+            fields[field] = value
+        return cls(**fields)
+
+    @property
+    def suffix(self) -> str:
+        return "".join(
+            f"-{token}"
+            for token, (field, value) in self.TOKENS.items()
+            if getattr(self, field) == value
+        )
+
+    def output_path(self, path: Path) -> Path:
+        return path.with_name(f"{path.stem}{self.suffix}{path.suffix}")
+
+    @property
+    def match_policy(self) -> MatchPolicy:
+        return MatchPolicy(tight_match=self.tight_match, bx_zero=self.bx_zero)
+
+    def branches(
+        self,
+        histogram_names: Sequence[str] = HISTOGRAM_NAMES,
+        match_policies: Sequence[MatchPolicy] = (),
+    ) -> tuple[frozenset[str], frozenset[str]]:
+        """Columns for this variant and for every extra numerator in ``match_policies``."""
+        rpc, pair = set(), set()
+        for policy in (self.match_policy, *match_policies):
+            policy_rpc, policy_pair = required_branches(
+                histogram_names,
+                tight_match=policy.tight_match,
+                probe_pt_gt15=self.probe_pt_gt15,
+                bx_zero=policy.bx_zero,
+            )
+            rpc |= policy_rpc
+            pair |= policy_pair
+        return frozenset(rpc), frozenset(pair)
+
+
+@dataclass(frozen=True)
+class _FillColumns:
+    """Bin indices and masks shared by every variant of one chunk."""
+
+    pair_bins: BinIndexCache
+    rpc_bins: BinIndexCache
+    irpc: np.ndarray
+    pair_has_legacy_rpc: np.ndarray
+    pair_blacklisted_run: np.ndarray
+    blacklisted_run: np.ndarray
+    blacklisted_roll: np.ndarray
+    roll_bin: np.ndarray
+    station_bin: np.ndarray
+    run_bin: np.ndarray
+    roll_axis: BinAxis
+    station_axis: BinAxis
+    run_axis: BinAxis
+
+
+def _fill_columns(
+    pair_tree: dict[str, np.ndarray],
+    rpc_tree: dict[str, np.ndarray],
+    roll_blacklist_path: Path | None,
+    run_blacklist_path: Path | None,
+) -> _FillColumns:
+    lookup = roll_lookup()
+    roll_index = roll_indices(rpc_tree["geometry_key"])
+    irpc = lookup.irpc[roll_index]
+    pair_index = rpc_tree["pair_index"]
+    pair_has_legacy_rpc = np.zeros(len(pair_tree["run"]), dtype=bool)
+    pair_has_legacy_rpc[pair_index[~irpc]] = True
+
+    run_blacklist = load_run_blacklist(run_blacklist_path) if run_blacklist_path is not None else set()
+    pair_run = np.asarray(pair_tree["run"], dtype=np.uint32)
+    pair_blacklisted_run = np.isin(pair_run, np.asarray(sorted(run_blacklist), dtype=np.uint32))
+    roll_blacklist = load_roll_blacklist(roll_blacklist_path) if roll_blacklist_path is not None else set()
+
+    # The run axis holds only the runs of this chunk; HistIO aligns it to the run list when loading.
+    run_axis = key_axis("run", pair_run)
+    return _FillColumns(
+        pair_bins=BinIndexCache(pair_tree),
+        rpc_bins=BinIndexCache(rpc_tree),
+        irpc=irpc,
+        pair_has_legacy_rpc=pair_has_legacy_rpc,
+        pair_blacklisted_run=pair_blacklisted_run,
+        blacklisted_run=pair_blacklisted_run[pair_index],
+        blacklisted_roll=roll_mask(roll_blacklist)[roll_index],
+        roll_bin=roll_index.astype(np.int32) + 1,
+        station_bin=lookup.station[roll_index].astype(np.int32) + 1,
+        run_bin=run_axis.index(pair_run)[pair_index],
+        roll_axis=category_axis("roll_name", len(lookup.station)),
+        station_axis=category_axis("station", len(STATION_NAMES)),
+        run_axis=run_axis,
+    )
+
+
+def _fill_histograms(
+    pair_tree: dict[str, np.ndarray],
+    rpc_tree: dict[str, np.ndarray],
+    columns: _FillColumns,
+    variant: HistogramVariant,
+    pool: FillPool,
+    names: frozenset[str],
+    match_policies: Sequence[MatchPolicy] = (),
+) -> dict[str, BinnedHistogram]:
+    output: dict[str, BinnedHistogram] = {}
+    pair_bins, rpc_bins = columns.pair_bins, columns.rpc_bins
+    roll_axis, roll_bin = columns.roll_axis, columns.roll_bin
+    station_axis, station_bin = columns.station_axis, columns.station_bin
+    run_axis, run_bin = columns.run_axis, columns.run_bin
+
+    def fill(
+        name: str,
+        axes: tuple[BinAxis, ...],
+        indices: tuple,
+        mask: np.ndarray,
+        weights: np.ndarray | None = None,
+        policy: MatchPolicy | None = None,
+    ):
+        """Fill ``name`` if the profile keeps it; callables in ``indices`` compute bins only then.
+
+        With ``policy`` the histogram is stored under that match policy's name.
+        """
+        if name not in names:
+            return
+        indices = tuple(index() if callable(index) else index for index in indices)
+        name = name if policy is None else policy.histogram_name(name)
+        output[name] = pool.fill(BinnedHistogram(name, axes, weighted=weights is not None), indices, mask, weights)
+
+    def rpc_axis(branch: str, edges: np.ndarray) -> tuple[BinAxis, Callable[[], np.ndarray]]:
+        axis = BinAxis(branch, edges)
+        return axis, partial(rpc_bins, branch, axis)
+
+    pair_mask = columns.pair_has_legacy_rpc & (np.abs(pair_tree["probe_eta"]) < PROBE_ABS_ETA_MAX)
+    if variant.apply_run_blacklist:
+        pair_mask &= ~columns.pair_blacklisted_run
+    if variant.probe_pt_gt15:
+        pair_mask &= pair_tree["probe_pt"] > PROBE_PT_THRESHOLD_GEV
+    for name, branch, edges in (
+        (PAIR_MASS_HISTOGRAM, "pair_mass", PAIR_MASS_EDGES),
+        (PAIR_Q_OVER_P_HISTOGRAM, "probe_q_over_p", COUNT_Q_OVER_P_EDGES),
+    ):
+        axis = BinAxis(branch, edges)
+        fill(name, (axis,), (partial(pair_bins, branch, axis),), pair_mask)
+    for prefix, eta_edges in (("probe", PROBE_ETA_EDGES), ("tag", TAG_ETA_EDGES)):
+        eta_axis = BinAxis(f"{prefix}_eta", eta_edges)
+        pt_axis = BinAxis(f"{prefix}_pt", PAIR_MUON_PT_EDGES)
+        phi_axis = BinAxis(f"{prefix}_phi", PAIR_MUON_PHI_EDGES)
+        eta_bin = partial(pair_bins, eta_axis.name, eta_axis)
+        fill(pair_kinematics_name(prefix), (eta_axis, pt_axis), (eta_bin, partial(pair_bins, pt_axis.name, pt_axis)), pair_mask)
+        fill(pair_eta_phi_name(prefix), (eta_axis, phi_axis), (eta_bin, partial(pair_bins, phi_axis.name, phi_axis)), pair_mask)
+
+    accepted = ~columns.irpc & (np.abs(rpc_tree["probe_eta"]) < PROBE_ABS_ETA_MAX)
+    if variant.apply_roll_blacklist:
+        accepted &= ~columns.blacklisted_roll
+    if variant.apply_run_blacklist:
+        accepted &= ~columns.blacklisted_run
+    if variant.probe_pt_gt15:
+        accepted &= rpc_tree["probe_pt"] > PROBE_PT_THRESHOLD_GEV
+    fiducial = accepted & rpc_tree["is_fiducial"]
+    cls_values = rpc_tree.get("cls")
+
+    def fill_counts(selection: str, mask: np.ndarray, policy: MatchPolicy | None = None):
+        for branch in RPC_SELECTION_BRANCHES[selection]:
+            axis, index = rpc_axis(branch, RPC_AXIS_EDGES[branch])
+            fill(count_station_name(selection, branch), (axis, station_axis), (index, station_bin), mask, policy=policy)
+        fill(count_roll_name(selection), (roll_axis,), (roll_bin,), mask, policy=policy)
+        fill(count_run_station_name(selection), (run_axis, station_axis), (run_bin, station_bin), mask, policy=policy)
+        fill(count_run_roll_name(selection), (run_axis, roll_axis), (run_bin, roll_bin), mask, policy=policy)
+        for plot_name, (x_branch, x_edges, y_branch, y_edges) in KINEMATIC_2D_AXES.items():
+            x_axis, x_index = rpc_axis(x_branch, x_edges)
+            y_axis, y_index = rpc_axis(y_branch, y_edges)
+            fill(
+                count_2d_station_name(selection, plot_name),
+                (x_axis, y_axis, station_axis), (x_index, y_index, station_bin), mask, policy=policy,
+            )
+
+    def fill_profiles(matched: np.ndarray, policy: MatchPolicy | None = None):
+        fill(CLS_ROLL_PROFILE, (roll_axis,), (roll_bin,), matched, cls_values, policy)
+        for sample, branches in RMS_PROFILE_BRANCHES.items():
+            for branch in branches:
+                axis, index = rpc_axis(branch, RPC_AXIS_EDGES[branch])
+                fill(
+                    profile_1d_station_name(sample, branch),
+                    (axis, station_axis), (index, station_bin), matched, rpc_tree.get(sample), policy,
+                )
+        for branch in CLS_PROFILE_BRANCHES:
+            axis, index = rpc_axis(branch, RPC_AXIS_EDGES[branch])
+            fill(cls_profile_station_name(branch), (axis, station_axis), (index, station_bin), matched, cls_values, policy)
+        for plot_name, (x_branch, x_edges, y_branch, y_edges) in KINEMATIC_2D_AXES.items():
+            x_axis, x_index = rpc_axis(x_branch, x_edges)
+            y_axis, y_index = rpc_axis(y_branch, y_edges)
+            fill(
+                cls_profile_2d_station_name(plot_name),
+                (x_axis, y_axis, station_axis), (x_index, y_index, station_bin), matched, cls_values, policy,
+            )
+        fill(CLS_RUN_STATION_PROFILE, (run_axis, station_axis), (run_bin, station_bin), matched, cls_values, policy)
+        fill(CLS_RUN_ROLL_PROFILE, (run_axis, roll_axis), (run_bin, roll_bin), matched, cls_values, policy)
+
+    fill_counts(FIDUCIAL_SELECTION, fiducial)
+    matched = fiducial & variant.match_policy.mask(rpc_tree)
+    fill_counts(MATCHED_SELECTION, matched)
+    fill_profiles(matched)
+    # Extra policies share the denominator and bin indices; only the numerator mask changes.
+    for policy in match_policies:
+        matched = fiducial & policy.mask(rpc_tree)
+        fill_counts(MATCHED_SELECTION, matched, policy)
+        fill_profiles(matched, policy)
+    return output
+
+
+def build_variant_histograms(
+    pair_tree: dict[str, np.ndarray],
+    rpc_tree: dict[str, np.ndarray],
+    roll_blacklist_path: Path | None,
+    run_blacklist_path: Path | None = None,
+    variants: Sequence[HistogramVariant] = (HistogramVariant(),),
+    pool: FillPool | None = None,
+    histogram_names: Sequence[str] = HISTOGRAM_NAMES,
+    match_policies: Sequence[MatchPolicy] = (),
+) -> dict[HistogramVariant, dict[str, BinnedHistogram]]:
+    """Fill ``histogram_names`` for every variant from shared bin indices; ``pool`` may run the fills on threads.
+
+    Every variant also fills its numerators once per policy in ``match_policies``.
+    """
+    pool = FillPool() if pool is None else pool
+    names = frozenset(histogram_names)
+    if not any(variant.apply_roll_blacklist for variant in variants):
+        roll_blacklist_path = None
+    if not any(variant.apply_run_blacklist for variant in variants):
+        run_blacklist_path = None
+    columns = _fill_columns(pair_tree, rpc_tree, roll_blacklist_path, run_blacklist_path)
+    output = {
+        variant: _fill_histograms(pair_tree, rpc_tree, columns, variant, pool, names, match_policies)
+        for variant in variants
+    }
+    pool.wait()
+    return output
+
+
 def build_histograms(
     pair_tree: dict[str, np.ndarray],
     rpc_tree: dict[str, np.ndarray],
@@ -323,109 +740,44 @@ def build_histograms(
     tight_match: bool = False,
     probe_pt_gt15: bool = True,
     bx_zero: bool = False,
-) -> dict[str, hist.Hist]:
-    output: dict[str, hist.Hist] = {}
-    stored_branches = set(RPC_AXIS_EDGES) | {
-        branch
-        for x_branch, _, y_branch, _ in KINEMATIC_2D_AXES.values()
-        for branch in (x_branch, y_branch)
-    } | set(RMS_PROFILE_BRANCHES)
-    rpc_values = {branch: np.asarray(rpc_tree[branch]) for branch in stored_branches}
-
-    roll_name_values = np.asarray(rpc_tree["roll_name"], dtype=str)
-    roll_categories = roll_names()
-    irpc = np.isin(roll_name_values, tuple(name for name in roll_categories if is_irpc_roll_name(name)))
-    pair_has_legacy_rpc = np.zeros(len(pair_tree["run"]), dtype=bool)
-    pair_has_legacy_rpc[np.asarray(rpc_tree["pair_index"], dtype=np.int64)[~irpc]] = True
-
-    run_blacklist = load_run_blacklist(run_blacklist_path) if apply_run_blacklist and run_blacklist_path is not None else set()
-    pair_blacklisted_run = np.isin(np.asarray(pair_tree["run"], dtype=np.uint32), tuple(run_blacklist))
-    pair_probe_eta = np.asarray(pair_tree["probe_eta"], dtype=np.float64)
-    pair_mask = ~pair_blacklisted_run & pair_has_legacy_rpc & (np.abs(pair_probe_eta) < PROBE_ABS_ETA_MAX)
-    if probe_pt_gt15:
-        pair_mask &= np.asarray(pair_tree["probe_pt"], dtype=np.float64) > PROBE_PT_THRESHOLD_GEV
-    output[PAIR_MASS_HISTOGRAM] = _hist1d(PAIR_MASS_HISTOGRAM, "pair_mass", PAIR_MASS_EDGES, pair_tree["pair_mass"], pair_mask)
-    output[PAIR_Q_OVER_P_HISTOGRAM] = _hist1d(
-        PAIR_Q_OVER_P_HISTOGRAM,
-        "probe_q_over_p",
-        COUNT_Q_OVER_P_EDGES,
-        pair_tree["probe_q_over_p"],
-        pair_mask,
+) -> dict[str, BinnedHistogram]:
+    variant = HistogramVariant(
+        tight_match=tight_match,
+        probe_pt_gt15=probe_pt_gt15,
+        bx_zero=bx_zero,
+        apply_roll_blacklist=apply_roll_blacklist,
+        apply_run_blacklist=apply_run_blacklist,
     )
-    for prefix, eta_edges in (("probe", PROBE_ETA_EDGES), ("tag", TAG_ETA_EDGES)):
-        name = pair_kinematics_name(prefix)
-        output[name] = _hist2d(name, f"{prefix}_eta", eta_edges, pair_tree[f"{prefix}_eta"], f"{prefix}_pt", PAIR_MUON_PT_EDGES, pair_tree[f"{prefix}_pt"], pair_mask)
-        name = pair_eta_phi_name(prefix)
-        output[name] = _hist2d(name, f"{prefix}_eta", eta_edges, pair_tree[f"{prefix}_eta"], f"{prefix}_phi", PAIR_MUON_PHI_EDGES, pair_tree[f"{prefix}_phi"], pair_mask)
-
-    geometry = roll_geometry()
-    run_category_values = run_categories()
-    station_index = {station: index + 0.5 for index, station in enumerate(STATION_NAMES)}
-    roll_values = _category_coordinates(roll_name_values, roll_categories)
-    station_values = np.asarray([station_index[geometry[name]] for name in roll_name_values], dtype=np.float64)
-    run_values = _category_coordinates(np.asarray(rpc_tree["run"], dtype=np.uint32), run_category_values, missing=np.nan)
-    roll_edges = np.arange(len(roll_categories) + 1, dtype=np.float64)
-    station_edges = np.arange(len(STATION_NAMES) + 1, dtype=np.float64)
-    run_edges = np.arange(len(run_category_values) + 1, dtype=np.float64)
-
-    roll_blacklist = load_roll_blacklist(roll_blacklist_path) if apply_roll_blacklist and roll_blacklist_path is not None else set()
-    blacklisted_roll = np.isin(roll_name_values, tuple(roll_blacklist))
-    blacklisted_run = np.isin(np.asarray(rpc_tree["run"], dtype=np.uint32), tuple(run_blacklist))
-    rpc_probe_eta = np.asarray(rpc_tree["probe_eta"], dtype=np.float64)
-    accepted = ~blacklisted_roll & ~irpc & ~blacklisted_run & (np.abs(rpc_probe_eta) < PROBE_ABS_ETA_MAX)
-    if probe_pt_gt15:
-        accepted &= np.asarray(rpc_tree["probe_pt"], dtype=np.float64) > PROBE_PT_THRESHOLD_GEV
-    fiducial = accepted & np.asarray(rpc_tree["is_fiducial"], dtype=bool)
-    matched = matched_selection_mask(rpc_tree, tight_match=tight_match)
-    if bx_zero:
-        matched &= np.asarray(rpc_tree["bx"], dtype=np.int32) == 0
-    selection_masks = {
-        FIDUCIAL_SELECTION: fiducial,
-        MATCHED_SELECTION: fiducial & matched,
-    }
+    return build_variant_histograms(pair_tree, rpc_tree, roll_blacklist_path, run_blacklist_path, (variant,))[variant]
 
-    for selection, mask in selection_masks.items():
-        for branch in RPC_SELECTION_BRANCHES[selection]:
-            name = count_station_name(selection, branch)
-            output[name] = _hist2d(name, branch, RPC_AXIS_EDGES[branch], rpc_values[branch], "station", station_edges, station_values, mask)
-        name = count_roll_name(selection)
-        output[name] = _hist1d(name, "roll_name", roll_edges, roll_values, mask)
-        name = count_run_station_name(selection)
-        output[name] = _hist2d(name, "run", run_edges, run_values, "station", station_edges, station_values, mask)
-        for plot_name, (x_branch, x_edges, y_branch, y_edges) in KINEMATIC_2D_AXES.items():
-            name = count_2d_station_name(selection, plot_name)
-            output[name] = _hist3d(name, x_branch, x_edges, rpc_values[x_branch], y_branch, y_edges, rpc_values[y_branch], "station", station_edges, station_values, mask)
 
-    matched = selection_masks[MATCHED_SELECTION]
-    output[CLS_ROLL_PROFILE] = _hist1d(CLS_ROLL_PROFILE, "roll_name", roll_edges, roll_values, matched, rpc_values["cls"])
+def accumulate_histograms(
+    total: dict[str, BinnedHistogram] | None,
+    chunk: dict[str, BinnedHistogram],
+) -> dict[str, BinnedHistogram]:
+    if total is None:
+        return chunk
+    for name, histogram in chunk.items():
+        total[name] += histogram
+    return total
 
-    for sample, branches in RMS_PROFILE_BRANCHES.items():
-        for branch in branches:
-            name = profile_1d_station_name(sample, branch)
-            output[name] = _hist2d(name, branch, RPC_AXIS_EDGES[branch], rpc_values[branch], "station", station_edges, station_values, matched, rpc_values[sample])
 
-    cls_values = rpc_values["cls"]
-    for branch in CLS_PROFILE_BRANCHES:
-        name = cls_profile_station_name(branch)
-        output[name] = _hist2d(name, branch, RPC_AXIS_EDGES[branch], rpc_values[branch], "station", station_edges, station_values, matched, cls_values)
-    for plot_name, (x_branch, x_edges, y_branch, y_edges) in KINEMATIC_2D_AXES.items():
-        name = cls_profile_2d_station_name(plot_name)
-        output[name] = _hist3d(
-            name,
-            x_branch,
-            x_edges,
-            rpc_values[x_branch],
-            y_branch,
-            y_edges,
-            rpc_values[y_branch],
-            "station",
-            station_edges,
-            station_values,
-            matched,
-            cls_values,
-        )
-    output[CLS_RUN_STATION_PROFILE] = _hist2d(CLS_RUN_STATION_PROFILE, "run", run_edges, run_values, "station", station_edges, station_values, matched, cls_values)
-    return output
+def write_histograms(
+    output_path: Path,
+    histograms: dict[str, BinnedHistogram],
+    integer_counts: bool = False,
+    compression: uproot.compression.Compression = HISTOGRAM_COMPRESSION,
+) -> None:
+    """Write ``histograms``; with ``integer_counts`` the unweighted ones are stored as ``TH*I``."""
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    with uproot.recreate(output_path, compression=compression) as output:
+        for name, histogram in sorted(histograms.items()):
+            if base_histogram_name(name) in SPARSE_HISTOGRAM_NAMES:
+                write_sparse(output, histogram, integer_counts)
+            elif integer_counts and not histogram.weighted:
+                output[name] = histogram.to_integer_th()
+            else:
+                output[name] = histogram.to_hist()
 
 
 def write_histogram_shard(
@@ -439,19 +791,32 @@ def write_histogram_shard(
     tight_match: bool = False,
     probe_pt_gt15: bool = True,
     bx_zero: bool = False,
+    compression: uproot.compression.Compression = HISTOGRAM_COMPRESSION,
 ) -> None:
-    output_path.parent.mkdir(parents=True, exist_ok=True)
-    with uproot.recreate(output_path, compression=HISTOGRAM_COMPRESSION) as output:
-        histograms = build_histograms(
-            pair_tree,
-            rpc_tree,
-            roll_blacklist_path,
-            run_blacklist_path=run_blacklist_path,
-            apply_roll_blacklist=apply_roll_blacklist,
-            apply_run_blacklist=apply_run_blacklist,
-            tight_match=tight_match,
-            probe_pt_gt15=probe_pt_gt15,
-            bx_zero=bx_zero,
-        )
-        for name, histogram in sorted(histograms.items()):
-            output[name] = histogram
+    histograms = build_histograms(
+        pair_tree,
+        rpc_tree,
+        roll_blacklist_path,
+        run_blacklist_path=run_blacklist_path,
+        apply_roll_blacklist=apply_roll_blacklist,
+        apply_run_blacklist=apply_run_blacklist,
+        tight_match=tight_match,
+        probe_pt_gt15=probe_pt_gt15,
+        bx_zero=bx_zero,
+    )
+    write_histograms(output_path, histograms, compression=compression)
+
+
+def write_variant_shards(
+    output_path: Path,
+    pair_tree: dict[str, np.ndarray],
+    rpc_tree: dict[str, np.ndarray],
+    roll_blacklist_path: Path | None,
+    run_blacklist_path: Path | None = None,
+    variants: Sequence[HistogramVariant] = (HistogramVariant(),),
+    compression: uproot.compression.Compression = HISTOGRAM_COMPRESSION,
+) -> None:
+    """Write one shard per variant to ``variant.output_path(output_path)``."""
+    histograms = build_variant_histograms(pair_tree, rpc_tree, roll_blacklist_path, run_blacklist_path, variants)
+    for variant, variant_histograms in histograms.items():
+        write_histograms(variant.output_path(output_path), variant_histograms, compression=compression)
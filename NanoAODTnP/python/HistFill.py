@@ -0,0 +1,407 @@
+from __future__ import annotations
+
+import json
+from collections import deque
+from collections.abc import Callable, Iterable, Iterator, Sequence
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import TypeVar
+
+import hist
+import numpy as np
+import uproot
+
+SPARSE_FORMAT = "rpc-tnp-sparse/1"
+INTEGER_COUNT_DTYPE = np.int32
+
+T = TypeVar("T")
+
+
+@dataclass(frozen=True)
+class BinAxis:
+    name: str
+    edges: np.ndarray
+
+    @property
+    def size(self) -> int:
+        """Number of bins including underflow and overflow."""
+        return len(self.edges) + 1
+
+    def index(self, values: np.ndarray) -> np.ndarray:
+        """Flow-inclusive bin index per value, -1 for non-finite values.
+
+        Bins are ``[low, high)`` like boost-histogram, so the last edge falls in
+        the overflow bin.
+        """
+        values = np.asarray(values)
+        index = np.searchsorted(self.edges, values, side="right").astype(np.int32)
+        if values.dtype.kind == "f":
+            index[~np.isfinite(values)] = -1
+        return index
+
+    def to_hist(self) -> hist.axis.Variable:
+        return hist.axis.Variable(self.edges, name=self.name, label=self.name)
+
+
+def category_axis(name: str, size: int) -> BinAxis:
+    """Axis whose bin ``i`` holds category ``i``; fill it with ``category + 1``."""
+    return BinAxis(name, np.arange(size + 1, dtype=np.float64))
+
+
+@dataclass(frozen=True)
+class KeyAxis(BinAxis):
+    """Category axis labelled by sorted integer keys such as run numbers; bin ``i + 1`` holds ``keys[i]``.
+
+    Histograms on key axes with different keys are added on the union of the keys.
+    """
+
+    keys: np.ndarray
+
+    def index(self, values: np.ndarray) -> np.ndarray:
+        """Flow-inclusive bin per value, -1 for values that are not keys."""
+        values = np.asarray(values)
+        index = np.searchsorted(self.keys, values)
+        found = np.zeros(len(values), dtype=bool)
+        if len(self.keys):
+            found = self.keys[np.minimum(index, len(self.keys) - 1)] == values
+        return np.where(found, index + 1, -1).astype(np.int32)
+
+    def union(self, other: KeyAxis) -> KeyAxis:
+        return key_axis(self.name, np.union1d(self.keys, other.keys))
+
+
+def key_axis(name: str, keys: np.ndarray) -> KeyAxis:
+    keys = np.unique(keys)
+    return KeyAxis(name, np.arange(len(keys) + 1, dtype=np.float64), keys)
+
+
+class BinIndexCache:
+    """Bin indices of named columns, computed once per (column, edges)."""
+
+    def __init__(self, columns: dict[str, np.ndarray]):
+        self.columns = columns
+        self._indices: dict[tuple[str, bytes], np.ndarray] = {}
+
+    def __call__(self, column: str, axis: BinAxis) -> np.ndarray:
+        key = column, axis.edges.tobytes()
+        if key not in self._indices:
+            self._indices[key] = axis.index(self.columns[column])
+        return self._indices[key]
+
+
+class BinnedHistogram:
+    """Flow-inclusive dense counts, or weighted sums and sums of squares.
+
+    Filled from precomputed flat bin indices with ``np.bincount`` and wrapped
+    into a ``hist.Hist`` only when written.
+    """
+
+    def __init__(self, name: str, axes: tuple[BinAxis, ...], weighted: bool = False):
+        self.name = name
+        self.axes = axes
+        self.shape = tuple(axis.size for axis in axes)
+        size = int(np.prod(self.shape))
+        self.values = np.zeros(size, dtype=np.float64)
+        self.variances = np.zeros(size, dtype=np.float64) if weighted else None
+
+    @property
+    def weighted(self) -> bool:
+        return self.variances is not None
+
+    def bincounts(
+        self,
+        indices: tuple[np.ndarray, ...],
+        mask: np.ndarray,
+        weights: np.ndarray | None = None,
+    ) -> tuple[np.ndarray, np.ndarray | None]:
+        """Counts, or weighted sums and sums of squares, without adding them."""
+        selected = np.asarray(mask, dtype=bool)
+        for index in indices:
+            selected = selected & (index >= 0)
+        if weights is not None:
+            weights = np.asarray(weights)
+            if weights.dtype.kind == "f":
+                selected &= np.isfinite(weights)
+            weights = weights[selected].astype(np.float64, copy=False)
+
+        linear = indices[0][selected].astype(np.int64)
+        for index, size in zip(indices[1:], self.shape[1:]):
+            linear *= size
+            linear += index[selected]
+
+        if weights is None:
+            return np.bincount(linear, minlength=len(self.values)).astype(np.float64), None
+        return (
+            np.bincount(linear, weights=weights, minlength=len(self.values)),
+            np.bincount(linear, weights=weights * weights, minlength=len(self.values)),
+        )
+
+    def add_counts(self, values: np.ndarray, variances: np.ndarray | None) -> None:
+        self.values += values
+        if variances is not None:
+            self.variances += variances
+
+    def fill(self, indices: tuple[np.ndarray, ...], mask: np.ndarray, weights: np.ndarray | None = None) -> BinnedHistogram:
+        self.add_counts(*self.bincounts(indices, mask, weights))
+        return self
+
+    def _positions(self, axes: tuple[BinAxis, ...]) -> tuple[np.ndarray | slice, ...]:
+        """Index of this histogram's bins in ``axes``, whose key axes hold a superset of its keys."""
+        positions = tuple(
+            np.concatenate(([0], np.searchsorted(new.keys, old.keys) + 1, [new.size - 1]))
+            if isinstance(old, KeyAxis) else slice(None)
+            for old, new in zip(self.axes, axes)
+        )
+        if sum(isinstance(position, np.ndarray) for position in positions) <= 1:
+            return positions
+        return np.ix_(*(
+            np.arange(old.size) if isinstance(position, slice) else position
+            for old, position in zip(self.axes, positions)
+        ))
+
+    def realigned(self, axes: tuple[BinAxis, ...]) -> BinnedHistogram:
+        """Copy onto ``axes``, whose key axes hold a superset of this histogram's keys."""
+        result = BinnedHistogram(self.name, axes, self.weighted)
+        positions = self._positions(axes)
+        result.values.reshape(result.shape)[positions] = self.values.reshape(self.shape)
+        if self.weighted:
+            result.variances.reshape(result.shape)[positions] = self.variances.reshape(self.shape)
+        return result
+
+    def __iadd__(self, other: BinnedHistogram) -> BinnedHistogram:
+        if self.weighted != other.weighted or len(self.axes) != len(other.axes) or any(
+            isinstance(axis, KeyAxis) != isinstance(other_axis, KeyAxis)
+            or (not isinstance(axis, KeyAxis) and axis.size != other_axis.size)
+            for axis, other_axis in zip(self.axes, other.axes)
+        ):
+            raise RuntimeError(f"Cannot add histogram {other.name} with a different layout to {self.name}")
+        if any(
+            isinstance(axis, KeyAxis) and not np.array_equal(axis.keys, other_axis.keys)
+            for axis, other_axis in zip(self.axes, other.axes)
+        ):
+            axes = tuple(
+                axis.union(other_axis) if isinstance(axis, KeyAxis) else axis
+                for axis, other_axis in zip(self.axes, other.axes)
+            )
+            if any(axis.size != new.size for axis, new in zip(self.axes, axes)):
+                merged = self.realigned(axes)
+                self.axes, self.shape, self.values, self.variances = merged.axes, merged.shape, merged.values, merged.variances
+            # Scatter into the union in place; the positions are distinct, so += adds every bin once.
+            positions = other._positions(self.axes)
+            self.values.reshape(self.shape)[positions] += other.values.reshape(other.shape)
+            if self.weighted:
+                self.variances.reshape(self.shape)[positions] += other.variances.reshape(other.shape)
+            return self
+        self.values += other.values
+        if self.weighted:
+            self.variances += other.variances
+        return self
+
+    def integer_counts(self) -> np.ndarray:
+        """Flow-inclusive counts as 32-bit integers, the bin type of ``TH*I``."""
+        if self.weighted:
+            raise RuntimeError(f"Cannot store weighted histogram {self.name} as integer counts")
+        if len(self.values) and self.values.max() > np.iinfo(INTEGER_COUNT_DTYPE).max:
+            raise RuntimeError(f"Histogram {self.name} overflows {np.dtype(INTEGER_COUNT_DTYPE).name} counts")
+        return self.values.astype(INTEGER_COUNT_DTYPE)
+
+    def sparse_columns(self, integer_counts: bool = False) -> dict[str, np.ndarray]:
+        """Flow-inclusive per-axis bin indices, values and variances of the non-empty bins."""
+        filled = self.values != 0
+        if self.weighted:
+            filled |= self.variances != 0
+        linear = np.flatnonzero(filled)
+        index_dtype = np.uint16 if max(self.shape) <= np.iinfo(np.uint16).max else np.uint32
+        columns = {}
+        for dim, (axis, index) in enumerate(zip(self.axes, np.unravel_index(linear, self.shape))):
+            if isinstance(axis, KeyAxis):
+                # Key axes never fill their flow bins, so every index maps to a key.
+                columns[f"key{dim}"] = axis.keys[index - 1]
+            else:
+                columns[f"index{dim}"] = index.astype(index_dtype)
+        columns["value"] = (self.integer_counts() if integer_counts else self.values)[linear]
+        if self.weighted:
+            columns["variance"] = self.variances[linear]
+        return columns
+
+    def sparse_title(self) -> str:
+        return json.dumps({
+            "format": SPARSE_FORMAT,
+            "weighted": self.weighted,
+            "axes": [
+                {"name": axis.name, "keys": True} if isinstance(axis, KeyAxis) else {"name": axis.name, "edges": axis.edges.tolist()}
+                for axis in self.axes
+            ],
+        })
+
+    @classmethod
+    def from_sparse(cls, name: str, title: str, columns: dict[str, np.ndarray]) -> BinnedHistogram:
+        """Dense histogram from sparse columns; repeated bins, as left by hadd, are added."""
+        header = json.loads(title)
+        if header.get("format") != SPARSE_FORMAT:
+            raise RuntimeError(f"Unsupported sparse histogram format for {name}: {header.get('format')!r}")
+        axes = tuple(
+            key_axis(axis["name"], columns[f"key{dim}"]) if axis.get("keys") else BinAxis(axis["name"], np.asarray(axis["edges"], dtype=np.float64))
+            for dim, axis in enumerate(header["axes"])
+        )
+        histogram = cls(name, axes, header["weighted"])
+        indices = tuple(
+            axis.index(columns[f"key{dim}"]).astype(np.int64) if isinstance(axis, KeyAxis) else np.asarray(columns[f"index{dim}"], dtype=np.int64)
+            for dim, axis in enumerate(axes)
+        )
+        linear = np.ravel_multi_index(indices, histogram.shape)
+        histogram.values += np.bincount(linear, weights=columns["value"], minlength=len(histogram.values))
+        if histogram.weighted:
+            histogram.variances += np.bincount(linear, weights=columns["variance"], minlength=len(histogram.variances))
+        return histogram
+
+    def to_integer_th(self):
+        """Unweighted counts as an uproot ``TH1I``, ``TH2I`` or ``TH3I`` without sumw2."""
+        counts = self.integer_counts().reshape(self.shape)
+        inner = counts[tuple(slice(1, -1) for _ in self.shape)].astype(np.float64)
+        centers = [
+            (0.5 * (axis.edges[:-1] + axis.edges[1:])).reshape([-1 if dim == each else 1 for each in range(len(self.shape))])
+            for dim, axis in enumerate(self.axes)
+        ]
+
+        def moment(*dims: int) -> float:
+            weighted = inner
+            for dim in dims:
+                weighted = weighted * centers[dim]
+            return float(weighted.sum())
+
+        axes = [
+            uproot.writing.identify.to_TAxis(
+                f"{'xyz'[dim]}axis", axis.name, axis.size - 2, float(axis.edges[0]), float(axis.edges[-1]), axis.edges,
+            )
+            for dim, axis in enumerate(self.axes)
+        ]
+        # ROOT stores bins with the first axis running fastest.
+        common = {
+            "fName": self.name,
+            "fTitle": "",
+            "data": counts.ravel(order="F"),
+            "fEntries": float(counts.sum()),
+            "fTsumw": moment(),
+            "fTsumw2": moment(),
+            "fTsumwx": moment(0),
+            "fTsumwx2": moment(0, 0),
+            "fSumw2": None,
+            "fXaxis": axes[0],
+        }
+        if len(axes) == 1:
+            return uproot.writing.identify.to_TH1x(**common)
+        common.update(fTsumwy=moment(1), fTsumwy2=moment(1, 1), fTsumwxy=moment(0, 1), fYaxis=axes[1])
+        if len(axes) == 2:
+            return uproot.writing.identify.to_TH2x(**common)
+        common.update(fTsumwz=moment(2), fTsumwz2=moment(2, 2), fTsumwxz=moment(0, 2), fTsumwyz=moment(1, 2), fZaxis=axes[2])
+        return uproot.writing.identify.to_TH3x(**common)
+
+    def to_hist(self) -> hist.Hist:
+        storage = hist.storage.Weight() if self.weighted else hist.storage.Double()
+        histogram = hist.Hist(*(axis.to_hist() for axis in self.axes), storage=storage, name=self.name)
+        view = histogram.view(flow=True)
+        if self.weighted:
+            view["value"] = self.values.reshape(self.shape)
+            view["variance"] = self.variances.reshape(self.shape)
+        else:
+            view[...] = self.values.reshape(self.shape)
+        return histogram
+
+
+def write_sparse(directory, histogram: BinnedHistogram, integer_counts: bool = False) -> None:
+    """Write ``histogram`` as a flat TTree of its non-empty bins, which hadd merges additively."""
+    columns = histogram.sparse_columns(integer_counts and not histogram.weighted)
+    directory.mktree(
+        histogram.name,
+        {key: value.dtype for key, value in columns.items()},
+        title=histogram.sparse_title(),
+    )
+    if len(columns["value"]):
+        directory[histogram.name].extend(columns)
+
+
+def read_sparse(tree: uproot.TTree) -> BinnedHistogram:
+    return BinnedHistogram.from_sparse(tree.name, tree.title, tree.arrays(library="np"))
+
+
+def is_sparse(source) -> bool:
+    return isinstance(source, uproot.TTree)
+
+
+class FillPool:
+    """Run histogram fills inline, or as thread-pool tasks added back in submission order.
+
+    Each fill is one task, so threads only overlap fills of different histograms.
+    """
+
+    def __init__(self, threads: int = 1):
+        self.threads = threads
+        self._executor = ThreadPoolExecutor(threads, thread_name_prefix="hist-fill") if threads > 1 else None
+        self._pending: list[tuple[BinnedHistogram, Future]] = []
+
+    def __enter__(self) -> FillPool:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def fill(
+        self,
+        histogram: BinnedHistogram,
+        indices: tuple[np.ndarray, ...],
+        mask: np.ndarray,
+        weights: np.ndarray | None = None,
+    ) -> BinnedHistogram:
+        if self._executor is None:
+            return histogram.fill(indices, mask, weights)
+        self._pending.append((histogram, self._executor.submit(histogram.bincounts, indices, mask, weights)))
+        return histogram
+
+    def wait(self) -> None:
+        pending, self._pending = self._pending, []
+        for histogram, future in pending:
+            histogram.add_counts(*future.result())
+
+
+def reduce_pairwise(partials: Iterable[T], add: Callable[[T, T], T]) -> T | None:
+    """Add partial sums pairwise in input order, holding at most one partial per tree level.
+
+    ``add(left, right)`` may update and return ``left``. None when there are no partials.
+    """
+    levels: list[T | None] = []
+    for partial in partials:
+        level = 0
+        while level < len(levels) and levels[level] is not None:
+            partial = add(levels[level], partial)
+            levels[level] = None
+            level += 1
+        if level == len(levels):
+            levels.append(partial)
+        else:
+            levels[level] = partial
+    merged = None
+    # Higher levels hold earlier inputs, so fold from the top to keep the input order.
+    for partial in reversed(levels):
+        if partial is not None:
+            merged = partial if merged is None else add(merged, partial)
+    return merged
+
+
+def ordered_map(function: Callable, items: Sequence, executor: Executor | None, workers: int) -> Iterator:
+    """``map(function, items)`` on ``executor``, with at most two tasks per worker in flight."""
+    if executor is None:
+        yield from map(function, items)
+        return
+    pending: deque[Future] = deque()
+    for item in items:
+        pending.append(executor.submit(function, item))
+        if len(pending) >= 2 * workers:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
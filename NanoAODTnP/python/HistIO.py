@@ -1,9 +1,17 @@
 from __future__ import annotations
 
+import contextlib
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
-from functools import lru_cache
+from functools import lru_cache, partial
 from pathlib import Path
-from typing import Sequence
+from typing import Callable, Iterator, Mapping, Sequence
 
 import numpy as np
 import uproot
@@ -12,18 +20,24 @@ from RPCDPGAnalysis.NanoAODTnP.BuildUtils import RollEfficiencyResult, RollMeanR
 from RPCDPGAnalysis.NanoAODTnP.HistBuild import (  # type: ignore
     HISTOGRAM_NAMES,
     KINEMATIC_2D_HISTOGRAM_NAMES,
-    OPTIONAL_HISTOGRAM_NAMES,
+    NUMERATOR_HISTOGRAM_NAMES,
+    PROFILE_OPTIONAL_HISTOGRAM_NAMES,
+    RUN_ROLL_HISTOGRAM_NAMES,
     CLS_ROLL_PROFILE,
+    CLS_RUN_ROLL_PROFILE,
     CLS_RUN_STATION_PROFILE,
     FIDUCIAL_SELECTION,
     MATCHED_SELECTION,
     PAIR_MASS_HISTOGRAM,
     PAIR_Q_OVER_P_HISTOGRAM,
     STATION_NAMES,
+    MatchPolicy,
     count_roll_name,
     count_2d_station_name,
+    count_run_roll_name,
     count_run_station_name,
     count_station_name,
+    is_profile_histogram,
     pair_eta_phi_name,
     pair_kinematics_name,
     cls_profile_station_name,
@@ -32,6 +46,14 @@ from RPCDPGAnalysis.NanoAODTnP.HistBuild import (  # type: ignore
     roll_names,
     run_categories,
 )
+from RPCDPGAnalysis.NanoAODTnP.HistFill import (  # type: ignore
+    BinnedHistogram,
+    KeyAxis,
+    is_sparse,
+    ordered_map,
+    read_sparse,
+    reduce_pairwise,
+)
 
 
 @dataclass(frozen=True)
@@ -96,10 +118,21 @@ class CategoryEfficiencyResult:
     passed: np.ndarray
 
 
+@dataclass(frozen=True)
+class RunRollResult:
+    """Run-by-roll matrices; rows follow ``runs`` and columns ``ROLL_NAMES``."""
+    runs: np.ndarray
+    total: np.ndarray
+    passed: np.ndarray
+    cls_sum: np.ndarray
+    cls_sumsq: np.ndarray
+
+
 @dataclass
 class DenseHistogram:
+    """Flow-free contents; counts are int64 and keep no variances, profiles are float64 sums."""
     values: np.ndarray
-    variances: np.ndarray
+    variances: np.ndarray | None
     edges: tuple[np.ndarray, ...]
 
 
@@ -137,52 +170,432 @@ STATION_INDICES = {
 }
 
 
-@lru_cache(maxsize=16)
-def _load_paths(paths: tuple[str, ...]) -> dict[str, DenseHistogram]:
-    merged: dict[str, DenseHistogram] = {}
-    optional_names = set(OPTIONAL_HISTOGRAM_NAMES)
-    expected_optional_names: set[str] | None = None
-    schema_reference: Path | None = None
-    for input_path in map(Path, paths):
-        with uproot.open(input_path) as root_file:
-            available_optional_names = {name for name in optional_names if name in root_file}
+def _run_positions(name: str, runs: np.ndarray, run_list: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Position of each shard run in ``run_list`` and whether it is listed there."""
+    position = np.searchsorted(run_list, runs)
+    found = np.zeros(len(runs), dtype=bool)
+    if len(run_list):
+        found = run_list[np.minimum(position, len(run_list) - 1)] == runs
+    if not found.all():
+        print(f"[warn] {name}: runs missing from the run list are skipped: {runs[~found].tolist()}", flush=True)
+    return position, found
+
+
+def _align_runs(values: np.ndarray, position: np.ndarray, found: np.ndarray, axis: int, size: int) -> np.ndarray:
+    aligned = np.zeros((*values.shape[:axis], size, *values.shape[axis + 1:]), dtype=values.dtype)
+    np.moveaxis(aligned, axis, 0)[position[found]] = np.moveaxis(values, axis, 0)[found]
+    return aligned
+
+
+def _sparse_contents(tree, runs: np.ndarray) -> tuple[np.ndarray, np.ndarray | None, tuple[np.ndarray, ...]]:
+    """Dense flow-free values, variances and edges of a sparse histogram tree.
+
+    Run axes, which hold only the runs a shard saw, are aligned to ``runs`` so
+    shards written before runs were appended to the run list still merge.
+    """
+    histogram = read_sparse(tree)
+    inner = tuple(slice(1, -1) for _ in histogram.shape)
+    values = histogram.values.reshape(histogram.shape)[inner]
+    variances = histogram.variances.reshape(histogram.shape)[inner] if histogram.weighted else None
+    edges = [axis.edges for axis in histogram.axes]
+    for dim, axis in enumerate(histogram.axes):
+        if isinstance(axis, KeyAxis):
+            position, found = _run_positions(histogram.name, axis.keys, runs)
+            values = _align_runs(values, position, found, dim, len(runs))
+            variances = None if variances is None else _align_runs(variances, position, found, dim, len(runs))
+            edges[dim] = np.arange(len(runs) + 1, dtype=np.float64)
+    return values, variances, tuple(edges)
+
+
+def _dense_contents(source, profile: bool) -> tuple[np.ndarray, np.ndarray | None, tuple[np.ndarray, ...]]:
+    values = np.asarray(source.values(flow=False), dtype=np.float64)
+    variances = None
+    if profile:
+        source_variances = source.variances(flow=False)
+        variances = np.zeros_like(values) if source_variances is None else np.asarray(source_variances, dtype=np.float64)
+    return values, variances, tuple(np.asarray(axis.edges(flow=False), dtype=np.float64) for axis in source.axes)
+
+
+# Run-by-roll histograms are loaded on request by load_run_roll; aligned to the run list they would dominate memory.
+DENSE_HISTOGRAM_NAMES = tuple(name for name in HISTOGRAM_NAMES if name not in RUN_ROLL_HISTOGRAM_NAMES)
+
+
+def _stored_names(match_policy: str | None, names: Sequence[str] = DENSE_HISTOGRAM_NAMES) -> dict[str, str]:
+    """Canonical histogram name to the name read from the shard for ``match_policy``."""
+    if match_policy is None:
+        return {name: name for name in names}
+    policy = MatchPolicy.parse(match_policy)
+    numerators = set(NUMERATOR_HISTOGRAM_NAMES)
+    return {name: policy.histogram_name(name) if name in numerators else name for name in names}
+
+
+DEFAULT_LOAD_WORKERS = 4
+
+
+def _file_schema(
+    input_path: Path, stored_names: dict[str, str], optional_names: set[str], match_policy: str | None,
+) -> set[str]:
+    """Optional histograms present in one file, read from its directory only."""
+    with uproot.open(input_path) as root_file:
+        for name, stored_name in stored_names.items():
+            if name in optional_names or stored_name in root_file:
+                continue
+            if stored_name != name:
+                raise RuntimeError(
+                    f"Missing histogram {stored_name} in {input_path}; "
+                    f"was it filled with --match-policy {match_policy}?"
+                )
+            raise RuntimeError(f"Missing histogram {name} in {input_path}")
+        return {name for name in optional_names if stored_names[name] in root_file}
+
+
+def _load_file(input_path: str, stored_names: dict[str, str], runs: np.ndarray = RUNS) -> dict[str, DenseHistogram]:
+    """Flow-free contents of the ``stored_names`` one file holds, under their canonical names."""
+    histograms: dict[str, DenseHistogram] = {}
+    with uproot.open(input_path) as root_file:
+        for name, stored_name in stored_names.items():
+            if stored_name not in root_file:
+                continue
+            source = root_file[stored_name]
+            profile = is_profile_histogram(name)
+            if is_sparse(source):
+                values, variances, edges = _sparse_contents(source, runs)
+            else:
+                values, variances, edges = _dense_contents(source, profile)
+            if not profile:
+                # Counts read from TH*D, TH*I or sparse trees are exact integers.
+                values, variances = values.astype(np.int64), None
+            histograms[name] = DenseHistogram(values, variances, edges)
+    return histograms
+
+
+def _add_histograms(merged: dict[str, DenseHistogram], other: dict[str, DenseHistogram]) -> dict[str, DenseHistogram]:
+    """Add ``other`` into ``merged`` after checking that every axis has the same binning."""
+    for name, histogram in other.items():
+        if name not in merged:
+            merged[name] = histogram
+            continue
+        reference = merged[name]
+        if len(histogram.edges) != len(reference.edges) or any(
+            len(each) != len(edges) or not np.allclose(each, edges)
+            for each, edges in zip(histogram.edges, reference.edges)
+        ):
+            raise RuntimeError(f"Cannot merge histogram {name} with different axis binning")
+        reference.values += histogram.values
+        if histogram.variances is not None:
+            reference.variances += histogram.variances
+    return merged
+
+
+class LazyHistograms(Mapping[str, DenseHistogram]):
+    """Merged histograms of ``paths``, each decoded from every file on first access.
+
+    The schema is checked up front from the file directories, so membership
+    tests and iteration never decode a histogram. Files are decoded in up to
+    ``workers`` processes: most of a decode is uproot's pure-Python object
+    reading, which holds the GIL. With ``cache`` decoded histograms are kept
+    on disk and memory-mapped by later runs. Run axes are aligned to ``runs``,
+    by default the package run list.
+    """
+
+    def __init__(
+        self,
+        paths: Sequence[str],
+        match_policy: str | None = None,
+        workers: int = 1,
+        cache: HistogramCache | None = None,
+        runs: np.ndarray | None = None,
+    ):
+        self.paths = tuple(paths)
+        self.match_policy = match_policy
+        self.workers = min(workers, len(self.paths), os.cpu_count() or 1)
+        self.cache = cache
+        self.runs = RUNS if runs is None else np.unique(np.asarray(runs, dtype=np.uint32))
+        self._key = None if cache is None else cache.key(self.paths, match_policy, self.runs)
+        self._stored_names = _stored_names(match_policy)
+        self._histograms: dict[str, DenseHistogram] = {}
+        self._executor: ProcessPoolExecutor | None = None
+        self._names = self._available_names()
+
+    def _available_names(self) -> tuple[str, ...]:
+        if self._key is not None:
+            names = self.cache.load_names(self._key)
+            if names is not None:
+                return names
+        optional_names = set(PROFILE_OPTIONAL_HISTOGRAM_NAMES) & set(self._stored_names)
+        expected_optional_names: set[str] | None = None
+        for input_path in self.paths:
+            available_optional_names = _file_schema(Path(input_path), self._stored_names, optional_names, self.match_policy)
             if expected_optional_names is None:
                 expected_optional_names = available_optional_names
-                schema_reference = input_path
             elif available_optional_names != expected_optional_names:
                 missing = sorted(expected_optional_names - available_optional_names)
                 extra = sorted(available_optional_names - expected_optional_names)
                 raise RuntimeError(
                     "Cannot merge legacy and current histogram schemas: "
-                    f"{input_path} differs from {schema_reference}; "
+                    f"{input_path} differs from {self.paths[0]}; "
                     f"missing={missing or 'none'}, extra={extra or 'none'}"
                 )
-            for name in HISTOGRAM_NAMES:
-                if name not in root_file:
-                    if name in optional_names:
+        names = tuple(
+            name for name in self._stored_names
+            if name not in optional_names or name in (expected_optional_names or set())
+        )
+        if self._key is not None:
+            self.cache.store_names(self._key, names)
+        return names
+
+    def __getitem__(self, name: str) -> DenseHistogram:
+        if name not in self._histograms:
+            if name not in self._names:
+                raise KeyError(name)
+            self.load(name)
+        return self._histograms[name]
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._names
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._names)
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def load(self, *names: str) -> None:
+        """Decode ``names``, or every histogram not loaded yet, in one pass over the files."""
+        missing = [name for name in (names or self._names) if name not in self._histograms]
+        if self._key is not None:
+            for name in missing:
+                histogram = self.cache.load(self._key, name)
+                if histogram is not None:
+                    self._histograms[name] = histogram
+            missing = [name for name in missing if name not in self._histograms]
+        if not missing:
+            return
+        if self.workers > 1 and self._executor is None:
+            self._executor = ProcessPoolExecutor(self.workers)
+        stored_names = {name: self._stored_names[name] for name in missing}
+        merged = reduce_pairwise(
+            ordered_map(partial(_load_file, stored_names=stored_names, runs=self.runs), self.paths, self._executor, self.workers),
+            _add_histograms,
+        ) or {}
+        self._histograms.update(merged)
+        if self._key is not None:
+            for name in missing:
+                self.cache.store(self._key, name, merged[name])
+            self.cache.evict(keep=self._key)
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def __enter__(self) -> LazyHistograms:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+@lru_cache(maxsize=16)
+def _load_paths(
+    paths: tuple[str, ...], match_policy: str | None = None, workers: int = 1,
+) -> dict[str, DenseHistogram]:
+    """Merge every histogram of ``paths`` at once; see ``LazyHistograms``."""
+    with LazyHistograms(paths, match_policy, workers) as histograms:
+        histograms.load()
+        return dict(histograms)
+
+
+HISTOGRAM_CACHE_FORMAT = "rpc-tnp-cache/2"
+DEFAULT_HISTOGRAM_CACHE_BYTES = 10 * 1024**3
+# Hidden temporary files older than this were left by an interrupted write.
+_STALE_TEMPORARY_SECONDS = 3600
+
+
+def _map_array(path: Path) -> np.ndarray:
+    # Copy-on-write, so callers may modify the arrays without touching the cache.
+    return np.load(path, mmap_mode="c").view(np.ndarray)
+
+
+def _write_atomic(path: Path, write: Callable) -> None:
+    """Write through a hidden temporary file renamed over ``path``."""
+    descriptor, temporary = tempfile.mkstemp(prefix=".", dir=path.parent)
+    try:
+        with os.fdopen(descriptor, "wb") as stream:
+            write(stream)
+        os.replace(temporary, path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.unlink(temporary)
+        raise
+
+
+class HistogramCache:
+    """Decoded histograms kept on disk as ``.npy`` arrays, each with a JSON file of its axis edges.
+
+    Each set of inputs gets one entry directory, keyed by the files' path,
+    size and mtime, the match policy and the run list. Histograms are added
+    to it as they are first decoded and memory-mapped on later runs. Once the
+    cache holds more than ``max_bytes`` the least recently used entries are
+    evicted.
+    """
+
+    def __init__(self, directory: Path | str, max_bytes: int = DEFAULT_HISTOGRAM_CACHE_BYTES):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+
+    @staticmethod
+    def key(paths: tuple[str, ...], match_policy: str | None = None, runs: np.ndarray = RUNS) -> str | None:
+        """Fingerprint of the inputs, or None when one of them cannot be stat'ed, e.g. an XRootD URL."""
+        try:
+            stats = [os.stat(path) for path in paths]
+        except OSError:
+            return None
+        files = [(str(Path(path).resolve()), stat.st_size, stat.st_mtime_ns) for path, stat in zip(paths, stats)]
+        payload = json.dumps({
+            "format": HISTOGRAM_CACHE_FORMAT,
+            "files": files,
+            "match_policy": match_policy,
+            # Sparse run axes are aligned to the run list, so appending runs changes the contents.
+            "runs": hashlib.sha256(np.asarray(runs, dtype=np.uint32).tobytes()).hexdigest(),
+        })
+        return hashlib.sha256(payload.encode()).hexdigest()[:32]
+
+    def load_names(self, key: str) -> tuple[str, ...] | None:
+        """Histogram names the inputs hold, as validated when the entry was created."""
+        try:
+            return tuple(json.loads((self.directory / key / "names.json").read_text()))
+        except (OSError, ValueError):
+            return None
+
+    def store_names(self, key: str, names: Sequence[str]) -> None:
+        self._store(key, {"names.json": lambda stream: stream.write(json.dumps(list(names)).encode())})
+
+    def load(self, key: str, name: str) -> DenseHistogram | None:
+        entry = self.directory / key
+        try:
+            item = json.loads((entry / f"{name}.json").read_text())
+            histogram = DenseHistogram(
+                _map_array(entry / f"{name}.values.npy"),
+                _map_array(entry / f"{name}.variances.npy") if item["variances"] else None,
+                tuple(np.asarray(edges, dtype=np.float64) for edges in item["edges"]),
+            )
+            os.utime(entry)
+        except (OSError, ValueError, KeyError):
+            return None
+        return histogram
+
+    def store(self, key: str, name: str, histogram: DenseHistogram) -> None:
+        item = {"variances": histogram.variances is not None, "edges": [edges.tolist() for edges in histogram.edges]}
+        writers = {f"{name}.values.npy": partial(np.save, arr=histogram.values)}
+        if histogram.variances is not None:
+            writers[f"{name}.variances.npy"] = partial(np.save, arr=histogram.variances)
+        # The JSON goes last: a histogram is complete once its JSON exists.
+        writers[f"{name}.json"] = lambda stream: stream.write(json.dumps(item).encode())
+        self._store(key, writers)
+
+    def _store(self, key: str, writers: dict[str, Callable]) -> None:
+        entry = self.directory / key
+        try:
+            entry.mkdir(parents=True, exist_ok=True)
+            for file_name, write in writers.items():
+                _write_atomic(entry / file_name, write)
+        except OSError as error:
+            # The cache only saves decoding time, so a full or read-only disk is not fatal.
+            print(f"[warn] could not write histogram cache entry {entry}: {error}", flush=True)
+
+    def evict(self, keep: str | None = None) -> None:
+        """Remove least recently used entries until the cache fits ``max_bytes``; ``keep`` is never removed."""
+        try:
+            directories = list(self.directory.iterdir())
+        except OSError:
+            # Nothing was stored; _store has already warned about the directory.
+            return
+        entries = []
+        now = time.time()
+        for entry in directories:
+            try:
+                size = 0
+                for each in entry.iterdir():
+                    stat = each.stat()
+                    if each.name.startswith(".") and now - stat.st_mtime > _STALE_TEMPORARY_SECONDS:
+                        each.unlink()
                         continue
-                    raise RuntimeError(f"Missing histogram {name} in {input_path}")
-                source = root_file[name]
-                values = np.asarray(source.values(flow=False), dtype=np.float64)
-                source_variances = source.variances(flow=False)
-                variances = np.zeros_like(values) if source_variances is None else np.asarray(source_variances, dtype=np.float64)
-                edges = tuple(np.asarray(axis.edges(flow=False), dtype=np.float64) for axis in source.axes)
-                if name not in merged:
-                    merged[name] = DenseHistogram(values.copy(), variances.copy(), edges)
+                    size += stat.st_size
+                used = entry.stat().st_mtime
+            except OSError:
+                continue
+            entries.append((used, size, entry))
+        total = sum(size for _, size, _ in entries)
+        for _, size, entry in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if entry.name == keep:
+                continue
+            shutil.rmtree(entry, ignore_errors=True)
+            total -= size
+            print(f"[info] evicted histogram cache entry {entry.name} ({size / 1e6:.1f} MB)", flush=True)
+
+
+def load_histograms(
+    spec,
+    match_policy: str | None = None,
+    workers: int = DEFAULT_LOAD_WORKERS,
+    cache: HistogramCache | None = None,
+    runs: np.ndarray | None = None,
+) -> LazyHistograms:
+    """Histograms of ``spec``, decoded on first access with ``workers`` processes and through ``cache`` when given.
+
+    ``match_policy`` selects numerators stored with ``rpc-tnp-analyze.py --match-policy``.
+    Run axes are aligned to ``runs``, e.g. ``RunMeta.runs`` of the plots.
+    Close the result to stop its worker processes.
+    """
+    policy = "" if match_policy is None else f" match_policy={match_policy}"
+    print(f"[info] opening histograms: Run{spec.year} files={len(spec.input_paths)}{policy}", flush=True)
+    return LazyHistograms(tuple(str(path) for path in spec.input_paths), match_policy, workers, cache, runs)
+
+
+@lru_cache(maxsize=4)
+def _load_run_roll_paths(paths: tuple[str, ...], match_policy: str | None = None) -> RunRollResult:
+    stored_names = _stored_names(match_policy, RUN_ROLL_HISTOGRAM_NAMES)
+    merged: dict[str, BinnedHistogram] = {}
+    for input_path in paths:
+        with uproot.open(input_path) as root_file:
+            for name, stored_name in stored_names.items():
+                if stored_name not in root_file:
+                    raise RuntimeError(
+                        f"Missing histogram {stored_name} in {input_path}; "
+                        "run-by-roll histograms need a standard or full profile shard"
+                    )
+                histogram = read_sparse(root_file[stored_name])
+                if name in merged:
+                    merged[name] += histogram
                 else:
-                    if len(edges) != len(merged[name].edges) or any(
-                        len(each) != len(reference) or not np.allclose(each, reference)
-                        for each, reference in zip(edges, merged[name].edges)
-                    ):
-                        raise RuntimeError(f"Cannot merge histogram {name} with different axis binning")
-                    merged[name].values += values
-                    merged[name].variances += variances
-    return merged
+                    merged[name] = histogram
+    # The CLS profile holds only runs with matched hits; put all three on the union of runs.
+    run_axis = None
+    for histogram in merged.values():
+        run_axis = histogram.axes[0] if run_axis is None else run_axis.union(histogram.axes[0])
+    matrices = {}
+    for name, histogram in merged.items():
+        histogram = histogram.realigned((run_axis, *histogram.axes[1:]))
+        values = histogram.values.reshape(histogram.shape)[1:-1, 1:-1]
+        variances = histogram.variances.reshape(histogram.shape)[1:-1, 1:-1] if histogram.weighted else None
+        matrices[name] = values, variances
+    cls_sum, cls_sumsq = matrices[CLS_RUN_ROLL_PROFILE]
+    return RunRollResult(
+        runs=run_axis.keys.astype(np.uint32),
+        total=matrices[count_run_roll_name(FIDUCIAL_SELECTION)][0].astype(np.int64),
+        passed=matrices[count_run_roll_name(MATCHED_SELECTION)][0].astype(np.int64),
+        cls_sum=cls_sum,
+        cls_sumsq=cls_sumsq,
+    )
 
 
-def load_histograms(spec) -> dict[str, DenseHistogram]:
-    print(f"[info] loading histograms: Run{spec.year} files={len(spec.input_paths)}", flush=True)
-    return _load_paths(tuple(str(path) for path in spec.input_paths))
+def load_run_roll(paths: Sequence[Path | str], match_policy: str | None = None) -> RunRollResult:
+    """Run-by-roll fiducial and matched counts and CLS sums over every run in ``paths``."""
+    print(f"[info] loading run-by-roll histograms: files={len(paths)}", flush=True)
+    return _load_run_roll_paths(tuple(str(path) for path in paths), match_policy)
 
 
 def _contents(histogram: DenseHistogram, variance: bool = False) -> np.ndarray:
@@ -355,6 +768,18 @@ def has_kinematic_2d_histograms(histograms: dict[str, DenseHistogram]) -> bool:
     return all(name in histograms for name in KINEMATIC_2D_HISTOGRAM_NAMES)
 
 
+def efficiency_2d_histogram_names(plots: Sequence) -> set[str]:
+    return {count_2d_station_name(selection, plot["name"]) for plot in plots for selection in (FIDUCIAL_SELECTION, MATCHED_SELECTION)}
+
+
+def cls_2d_histogram_names(plots: Sequence) -> set[str]:
+    return {
+        name
+        for plot in plots
+        for name in (cls_profile_2d_station_name(plot["name"]), count_2d_station_name(MATCHED_SELECTION, plot["name"]))
+    }
+
+
 def load_efficiency_2d_results(histograms: dict[str, DenseHistogram], plots: Sequence, group: str = "all") -> dict[str, Efficiency2DResult]:
     results = {}
     for plot in plots:
@@ -391,7 +816,11 @@ def _count_by_roll(histograms: dict[str, DenseHistogram], selection: str, dtype=
     return _contents(histograms[count_roll_name(selection)]).astype(dtype, copy=False)
 
 
-def _roll_mean_result(histograms: dict[str, DenseHistogram]) -> RollMeanResult:
+ROLL_MEAN_HISTOGRAM_NAMES = (CLS_ROLL_PROFILE, count_roll_name(MATCHED_SELECTION))
+ROLL_EFFICIENCY_HISTOGRAM_NAMES = (count_roll_name(FIDUCIAL_SELECTION), count_roll_name(MATCHED_SELECTION))
+
+
+def load_roll_mean_result(histograms: dict[str, DenseHistogram]) -> RollMeanResult:
     sums = _contents(histograms[CLS_ROLL_PROFILE])
     counts = _count_by_roll(histograms, MATCHED_SELECTION, np.int64)
     means = np.divide(sums, counts, out=np.full(len(counts), np.nan, dtype=np.float64), where=counts > 0)
@@ -401,7 +830,7 @@ def _roll_mean_result(histograms: dict[str, DenseHistogram]) -> RollMeanResult:
     )
 
 
-def _roll_efficiency_result(histograms: dict[str, DenseHistogram]) -> RollEfficiencyResult:
+def load_roll_efficiency_result(histograms: dict[str, DenseHistogram]) -> RollEfficiencyResult:
     total = _count_by_roll(histograms, FIDUCIAL_SELECTION, np.int64)
     passed = _count_by_roll(histograms, MATCHED_SELECTION, np.int64)
     efficiency = np.divide(100.0 * passed, total, out=np.full(len(total), np.nan), where=total > 0)
@@ -440,7 +869,7 @@ def _category_efficiency(labels: np.ndarray, total: np.ndarray, passed: np.ndarr
     )
 
 
-def _run_profile_arrays(histograms: dict[str, DenseHistogram], key: str) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+def _run_profile_arrays(histograms: dict[str, DenseHistogram], runs: np.ndarray, key: str) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
     indices = STATION_INDICES[key]
     profile = histograms[CLS_RUN_STATION_PROFILE]
     counts = histograms[count_run_station_name(MATCHED_SELECTION)]
@@ -448,25 +877,25 @@ def _run_profile_arrays(histograms: dict[str, DenseHistogram], key: str) -> tupl
     sumsqs = np.sum(_contents(profile, variance=True)[:, indices], axis=1)
     count_values = np.sum(_contents(counts)[:, indices], axis=1)
     selected = (count_values != 0) | (sums != 0) | (sumsqs != 0)
-    return RUNS[selected], sums[selected], sumsqs[selected], count_values[selected]
+    return runs[selected], sums[selected], sumsqs[selected], count_values[selected]
 
 
-def _run_efficiency_arrays(histograms: dict[str, DenseHistogram], key: str) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+def _run_efficiency_arrays(histograms: dict[str, DenseHistogram], runs: np.ndarray, key: str) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
     indices = STATION_INDICES[key]
     total = np.sum(_contents(histograms[count_run_station_name(FIDUCIAL_SELECTION)])[:, indices], axis=1)
     passed = np.sum(_contents(histograms[count_run_station_name(MATCHED_SELECTION)])[:, indices], axis=1)
     selected = (total != 0) | (passed != 0)
-    return RUNS[selected], total[selected], passed[selected]
+    return runs[selected], total[selected], passed[selected]
 
 
-def _run_profiles(histograms: dict[str, DenseHistogram], keys: Sequence[str]):
+def _run_profiles(histograms: dict[str, DenseHistogram], runs: np.ndarray, keys: Sequence[str]):
     by_run = {}
     for key in keys:
         indices = STATION_INDICES[key]
         profile = histograms[CLS_RUN_STATION_PROFILE]
         counts = histograms[count_run_station_name(MATCHED_SELECTION)]
         by_run[key] = CategoryProfileResult(
-            RUNS.copy(),
+            runs.copy(),
             np.sum(_contents(profile)[:, indices], axis=1),
             np.sum(_contents(profile, variance=True)[:, indices], axis=1),
             np.sum(_contents(counts)[:, indices], axis=1),
@@ -474,12 +903,12 @@ def _run_profiles(histograms: dict[str, DenseHistogram], keys: Sequence[str]):
     return by_run
 
 
-def _run_efficiencies(histograms: dict[str, DenseHistogram], keys: Sequence[str]):
+def _run_efficiencies(histograms: dict[str, DenseHistogram], runs: np.ndarray, keys: Sequence[str]):
     by_run = {}
     for key in keys:
         indices = STATION_INDICES[key]
         by_run[key] = CategoryEfficiencyResult(
-            RUNS.copy(),
+            runs.copy(),
             np.sum(_contents(histograms[count_run_station_name(FIDUCIAL_SELECTION)])[:, indices], axis=1),
             np.sum(_contents(histograms[count_run_station_name(MATCHED_SELECTION)])[:, indices], axis=1),
         )
@@ -490,7 +919,7 @@ def _elapsed_profiles(histograms: dict[str, DenseHistogram], run_meta, keys: Seq
     all_time_bin_timestamps = np.unique(np.asarray(run_meta.time_bin_timestamps, dtype="datetime64[s]"))
     by_elapsed = {}
     for key in keys:
-        runs, sums, sumsqs, counts = _run_profile_arrays(histograms, key)
+        runs, sums, sumsqs, counts = _run_profile_arrays(histograms, run_meta.runs, key)
         by_elapsed[key] = _category_profile(run_meta.lookup_time_bin_timestamps(runs), sums, sumsqs, counts, all_time_bin_timestamps)
     return by_elapsed
 
@@ -499,11 +928,19 @@ def _elapsed_efficiencies(histograms: dict[str, DenseHistogram], run_meta, keys:
     all_time_bin_timestamps = np.unique(np.asarray(run_meta.time_bin_timestamps, dtype="datetime64[s]"))
     by_elapsed = {}
     for key in keys:
-        runs, total, passed = _run_efficiency_arrays(histograms, key)
+        runs, total, passed = _run_efficiency_arrays(histograms, run_meta.runs, key)
         by_elapsed[key] = _category_efficiency(run_meta.lookup_time_bin_timestamps(runs), total, passed, all_time_bin_timestamps)
     return by_elapsed
 
 
+PAIR_HISTOGRAM_NAMES = (
+    PAIR_MASS_HISTOGRAM,
+    PAIR_Q_OVER_P_HISTOGRAM,
+    *(pair_kinematics_name(particle) for particle in ("probe", "tag")),
+    *(pair_eta_phi_name(particle) for particle in ("probe", "tag")),
+)
+
+
 def load_pair_results(histograms: dict[str, DenseHistogram], plots):
     pair_mass = histograms[PAIR_MASS_HISTOGRAM]
     probe_histogram = histograms[pair_kinematics_name("probe")]
@@ -555,6 +992,20 @@ def load_pair_2d_results(histograms: dict[str, DenseHistogram], plots):
     return results
 
 
+def rpc_histogram_names(count_plots, mean_plots, rms_plots) -> set[str]:
+    """Histograms read by ``load_rpc_results`` and ``load_rpc_rms_results`` for these plots."""
+    selections = {"fiducial": FIDUCIAL_SELECTION, "match": MATCHED_SELECTION}
+    names = {count_station_name(selections[plot["selection"]], plot["branch"]) for plot in count_plots}
+    for plot in mean_plots:
+        if "source_2d" in plot:
+            names |= {cls_profile_2d_station_name(plot["source_2d"]), count_2d_station_name(MATCHED_SELECTION, plot["source_2d"])}
+        else:
+            names |= {cls_profile_station_name(plot["x_branch"]), count_station_name(MATCHED_SELECTION, plot["x_branch"])}
+    for plot in rms_plots:
+        names |= {profile_1d_station_name(plot["value_branch"], plot["x_branch"]), count_station_name(MATCHED_SELECTION, plot["x_branch"])}
+    return names | set(ROLL_MEAN_HISTOGRAM_NAMES) | {CLS_RUN_STATION_PROFILE, count_run_station_name(MATCHED_SELECTION)}
+
+
 def load_rpc_results(histograms: dict[str, DenseHistogram], count_plots, mean_plots, run_meta, trend_keys: Sequence[str]):
     selections = {"fiducial": FIDUCIAL_SELECTION, "match": MATCHED_SELECTION}
     count_results = {
@@ -586,7 +1037,7 @@ def load_rpc_results(histograms: dict[str, DenseHistogram], count_plots, mean_pl
             np.asarray(plot["edges"], dtype=np.float64),
         )
     by_elapsed = _elapsed_profiles(histograms, run_meta, trend_keys)
-    return count_results, mean_results, _roll_mean_result(histograms), by_elapsed, _run_profiles(histograms, trend_keys)
+    return count_results, mean_results, load_roll_mean_result(histograms), by_elapsed, _run_profiles(histograms, run_meta.runs, trend_keys)
 
 
 def load_rpc_rms_results(histograms: dict[str, DenseHistogram], rms_plots):
@@ -606,6 +1057,19 @@ def load_rpc_rms_results(histograms: dict[str, DenseHistogram], rms_plots):
     return results
 
 
+def efficiency_histogram_names(plots_1d) -> set[str]:
+    """Histograms read by ``load_efficiency_results`` for these plots."""
+    names = set(ROLL_EFFICIENCY_HISTOGRAM_NAMES)
+    for selection in (FIDUCIAL_SELECTION, MATCHED_SELECTION):
+        names.add(count_run_station_name(selection))
+        for plot in plots_1d:
+            if "source_2d" in plot:
+                names.add(count_2d_station_name(selection, plot["source_2d"]))
+            else:
+                names.add(count_station_name(selection, plot["branch"]))
+    return names
+
+
 def load_efficiency_results(histograms: dict[str, DenseHistogram], plots_1d, run_meta, trend_keys: Sequence[str]):
     results_1d = {}
     for plot in plots_1d:
@@ -628,4 +1092,4 @@ def load_efficiency_results(histograms: dict[str, DenseHistogram], plots_1d, run
             np.asarray(plot["edges"], dtype=np.float64),
         )
     by_elapsed = _elapsed_efficiencies(histograms, run_meta, trend_keys)
-    return results_1d, _roll_efficiency_result(histograms), by_elapsed, _run_efficiencies(histograms, trend_keys)
+    return results_1d, load_roll_efficiency_result(histograms), by_elapsed, _run_efficiencies(histograms, run_meta.runs, trend_keys)
@@ -0,0 +1,315 @@
+from __future__ import annotations
+
+import contextlib
+import hashlib
+import io
+import json
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from functools import partial
+from pathlib import Path
+from typing import Sequence
+
+import numpy as np
+import uproot
+
+from RPCDPGAnalysis.NanoAODTnP.HistBuild import HISTOGRAM_COMPRESSION  # type: ignore
+from RPCDPGAnalysis.NanoAODTnP.HistFill import (  # type: ignore
+    BinAxis,
+    BinnedHistogram,
+    KeyAxis,
+    is_sparse,
+    ordered_map,
+    reduce_pairwise,
+    write_sparse,
+)
+
+DEFAULT_MERGE_WORKERS = 4
+DEFAULT_MERGE_BATCH_SIZE = 64
+MERGE_MANIFEST_FORMAT = "rpc-tnp-merge/1"
+# TObjString in the merged file holding the shards it sums; never read as a histogram.
+MERGE_MANIFEST_KEY = "rpc_tnp_merge_manifest"
+
+
+@dataclass(frozen=True)
+class HistogramLayout:
+    """How a shard stores one histogram; ``edges`` holds None for key axes such as runs."""
+
+    sparse: bool
+    integer: bool
+    weighted: bool
+    edges: tuple[tuple[float, ...] | None, ...]
+
+    def matches(self, other: HistogramLayout) -> bool:
+        # TH*I and TH*D shards add up the same way; the first shard decides the output type.
+        return (self.sparse, self.weighted, self.edges) == (other.sparse, other.weighted, other.edges)
+
+
+def _read_dense(name: str, source) -> BinnedHistogram:
+    """Flow-inclusive contents of a ``TH*``; the axis titles hold the axis names."""
+    axes = tuple(
+        BinAxis(axis.member("fTitle"), np.asarray(axis.edges(flow=False), dtype=np.float64))
+        for axis in source.axes
+    )
+    histogram = BinnedHistogram(name, axes, weighted=len(source.member("fSumw2")) > 0)
+    histogram.values[:] = np.asarray(source.values(flow=True), dtype=np.float64).ravel()
+    if histogram.weighted:
+        histogram.variances[:] = np.asarray(source.variances(flow=True), dtype=np.float64).ravel()
+    return histogram
+
+
+def _read_histogram(name: str, source) -> tuple[BinnedHistogram, HistogramLayout]:
+    if is_sparse(source):
+        columns = source.arrays(library="np")
+        histogram = BinnedHistogram.from_sparse(name, source.title, columns)
+        integer = columns["value"].dtype.kind in "iu"
+    else:
+        histogram = _read_dense(name, source)
+        integer = source.classname.endswith("I")
+    layout = HistogramLayout(
+        sparse=is_sparse(source),
+        integer=integer,
+        weighted=histogram.weighted,
+        edges=tuple(None if isinstance(axis, KeyAxis) else tuple(axis.edges.tolist()) for axis in histogram.axes),
+    )
+    return histogram, layout
+
+
+def _read_shard(source) -> dict[str, tuple[BinnedHistogram, HistogramLayout]]:
+    with uproot.open(source) as root_file:
+        return {
+            name: _read_histogram(name, root_file[name])
+            for name in root_file.keys(cycle=False)
+            if name != MERGE_MANIFEST_KEY
+        }
+
+
+@dataclass(frozen=True)
+class ShardRecord:
+    path: str
+    size: int
+    mtime_ns: int
+    sha256: str
+
+
+def _read_recorded_shard(input_path: str) -> tuple[dict[str, tuple[BinnedHistogram, HistogramLayout]], ShardRecord]:
+    """Histograms and manifest record of one shard from a single read of the file."""
+    with open(input_path, "rb") as stream:
+        stat = os.fstat(stream.fileno())
+        data = stream.read()
+    record = ShardRecord(input_path, stat.st_size, stat.st_mtime_ns, hashlib.sha256(data).hexdigest())
+    return _read_shard(io.BytesIO(data)), record
+
+
+def _check_schema(input_path: str, layouts: dict[str, HistogramLayout], schema: dict[str, HistogramLayout]) -> None:
+    if layouts.keys() != schema.keys():
+        missing = sorted(schema.keys() - layouts.keys())
+        extra = sorted(layouts.keys() - schema.keys())
+        raise RuntimeError(
+            f"Cannot merge {input_path}: its histograms differ from the first shard; "
+            f"missing={missing or 'none'}, extra={extra or 'none'}"
+        )
+    for name, layout in layouts.items():
+        if not layout.matches(schema[name]):
+            raise RuntimeError(f"Cannot merge histogram {name} of {input_path}: its binning differs from the first shard")
+
+
+def _add_shards(merged: dict[str, BinnedHistogram], other: dict[str, BinnedHistogram]) -> dict[str, BinnedHistogram]:
+    for name, histogram in other.items():
+        merged[name] += histogram
+    return merged
+
+
+def _merge_batch(
+    input_paths: Sequence[str], schema: dict[str, HistogramLayout] | None = None,
+) -> tuple[dict[str, BinnedHistogram], dict[str, HistogramLayout], list[ShardRecord]]:
+    """Sum of consecutive shards, read one at a time, the schema they were checked against and their records.
+
+    Without ``schema`` the batch's first shard defines it.
+    """
+    records: list[ShardRecord] = []
+
+    def shards():
+        nonlocal schema
+        for input_path in input_paths:
+            histograms, record = _read_recorded_shard(input_path)
+            layouts = {name: layout for name, (_, layout) in histograms.items()}
+            if schema is None:
+                schema = layouts
+            else:
+                _check_schema(input_path, layouts, schema)
+            records.append(record)
+            yield {name: histogram for name, (histogram, _) in histograms.items()}
+
+    merged = reduce_pairwise(shards(), _add_shards)
+    return merged, schema, records
+
+
+def _sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as stream:
+        for block in iter(partial(stream.read, 1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def shard_record(path: str, previous: ShardRecord | None = None) -> ShardRecord:
+    """Size, mtime and checksum of ``path``; the checksum of ``previous`` is reused while size and mtime match."""
+    stat = os.stat(path)
+    if previous is not None and (previous.size, previous.mtime_ns) == (stat.st_size, stat.st_mtime_ns):
+        return previous
+    return ShardRecord(path, stat.st_size, stat.st_mtime_ns, _sha256(path))
+
+
+def read_manifest(merged_path: Path) -> dict[str, ShardRecord] | None:
+    """Shards summed into ``merged_path`` by path, or None for files without a readable manifest."""
+    try:
+        with uproot.open(merged_path) as root_file:
+            if MERGE_MANIFEST_KEY not in root_file:
+                return None
+            manifest = json.loads(str(root_file[MERGE_MANIFEST_KEY]))
+    except (OSError, ValueError) as error:
+        print(f"[warn] could not read the merge manifest of {merged_path}: {error}", flush=True)
+        return None
+    if manifest.get("format") != MERGE_MANIFEST_FORMAT:
+        return None
+    return {shard["path"]: ShardRecord(**shard) for shard in manifest["shards"]}
+
+
+def write_merged(
+    output_path: Path,
+    histograms: dict[str, BinnedHistogram],
+    schema: dict[str, HistogramLayout],
+    shards: Sequence[ShardRecord],
+    compression: uproot.compression.Compression = HISTOGRAM_COMPRESSION,
+) -> None:
+    """Write ``histograms`` as the shards stored them, with the manifest of ``shards``.
+
+    The file is written under a temporary name and renamed over ``output_path``,
+    so the histograms and their manifest are replaced together.
+    """
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    descriptor, temporary = tempfile.mkstemp(prefix=f".{output_path.stem}-", suffix=".root", dir=output_path.parent)
+    os.close(descriptor)
+    try:
+        with uproot.recreate(temporary, compression=compression) as output:
+            for name, histogram in sorted(histograms.items()):
+                layout = schema[name]
+                if layout.sparse:
+                    write_sparse(output, histogram, layout.integer)
+                elif layout.integer and not histogram.weighted:
+                    output[name] = histogram.to_integer_th()
+                else:
+                    output[name] = histogram.to_hist()
+            output[MERGE_MANIFEST_KEY] = json.dumps({
+                "format": MERGE_MANIFEST_FORMAT,
+                "shards": [vars(shard) for shard in shards],
+            })
+        os.replace(temporary, output_path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.unlink(temporary)
+        raise
+
+
+def _merge_paths(
+    paths: Sequence[str], schema: dict[str, HistogramLayout] | None, workers: int, batch_size: int,
+) -> tuple[dict[str, BinnedHistogram], dict[str, HistogramLayout], list[ShardRecord]]:
+    """Sum of ``paths``, their schema and their records; without ``schema`` the first shard defines it.
+
+    Each batch is then checked against its own first shard, and that shard
+    against the first batch's, so no shard is read twice.
+    """
+    batches = [paths[index:index + batch_size] for index in range(0, len(paths), batch_size)]
+    workers = min(workers, len(batches), os.cpu_count() or 1)
+    print(f"[info] merging shards={len(paths)} batches={len(batches)} workers={workers}", flush=True)
+    reference = schema
+    records: list[ShardRecord] = []
+
+    def checked(results):
+        nonlocal reference
+        for batch, (histograms, batch_schema, batch_records) in zip(batches, results):
+            if reference is None:
+                reference = batch_schema
+            else:
+                _check_schema(batch[0], batch_schema, reference)
+            records.extend(batch_records)
+            yield histograms
+
+    with contextlib.ExitStack() as stack:
+        executor = stack.enter_context(ProcessPoolExecutor(workers)) if workers > 1 else None
+        merged = reduce_pairwise(checked(ordered_map(partial(_merge_batch, schema=schema), batches, executor, workers)), _add_shards)
+    return merged, reference, records
+
+
+def merge_shards(
+    input_paths: Sequence[Path | str],
+    output_path: Path,
+    workers: int = DEFAULT_MERGE_WORKERS,
+    batch_size: int = DEFAULT_MERGE_BATCH_SIZE,
+    compression: uproot.compression.Compression = HISTOGRAM_COMPRESSION,
+    incremental: bool = False,
+) -> bool:
+    """Add histogram shards into ``output_path``, like ``hadd`` but in a pairwise tree over worker processes.
+
+    Each worker sums ``batch_size`` consecutive shards, reading one at a
+    time, and the batch sums are added pairwise in input order. At most two
+    batches per worker are in flight, so memory stays bounded by the worker
+    count and the depth of the tree rather than the number of shards. Sparse
+    trees are written with repeated bins summed instead of concatenated.
+
+    The output lists its shards with their size, mtime and checksum; the
+    workers hash each shard from the same read that decodes it. With
+    ``incremental`` an existing output whose shards are all still unchanged
+    gets only the new shards added. A removed or changed shard cannot be
+    subtracted, so the output is then rebuilt. Returns whether the output
+    was written.
+    """
+    if not input_paths:
+        raise RuntimeError(f"No input shards for {output_path}")
+    start = time.perf_counter()
+    paths = [str(path) for path in input_paths]
+    previous = None
+    if incremental and output_path.exists():
+        previous = read_manifest(output_path)
+        if previous is None:
+            print(f"[info] {output_path} has no merge manifest; merging all shards", flush=True)
+
+    added = paths
+    if previous is not None:
+        removed = sorted(previous.keys() - set(paths))
+        # Only merged shards whose size or mtime moved are hashed here. A re-copied
+        # shard gets a new mtime; only a new checksum means new contents.
+        current = {path: shard_record(path, previous[path]) for path in paths if path in previous}
+        changed = sorted(path for path, shard in current.items() if shard.sha256 != previous[path].sha256)
+        added = [path for path in paths if path not in previous]
+        if removed or changed:
+            print(f"[info] rebuilding {output_path}: removed={len(removed)} changed={len(changed)} shards", flush=True)
+            for path in removed + changed:
+                print(f"  [{'removed' if path in removed else 'changed'}] {path}", flush=True)
+            previous, added = None, paths
+        elif not added:
+            print(f"[info] {output_path} is up to date with {len(paths)} shards", flush=True)
+            return False
+        else:
+            print(f"[info] adding {len(added)} new shards to {output_path} ({len(previous)} merged)", flush=True)
+
+    if previous is None:
+        merged, schema, shards = _merge_paths(added, None, workers, batch_size)
+    else:
+        base = _read_shard(str(output_path))
+        schema = {name: layout for name, (_, layout) in base.items()}
+        added_sum, _, added_shards = _merge_paths(added, schema, workers, batch_size)
+        merged = _add_shards({name: histogram for name, (histogram, _) in base.items()}, added_sum)
+        # Keep the merged shards first, in the order they were added.
+        shards = [current[path] for path in previous] + added_shards
+    write_merged(output_path, merged, schema, shards, compression)
+    print(
+        f"[info] wrote {output_path} elapsed={time.perf_counter() - start:.1f}s "
+        f"size={output_path.stat().st_size / 1e6:.1f} MB",
+        flush=True,
+    )
+    return True
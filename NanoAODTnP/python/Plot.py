@@ -1,16 +1,26 @@
 from __future__ import annotations
 
+from contextlib import ExitStack
 from pathlib import Path
 from typing import Sequence
 
-from RPCDPGAnalysis.NanoAODTnP.HistIO import load_histograms  # type: ignore
-from RPCDPGAnalysis.NanoAODTnP.PlotEfficiency import plot_efficiency  # type: ignore
+from RPCDPGAnalysis.NanoAODTnP.HistIO import (  # type: ignore
+    DEFAULT_HISTOGRAM_CACHE_BYTES,
+    DEFAULT_LOAD_WORKERS,
+    PAIR_HISTOGRAM_NAMES,
+    HistogramCache,
+    load_histograms,
+)
+from RPCDPGAnalysis.NanoAODTnP.PlotEfficiency import efficiency_plot_histogram_names, plot_efficiency  # type: ignore
 from RPCDPGAnalysis.NanoAODTnP.PlotPair import plot_pair  # type: ignore
-from RPCDPGAnalysis.NanoAODTnP.PlotRPC import plot_rpc  # type: ignore
+from RPCDPGAnalysis.NanoAODTnP.PlotRPC import plot_rpc, rpc_plot_histogram_names  # type: ignore
 from RPCDPGAnalysis.NanoAODTnP.PlotUtils import build_dataset_specs  # type: ignore
 from RPCDPGAnalysis.NanoAODTnP.ReadGeoMeta import load_roll_geometry  # type: ignore
 from RPCDPGAnalysis.NanoAODTnP.ReadRunMeta import read_run_meta  # type: ignore
 
+# Without "2d" the 1D plots projected from the kinematic 2D histograms are skipped too; "maps" are the roll maps.
+PLOT_FAMILIES = ("rpc", "efficiency", "pair", "maps", "2d")
+
 
 def plot_all(
     input_groups: Sequence[Sequence[Path]],
@@ -27,53 +37,87 @@ def plot_all(
     roll_maps: bool = False,
     show_excluded_rolls: bool = True,
     probe_pt_gt15: bool = True,
+    match_policy: str | None = None,
+    load_workers: int = DEFAULT_LOAD_WORKERS,
+    cache_dir: Path | None = None,
+    cache_size_gb: float = DEFAULT_HISTOGRAM_CACHE_BYTES / 1024**3,
+    families: Sequence[str] = PLOT_FAMILIES,
 ) -> list[Path]:
+    """Draw the plot ``families``; only the histograms they use are decoded."""
+    unknown = sorted(set(families) - set(PLOT_FAMILIES))
+    if unknown:
+        raise RuntimeError(f"Unknown plot families {unknown}; choose from {list(PLOT_FAMILIES)}")
+    families = set(families)
+    draw_2d = "2d" in families
+    roll_maps = roll_maps and "maps" in families
+    efficiency_maps = efficiency_maps and "maps" in families
     specs = build_dataset_specs(input_groups, years, lumis)
-    histograms_by_spec = {spec: load_histograms(spec) for spec in specs}
     needs_geom = efficiency_maps or roll_maps
     if needs_geom and geom_path is None:
         raise RuntimeError("Roll maps require --geom-path")
     geom = load_roll_geometry(geom_path) if needs_geom and geom_path is not None else None
     run_meta = read_run_meta(run_meta_path)
+    cache = None if cache_dir is None else HistogramCache(cache_dir, int(cache_size_gb * 1024**3))
+    probe_pt_minimum = 15.0 if probe_pt_gt15 else None
+    rpc_options = {"draw_1d": "rpc" in families, "draw_2d": draw_2d, "draw_roll_maps": roll_maps}
+    efficiency_options = {"draw_1d": "efficiency" in families, "draw_2d": draw_2d, "draw_roll_maps": efficiency_maps}
+    names = set(PAIR_HISTOGRAM_NAMES) if "pair" in families else set()
+    if any(rpc_options.values()):
+        names |= rpc_plot_histogram_names(probe_pt_minimum, **rpc_options)
+    if any(efficiency_options.values()):
+        names |= efficiency_plot_histogram_names(probe_pt_minimum, **efficiency_options)
 
-    common = {
-        "specs": specs,
-        "histograms_by_spec": histograms_by_spec,
-        "output": output,
-        "com": com,
-        "label": label,
-        "ext": ext,
-        "probe_pt_minimum": 15.0 if probe_pt_gt15 else None,
-    }
-    paths: list[Path] = []
+    with ExitStack() as stack:
+        histograms_by_spec = {
+            spec: stack.enter_context(load_histograms(spec, match_policy, load_workers, cache, run_meta.runs))
+            for spec in specs
+        }
+        # Decode everything the selected families read in one pass over the files.
+        for histograms in histograms_by_spec.values():
+            selected = sorted(name for name in names if name in histograms)
+            if selected:
+                histograms.load(*selected)
+        common = {
+            "specs": specs,
+            "histograms_by_spec": histograms_by_spec,
+            "output": output,
+            "com": com,
+            "label": label,
+            "ext": ext,
+            "probe_pt_minimum": probe_pt_minimum,
+        }
+        paths: list[Path] = []
 
-    print("=" * 60, flush=True)
-    print("[plot] rpc", flush=True)
-    paths.extend(
-        plot_rpc(
-            **common,
-            geom=geom,
-            run_meta=run_meta,
-            draw_yearly_2d=yearly_2d,
-            draw_roll_maps=roll_maps,
-            show_excluded_rolls=show_excluded_rolls,
-        )
-    )
+        if any(rpc_options.values()):
+            print("=" * 60, flush=True)
+            print("[plot] rpc", flush=True)
+            paths.extend(
+                plot_rpc(
+                    **common,
+                    geom=geom,
+                    run_meta=run_meta,
+                    draw_yearly_2d=yearly_2d,
+                    show_excluded_rolls=show_excluded_rolls,
+                    **rpc_options,
+                )
+            )
 
-    print("=" * 60, flush=True)
-    print("[plot] efficiency", flush=True)
-    paths.extend(
-        plot_efficiency(
-            **common,
-            geom=geom,
-            run_meta=run_meta,
-            draw_yearly_2d=yearly_2d,
-            draw_roll_maps=efficiency_maps,
-            show_excluded_rolls=show_excluded_rolls,
-        )
-    )
+        if any(efficiency_options.values()):
+            print("=" * 60, flush=True)
+            print("[plot] efficiency", flush=True)
+            paths.extend(
+                plot_efficiency(
+                    **common,
+                    geom=geom,
+                    run_meta=run_meta,
+                    draw_yearly_2d=yearly_2d,
+                    show_excluded_rolls=show_excluded_rolls,
+                    **efficiency_options,
+                )
+            )
 
-    print("=" * 60, flush=True)
-    print("[plot] pair", flush=True)
-    paths.extend(plot_pair(**common))
+        if "pair" in families:
+            print("=" * 60, flush=True)
+            print("[plot] pair", flush=True)
+            paths.extend(plot_pair(**common))
     return paths
@@ -8,9 +8,13 @@ import matplotlib.pyplot as plt
 from matplotlib.font_manager import FontProperties
 
 from RPCDPGAnalysis.NanoAODTnP.HistIO import (  # type: ignore
+    ROLL_EFFICIENCY_HISTOGRAM_NAMES,
+    efficiency_2d_histogram_names,
+    efficiency_histogram_names,
     has_kinematic_2d_histograms,
     load_efficiency_2d_results,
     load_efficiency_results,
+    load_roll_efficiency_result,
     merge_category_efficiencies,
 )
 from RPCDPGAnalysis.NanoAODTnP.BuildUtils import (  # type: ignore
@@ -604,6 +608,30 @@ def draw_run3_efficiency_2d(
     return paths
 
 
+def _efficiency_plots(probe_pt_minimum: float | None, draw_2d: bool):
+    plots_1d = with_probe_pt_minimum(EFF_1D_PLOTS, probe_pt_minimum)
+    plots_2d = with_probe_pt_minimum(KINEMATIC_2D_PLOTS, probe_pt_minimum)
+    if not draw_2d:
+        plots_1d = [plot for plot in plots_1d if "source_2d" not in plot]
+    return plots_1d, plots_2d
+
+
+def efficiency_plot_histogram_names(
+    probe_pt_minimum: float | None = None,
+    draw_1d: bool = True,
+    draw_2d: bool = True,
+    draw_roll_maps: bool = False,
+) -> set[str]:
+    """Histograms ``plot_efficiency`` reads with these options."""
+    plots_1d, plots_2d = _efficiency_plots(probe_pt_minimum, draw_2d)
+    names = set(ROLL_EFFICIENCY_HISTOGRAM_NAMES) if draw_roll_maps else set()
+    if draw_1d:
+        names |= efficiency_histogram_names(plots_1d)
+    if draw_2d:
+        names |= efficiency_2d_histogram_names(plots_2d)
+    return names
+
+
 def plot_efficiency(
     specs,
     histograms_by_spec,
@@ -617,61 +645,66 @@ def plot_efficiency(
     draw_roll_maps: bool = False,
     show_excluded_rolls: bool = True,
     probe_pt_minimum: float | None = None,
+    draw_1d: bool = True,
+    draw_2d: bool = True,
 ) -> list[Path]:
-    plots_1d = with_probe_pt_minimum(EFF_1D_PLOTS, probe_pt_minimum)
-    plots_2d = with_probe_pt_minimum(KINEMATIC_2D_PLOTS, probe_pt_minimum)
-    results_1d = {}
-    roll_results = {}
-    elapsed_results = {}
-    run_results = {}
-    for spec in specs:
-        results_1d[spec], roll_results[spec], elapsed_results[spec], run_results[spec] = load_efficiency_results(
-            histograms_by_spec[spec],
-            plots_1d,
-            run_meta,
-            EFFICIENCY_RUN_KEYS,
-        )
-
+    """Without ``draw_2d`` the kinematic 2D histograms, and the 1D plots projected from them, are not read."""
+    plots_1d, plots_2d = _efficiency_plots(probe_pt_minimum, draw_2d)
     paths: list[Path] = []
-    paths.extend(save_efficiency_reports(specs, roll_results, run_results, output))
-    comparison_output = comparison_output_dir(output, "efficiency/1d", specs)
-    for plot in plots_1d:
-        series = [
-            (spec, results_1d[spec][plot["name"]])
-            for spec in specs
-            if plot["name"] in results_1d[spec]
-        ]
-        if series:
-            paths.append(draw_efficiency_1d(series, plot, comparison_output, label, com, ext))
-    for region in ("barrel", "endcap"):
-        paths.append(draw_nrolls_efficiency([(spec, roll_results[spec]) for spec in specs], region, comparison_output, label, com, ext))
-    paths.extend(draw_run3_efficiency_2d(specs, histograms_by_spec, output, label, com, ext, plots_2d))
-    if draw_yearly_2d:
+    roll_results = {}
+    if draw_1d:
+        results_1d = {}
+        elapsed_results = {}
+        run_results = {}
         for spec in specs:
-            paths.extend(draw_efficiency_2d_for_spec(histograms_by_spec[spec], spec, output, label, com, ext, plots_2d))
-
-    combined_spec = combine_dataset_specs(specs)
-    run3_elapsed = {
-        key: merge_category_efficiencies([elapsed_results[spec][key] for spec in specs])
-        for key in EFFICIENCY_TREND_KEYS
-    }
-    run3_run = {
-        key: merge_category_efficiencies([run_results[spec][key] for spec in specs])
-        for key in EFFICIENCY_RUN_KEYS
-    }
-    output_1d = plot_output_dir(output, "efficiency/1d", combined_spec.year)
-    for plot in RUN_EFFICIENCY_PLOTS:
-        paths.append(draw_run_efficiency(run3_run, plot, combined_spec, output_1d, label, com, ext))
-    for plot in RUN_INDEX_EFFICIENCY_PLOTS:
-        paths.append(draw_run_index_efficiency(run3_run, plot, combined_spec, output_1d, label, com, ext))
-    for plot in ELAPSED_TIME_EFFICIENCY_PLOTS:
-        paths.append(draw_elapsed_time_efficiency(run3_elapsed, plot, combined_spec, output_1d, label, com, ext))
+            results_1d[spec], roll_results[spec], elapsed_results[spec], run_results[spec] = load_efficiency_results(
+                histograms_by_spec[spec],
+                plots_1d,
+                run_meta,
+                EFFICIENCY_RUN_KEYS,
+            )
+
+        paths.extend(save_efficiency_reports(specs, roll_results, run_results, output))
+        comparison_output = comparison_output_dir(output, "efficiency/1d", specs)
+        for plot in plots_1d:
+            series = [
+                (spec, results_1d[spec][plot["name"]])
+                for spec in specs
+                if plot["name"] in results_1d[spec]
+            ]
+            if series:
+                paths.append(draw_efficiency_1d(series, plot, comparison_output, label, com, ext))
+        for region in ("barrel", "endcap"):
+            paths.append(draw_nrolls_efficiency([(spec, roll_results[spec]) for spec in specs], region, comparison_output, label, com, ext))
+    if draw_2d:
+        paths.extend(draw_run3_efficiency_2d(specs, histograms_by_spec, output, label, com, ext, plots_2d))
+        if draw_yearly_2d:
+            for spec in specs:
+                paths.extend(draw_efficiency_2d_for_spec(histograms_by_spec[spec], spec, output, label, com, ext, plots_2d))
+
+    if draw_1d:
+        combined_spec = combine_dataset_specs(specs)
+        run3_elapsed = {
+            key: merge_category_efficiencies([elapsed_results[spec][key] for spec in specs])
+            for key in EFFICIENCY_TREND_KEYS
+        }
+        run3_run = {
+            key: merge_category_efficiencies([run_results[spec][key] for spec in specs])
+            for key in EFFICIENCY_RUN_KEYS
+        }
+        output_1d = plot_output_dir(output, "efficiency/1d", combined_spec.year)
+        for plot in RUN_EFFICIENCY_PLOTS:
+            paths.append(draw_run_efficiency(run3_run, plot, combined_spec, output_1d, label, com, ext))
+        for plot in RUN_INDEX_EFFICIENCY_PLOTS:
+            paths.append(draw_run_index_efficiency(run3_run, plot, combined_spec, output_1d, label, com, ext))
+        for plot in ELAPSED_TIME_EFFICIENCY_PLOTS:
+            paths.append(draw_elapsed_time_efficiency(run3_elapsed, plot, combined_spec, output_1d, label, com, ext))
 
     if draw_roll_maps:
         if geom is None:
             raise RuntimeError("Efficiency roll maps require RPC geometry")
         for spec in specs:
-            roll_result = roll_results[spec]
+            roll_result = roll_results[spec] if draw_1d else load_roll_efficiency_result(histograms_by_spec[spec])
             masked = roll_mask_names(spec.year) if show_excluded_rolls else set()
             eff = efficiency_series(roll_result.total_by_roll, roll_result.passed_by_roll)
             roll_map_specs = [
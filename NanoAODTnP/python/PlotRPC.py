@@ -7,11 +7,15 @@ import matplotlib.pyplot as plt
 
 from RPCDPGAnalysis.NanoAODTnP.BuildUtils import mean_and_error, rms_and_error  # type: ignore
 from RPCDPGAnalysis.NanoAODTnP.HistIO import (  # type: ignore
+    ROLL_MEAN_HISTOGRAM_NAMES,
+    cls_2d_histogram_names,
     has_kinematic_2d_histograms,
     load_cls_2d_results,
+    load_roll_mean_result,
     load_rpc_rms_results,
     load_rpc_results,
     merge_category_profiles,
+    rpc_histogram_names,
 )
 from RPCDPGAnalysis.NanoAODTnP.PlotUtils import (  # type: ignore
     DEFAULT_COLORS,
@@ -574,6 +578,31 @@ def draw_run_cls(result_by_key, plot: dict, spec, output: Path, label: str, com:
     return save_figure(fig, output_dir, file_name, ext)
 
 
+def _rpc_plots(probe_pt_minimum: float | None, draw_2d: bool):
+    mean_plots = with_probe_pt_minimum(MEAN_PLOTS, probe_pt_minimum)
+    rms_plots = with_probe_pt_minimum(RMS_PLOTS, probe_pt_minimum)
+    plots_2d = with_probe_pt_minimum(KINEMATIC_2D_PLOTS, probe_pt_minimum)
+    if not draw_2d:
+        mean_plots = [plot for plot in mean_plots if "source_2d" not in plot]
+    return mean_plots, rms_plots, plots_2d
+
+
+def rpc_plot_histogram_names(
+    probe_pt_minimum: float | None = None,
+    draw_1d: bool = True,
+    draw_2d: bool = True,
+    draw_roll_maps: bool = False,
+) -> set[str]:
+    """Histograms ``plot_rpc`` reads with these options."""
+    mean_plots, rms_plots, plots_2d = _rpc_plots(probe_pt_minimum, draw_2d)
+    names = set(ROLL_MEAN_HISTOGRAM_NAMES) if draw_roll_maps else set()
+    if draw_1d:
+        names |= rpc_histogram_names(COUNT_PLOTS, mean_plots, rms_plots)
+    if draw_2d:
+        names |= cls_2d_histogram_names(plots_2d)
+    return names
+
+
 def plot_rpc(
     specs,
     histograms_by_spec,
@@ -587,72 +616,76 @@ def plot_rpc(
     draw_roll_maps: bool = False,
     show_excluded_rolls: bool = True,
     probe_pt_minimum: float | None = None,
+    draw_1d: bool = True,
+    draw_2d: bool = True,
 ) -> list[Path]:
-    mean_plots = with_probe_pt_minimum(MEAN_PLOTS, probe_pt_minimum)
-    rms_plots = with_probe_pt_minimum(RMS_PLOTS, probe_pt_minimum)
-    plots_2d = with_probe_pt_minimum(KINEMATIC_2D_PLOTS, probe_pt_minimum)
-    count_results = {}
-    mean_results = {}
-    rms_results = {}
-    roll_results = {}
-    elapsed_results = {}
-    run_results = {}
-    for spec in specs:
-        count_results[spec], mean_results[spec], roll_results[spec], elapsed_results[spec], run_results[spec] = load_rpc_results(
-            histograms_by_spec[spec],
-            COUNT_PLOTS,
-            mean_plots,
-            run_meta,
-            CLS_TREND_KEYS,
-        )
-        rms_results[spec] = load_rpc_rms_results(histograms_by_spec[spec], rms_plots)
-
+    """Without ``draw_2d`` the kinematic 2D histograms, and the 1D plots projected from them, are not read."""
+    mean_plots, rms_plots, plots_2d = _rpc_plots(probe_pt_minimum, draw_2d)
     paths: list[Path] = []
-    comparison_output = comparison_output_dir(output, "rpc/1d", specs)
-    for plot in COUNT_PLOTS:
-        paths.append(draw_count_plot([(spec, count_results[spec][plot["name"]]) for spec in specs], plot, comparison_output, label, com, ext))
-    for plot in mean_plots:
-        series = [
-            (spec, mean_results[spec][plot["name"]])
-            for spec in specs
-            if plot["name"] in mean_results[spec]
-        ]
-        if series:
-            paths.append(draw_mean_plot(series, plot, comparison_output, label, com, ext))
-    for plot in rms_plots:
-        series = [
-            (spec, rms_results[spec][plot["name"]])
-            for spec in specs
-            if plot["name"] in rms_results[spec]
-        ]
-        if series:
-            paths.append(draw_rms_plot(series, plot, comparison_output, label, com, ext))
-
-    paths.extend(draw_run3_cls_2d(specs, histograms_by_spec, output, label, com, ext, plots_2d))
-    if draw_yearly_2d:
+    roll_results = {}
+    if draw_1d:
+        count_results = {}
+        mean_results = {}
+        rms_results = {}
+        elapsed_results = {}
+        run_results = {}
         for spec in specs:
-            paths.extend(draw_cls_2d_for_spec(histograms_by_spec[spec], spec, output, label, com, ext, plots_2d))
-
-    combined_spec = combine_dataset_specs(specs)
-    run3_elapsed = {
-        key: merge_category_profiles([elapsed_results[spec][key] for spec in specs])
-        for key in CLS_TREND_KEYS
-    }
-    run3_run = {
-        key: merge_category_profiles([run_results[spec][key] for spec in specs])
-        for key in CLS_TREND_KEYS
-    }
-    output_1d = plot_output_dir(output, "rpc/1d", combined_spec.year)
-    for plot in RUN_CLS_PLOTS:
-        paths.append(draw_run_cls(run3_run, plot, combined_spec, output_1d, label, com, ext))
-    for plot in ELAPSED_TIME_CLS_PLOTS:
-        paths.append(draw_elapsed_time_cls(run3_elapsed, plot, combined_spec, output_1d, label, com, ext))
+            count_results[spec], mean_results[spec], roll_results[spec], elapsed_results[spec], run_results[spec] = load_rpc_results(
+                histograms_by_spec[spec],
+                COUNT_PLOTS,
+                mean_plots,
+                run_meta,
+                CLS_TREND_KEYS,
+            )
+            rms_results[spec] = load_rpc_rms_results(histograms_by_spec[spec], rms_plots)
+
+        comparison_output = comparison_output_dir(output, "rpc/1d", specs)
+        for plot in COUNT_PLOTS:
+            paths.append(draw_count_plot([(spec, count_results[spec][plot["name"]]) for spec in specs], plot, comparison_output, label, com, ext))
+        for plot in mean_plots:
+            series = [
+                (spec, mean_results[spec][plot["name"]])
+                for spec in specs
+                if plot["name"] in mean_results[spec]
+            ]
+            if series:
+                paths.append(draw_mean_plot(series, plot, comparison_output, label, com, ext))
+        for plot in rms_plots:
+            series = [
+                (spec, rms_results[spec][plot["name"]])
+                for spec in specs
+                if plot["name"] in rms_results[spec]
+            ]
+            if series:
+                paths.append(draw_rms_plot(series, plot, comparison_output, label, com, ext))
+
+    if draw_2d:
+        paths.extend(draw_run3_cls_2d(specs, histograms_by_spec, output, label, com, ext, plots_2d))
+        if draw_yearly_2d:
+            for spec in specs:
+                paths.extend(draw_cls_2d_for_spec(histograms_by_spec[spec], spec, output, label, com, ext, plots_2d))
+
+    if draw_1d:
+        combined_spec = combine_dataset_specs(specs)
+        run3_elapsed = {
+            key: merge_category_profiles([elapsed_results[spec][key] for spec in specs])
+            for key in CLS_TREND_KEYS
+        }
+        run3_run = {
+            key: merge_category_profiles([run_results[spec][key] for spec in specs])
+            for key in CLS_TREND_KEYS
+        }
+        output_1d = plot_output_dir(output, "rpc/1d", combined_spec.year)
+        for plot in RUN_CLS_PLOTS:
+            paths.append(draw_run_cls(run3_run, plot, combined_spec, output_1d, label, com, ext))
+        for plot in ELAPSED_TIME_CLS_PLOTS:
+            paths.append(draw_elapsed_time_cls(run3_elapsed, plot, combined_spec, output_1d, label, com, ext))
 
     if draw_roll_maps:
         if geom is None:
             raise RuntimeError("RPC roll maps require RPC geometry")
         for spec in specs:
-            roll_result = roll_results[spec]
+            roll_result = roll_results[spec] if draw_1d else load_roll_mean_result(histograms_by_spec[spec])
             masked = roll_mask_names(spec.year) if show_excluded_rolls else set()
             roll_map_spec = RollMapSpec(
                 RPC_ROLL_MAP["name"],
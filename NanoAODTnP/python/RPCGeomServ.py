@@ -9,6 +9,17 @@ from matplotlib.patches import Polygon
 
 IRPC_ROLL_PREFIXES = ("RE+3_R1_", "RE-3_R1_", "RE+4_R1_", "RE-4_R1_")
 RPC_GEOMETRY_KEYS = ("region", "ring", "station", "sector", "layer", "subsector", "roll")
+# (field, minimum, bits) packed from the least significant bit upwards
+RPC_GEOMETRY_KEY_FIELDS = (
+    ("region", -1, 2),
+    ("ring", -2, 3),
+    ("station", 0, 3),
+    ("sector", 0, 4),
+    ("layer", 0, 2),
+    ("subsector", 0, 3),
+    ("roll", 0, 3),
+)
+RPC_GEOMETRY_KEY_BITS = sum(bits for _, _, bits in RPC_GEOMETRY_KEY_FIELDS)
 
 
 @cache
@@ -46,6 +57,26 @@ def get_roll_name(region: int, ring: int, station: int, sector: int, layer: int,
     return name
 
 
+def pack_geometry_key(geometry: Mapping[str, npt.ArrayLike]) -> npt.NDArray[np.uint32]:
+    key = np.zeros(np.shape(geometry[RPC_GEOMETRY_KEYS[0]]), dtype=np.uint32)
+    shift = 0
+    for field, low, bits in RPC_GEOMETRY_KEY_FIELDS:
+        key |= (np.asarray(geometry[field], dtype=np.int32) - low).astype(np.uint32) << np.uint32(shift)
+        shift += bits
+    return key
+
+
+def unpack_geometry_key(key: npt.ArrayLike) -> dict[str, npt.NDArray[np.int32]]:
+    key = np.asarray(key, dtype=np.uint32)
+    geometry = {}
+    shift = 0
+    for field, low, bits in RPC_GEOMETRY_KEY_FIELDS:
+        value = (key >> np.uint32(shift)) & np.uint32((1 << bits) - 1)
+        geometry[field] = value.astype(np.int32) + low
+        shift += bits
+    return geometry
+
+
 def is_irpc_roll_name(roll_name: str) -> bool:
     return roll_name.startswith(IRPC_ROLL_PREFIXES)
 
@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from collections.abc import Mapping, Sequence
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+import numpy.typing as npt
+
+
+CERT_CACHE_DIR = Path(os.environ.get("RPC_TNP_CACHE_DIR", Path.home() / ".cache" / "rpc-tnp")) / "cert"
+
+
+class LumiBlockChecker:
+    """https://twiki.cern.ch/twiki/bin/view/CMSPublic/SWGuideGoodLumiSectionsJSONFile
+
+    Certified lumi sections are stored as sorted half-open ``[start, stop)``
+    boundaries of packed ``run << 32 | lumi`` keys, so a whole file is masked
+    with one ``np.searchsorted`` and certifications combine as interval sets.
+    """
+
+    def __init__(self, edges: npt.NDArray[np.uint64]):
+        self.edges = edges
+
+    @staticmethod
+    def pack(run, lumi) -> npt.NDArray[np.uint64]:
+        run = np.asarray(run, dtype=np.uint64)
+        lumi = np.asarray(lumi, dtype=np.uint64)
+        return (run << np.uint64(32)) | lumi
+
+    @staticmethod
+    def _normalize(starts: npt.NDArray[np.uint64], stops: npt.NDArray[np.uint64]) -> npt.NDArray[np.uint64]:
+        if len(starts) == 0:
+            return np.zeros(0, dtype=np.uint64)
+        order = np.argsort(starts, kind="stable")
+        starts = starts[order]
+        stops = np.maximum.accumulate(stops[order])
+        begins = np.concatenate(([True], starts[1:] > stops[:-1]))
+        ends = np.concatenate((begins[1:], [True]))
+        return np.column_stack((starts[begins], stops[ends])).reshape(-1)
+
+    @classmethod
+    def from_ranges(cls, cert: Mapping[int | str, Sequence[Sequence[int]]]):
+        runs = np.asarray([int(run) for run, ranges in cert.items() for _ in ranges], dtype=np.uint64)
+        lumi = np.asarray([lumi_range for ranges in cert.values() for lumi_range in ranges], dtype=np.uint64).reshape(-1, 2)
+        return cls(cls._normalize(cls.pack(runs, lumi[:, 0]), cls.pack(runs, lumi[:, 1]) + np.uint64(1)))
+
+    @classmethod
+    def from_json(cls, path: Path):
+        with path.open() as stream:
+            return cls.from_ranges(json.load(stream))
+
+    def to_ranges(self) -> dict[str, list[list[int]]]:
+        pairs = self.edges.reshape(-1, 2)
+        runs = (pairs[:, 0] >> np.uint64(32)).astype(np.uint32)
+        first = (pairs[:, 0] & np.uint64(0xFFFFFFFF)).astype(np.uint32)
+        last = ((pairs[:, 1] - np.uint64(1)) & np.uint64(0xFFFFFFFF)).astype(np.uint32)
+        cert: dict[str, list[list[int]]] = {}
+        for run, start, stop in zip(runs.tolist(), first.tolist(), last.tolist()):
+            cert.setdefault(str(run), []).append([start, stop])
+        return cert
+
+    @property
+    def runs(self) -> npt.NDArray[np.uint32]:
+        return np.unique((self.edges[::2] >> np.uint64(32)).astype(np.uint32))
+
+    @property
+    def num_lumis(self) -> int:
+        return int(np.sum(self.edges[1::2] - self.edges[::2]))
+
+    def get_lumi_mask(self, run, lumi: npt.NDArray[np.uint32]) -> npt.NDArray[np.bool_]:
+        keys = self.pack(run, lumi)
+        return (np.searchsorted(self.edges, keys, side="right") & 0x1).astype(bool)
+
+    def _combine(self, other: LumiBlockChecker, operation) -> LumiBlockChecker:
+        points = np.union1d(self.edges, other.edges)
+        inside = operation(
+            (np.searchsorted(self.edges, points, side="right") & 0x1).astype(bool),
+            (np.searchsorted(other.edges, points, side="right") & 0x1).astype(bool),
+        )
+        changed = inside != np.concatenate(([False], inside[:-1]))
+        return LumiBlockChecker(points[changed])
+
+    def union(self, other: LumiBlockChecker) -> LumiBlockChecker:
+        return self._combine(other, np.logical_or)
+
+    def intersection(self, other: LumiBlockChecker) -> LumiBlockChecker:
+        return self._combine(other, np.logical_and)
+
+    def difference(self, other: LumiBlockChecker) -> LumiBlockChecker:
+        return self._combine(other, lambda left, right: left & ~right)
+
+    __or__ = union
+    __and__ = intersection
+    __sub__ = difference
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, LumiBlockChecker) and np.array_equal(self.edges, other.edges)
+
+
+def _cache_path(cert_path: Path) -> Path:
+    """``<stem>-<path hash>-<fingerprint>.npy``; entries of one JSON share everything up to the fingerprint."""
+    cert_path = cert_path.resolve()
+    stat = cert_path.stat()
+    source = hashlib.sha1(str(cert_path).encode()).hexdigest()[:8]
+    fingerprint = f"{cert_path}\0{stat.st_size}\0{stat.st_mtime_ns}".encode()
+    return CERT_CACHE_DIR / f"{cert_path.stem}-{source}-{hashlib.sha1(fingerprint).hexdigest()[:16]}.npy"
+
+
+def _read_cache(cache_path: Path) -> LumiBlockChecker | None:
+    try:
+        edges = np.load(cache_path, mmap_mode="r")
+    except (OSError, ValueError):
+        return None
+    if edges.dtype != np.uint64 or edges.ndim != 1 or len(edges) % 2:
+        return None
+    return LumiBlockChecker(edges)
+
+
+def _write_cache(cache_path: Path, checker: LumiBlockChecker) -> None:
+    temporary_path = cache_path.with_name(f"{cache_path.name}.{os.getpid()}.tmp")
+    try:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        with temporary_path.open("wb") as stream:
+            np.save(stream, np.asarray(checker.edges, dtype=np.uint64))
+        temporary_path.replace(cache_path)
+        # The path hash is part of the prefix, so only older entries of this JSON match.
+        prefix = cache_path.name.rsplit("-", 1)[0]
+        for stale_path in cache_path.parent.glob(f"{prefix}-*.npy"):
+            if stale_path != cache_path and len(stale_path.name) == len(cache_path.name):
+                stale_path.unlink(missing_ok=True)
+    except OSError as exc:
+        temporary_path.unlink(missing_ok=True)
+        print(f"[warn] cannot write certification cache {cache_path}: {exc}", flush=True)
+
+
+@lru_cache(maxsize=8)
+def load_lumi_checker(cert_path: Path | str) -> LumiBlockChecker:
+    """Load a certification JSON through the compiled on-disk cache.
+
+    Cache entries are keyed by the resolved path, size, and mtime of the JSON,
+    so editing or replacing the file builds a new entry on the next call.
+    """
+    cert_path = Path(cert_path)
+    cache_path = _cache_path(cert_path)
+    checker = _read_cache(cache_path)
+    if checker is None:
+        checker = LumiBlockChecker.from_json(cert_path)
+        _write_cache(cache_path, checker)
+    return checker
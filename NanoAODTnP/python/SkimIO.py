@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import numpy as np
+import uproot
+
+from RPCDPGAnalysis.NanoAODTnP.HistBuild import required_branches  # type: ignore
+
+SKIM_PAIR_TREE = "pair"
+SKIM_RPC_TREE = "rpc"
+SKIM_COMPRESSION = uproot.LZ4(1)
+
+
+def skim_branches() -> tuple[frozenset[str], frozenset[str]]:
+    """Return the NanoAOD columns needed to rebuild shards under every selection policy."""
+    rpc: set[str] = set()
+    pair: set[str] = set()
+    for tight_match in (False, True):
+        rpc_keys, pair_keys = required_branches(tight_match=tight_match, probe_pt_gt15=True, bx_zero=True)
+        rpc.update(rpc_keys)
+        pair.update(pair_keys)
+    return frozenset(rpc), frozenset(pair)
+
+
+class SkimWriter:
+    """Append certified pair and RPC-crossing columns to flat ROOT trees.
+
+    ``pair_index`` is shifted by the pairs already written so chunks can be
+    appended in order and read back as one table.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.num_pairs = 0
+        self._file = None
+
+    def __enter__(self) -> SkimWriter:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = uproot.recreate(self.path, compression=SKIM_COMPRESSION)
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._file.close()
+        self._file = None
+
+    def _extend(self, name: str, tree: dict[str, np.ndarray]) -> None:
+        if name not in self._file:
+            self._file.mktree(name, {key: value.dtype for key, value in sorted(tree.items())})
+        if len(next(iter(tree.values()))):
+            self._file[name].extend(tree)
+
+    def write(self, pair_tree: dict[str, np.ndarray], rpc_tree: dict[str, np.ndarray]) -> None:
+        rpc_tree = dict(rpc_tree, pair_index=rpc_tree["pair_index"] + np.int32(self.num_pairs))
+        self._extend(SKIM_PAIR_TREE, pair_tree)
+        self._extend(SKIM_RPC_TREE, rpc_tree)
+        self.num_pairs += len(pair_tree["run"])
+
+
+def read_skim(path: Path) -> tuple[dict[str, np.ndarray], dict[str, np.ndarray]]:
+    with uproot.open(path) as skim_file:
+        for name in (SKIM_PAIR_TREE, SKIM_RPC_TREE):
+            if name not in skim_file:
+                raise RuntimeError(f"Skim file has no {name!r} tree: {path}")
+        pair_tree = skim_file[SKIM_PAIR_TREE].arrays(library="np")
+        rpc_tree = skim_file[SKIM_RPC_TREE].arrays(library="np")
+    print(f"[info] skim pairs={len(pair_tree['run'])} crossings={len(rpc_tree['pair_index'])}", flush=True)
+    return pair_tree, rpc_tree
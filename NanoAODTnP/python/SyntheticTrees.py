@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+import numpy as np
+
+from RPCDPGAnalysis.NanoAODTnP.HistBuild import roll_lookup, run_categories  # type: ignore
+
+
+def synthetic_trees(num_pairs: int, seed: int) -> tuple[dict[str, np.ndarray], dict[str, np.ndarray]]:
+    """Random pair and RPC trees with the columns and compact dtypes of the skims."""
+    rng = np.random.default_rng(seed)
+    runs = np.asarray(run_categories(), dtype=np.uint32)
+    pair_tree: dict[str, np.ndarray] = {"run": rng.choice(runs, num_pairs)}
+    for prefix in ("tag", "probe"):
+        pair_tree[f"{prefix}_pt"] = rng.exponential(30.0, num_pairs).astype(np.float32) + 5.0
+        pair_tree[f"{prefix}_eta"] = rng.uniform(-2.4, 2.4, num_pairs).astype(np.float32)
+        pair_tree[f"{prefix}_phi"] = rng.uniform(-np.pi, np.pi, num_pairs).astype(np.float32)
+    pair_tree["probe_q"] = rng.choice(np.asarray([-1, 1], dtype=np.int8), num_pairs)
+    pair_tree["pair_mass"] = rng.normal(91.0, 5.0, num_pairs).astype(np.float32)
+    pair_tree["probe_p"] = pair_tree["probe_pt"].astype(np.float64) * np.cosh(pair_tree["probe_eta"].astype(np.float64))
+    pair_tree["probe_q_over_p"] = pair_tree["probe_q"] / pair_tree["probe_p"]
+
+    size = rng.poisson(4.0, num_pairs)
+    pair_index = np.repeat(np.arange(num_pairs, dtype=np.int32), size)
+    num_crossings = len(pair_index)
+    keys = np.flatnonzero(roll_lookup().index_by_key >= 0).astype(np.uint32)
+    rpc_tree = {
+        key: pair_tree[key][pair_index]
+        for key in ("probe_pt", "probe_eta", "probe_phi", "probe_q", "probe_p", "probe_q_over_p")
+    }
+    rpc_tree.update(
+        pair_index=pair_index,
+        geometry_key=rng.choice(keys, num_crossings),
+        residual_x=rng.normal(0.0, 10.0, num_crossings).astype(np.float32),
+        pull_x=rng.normal(0.0, 2.0, num_crossings).astype(np.float32),
+        cls=rng.integers(1, 10, num_crossings, dtype=np.int16),
+        bx=rng.integers(-2, 3, num_crossings, dtype=np.int8),
+        n_pv=rng.integers(10, 70, num_crossings, dtype=np.int16),
+        is_fiducial=rng.random(num_crossings) < 0.9,
+        is_matched=rng.random(num_crossings) < 0.95,
+    )
+    return pair_tree, rpc_tree
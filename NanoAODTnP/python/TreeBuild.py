@@ -1,14 +1,14 @@
 from __future__ import annotations
 
-import json
+from collections.abc import Iterable, Sequence
+from dataclasses import dataclass
 from pathlib import Path
 
-import awkward as ak
 import numpy as np
-import numpy.typing as npt
 import uproot
 
-from RPCDPGAnalysis.NanoAODTnP.RPCGeomServ import RPC_GEOMETRY_KEYS, get_roll_name  # type: ignore
+from RPCDPGAnalysis.NanoAODTnP.ReadCert import LumiBlockChecker, load_lumi_checker  # type: ignore
+from RPCDPGAnalysis.NanoAODTnP.RPCGeomServ import RPC_GEOMETRY_KEYS, pack_geometry_key  # type: ignore
 
 TREE_PATH = "Events"
 TABLE_NAME = "rpcTnP"
@@ -20,7 +20,13 @@ RPC_FLOAT_KEYS = [
     "residual_x",
     "pull_x",
 ]
-RPC_INT_KEYS = ["cls", "bx", "probe_q", "n_pv"]
+RPC_INT_DTYPES = {
+    "cls": np.int16,
+    "bx": np.int8,
+    "probe_q": np.int8,
+    "n_pv": np.int16,
+}
+RPC_INT_KEYS = list(RPC_INT_DTYPES)
 RPC_BOOL_KEYS = ["is_fiducial", "is_matched"]
 
 PAIR_KEYS = [
@@ -35,132 +41,278 @@ PAIR_KEYS = [
     "pair_pt",
     "pair_mass",
 ]
-REQUIRED_BASE_KEYS = frozenset((
+REQUIRED_RPC_KEYS = frozenset((
     *RPC_FLOAT_KEYS,
     *RPC_INT_KEYS,
     *RPC_BOOL_KEYS,
     *RPC_GEOMETRY_KEYS,
-    *PAIR_KEYS,
 ))
+REQUIRED_BASE_KEYS = REQUIRED_RPC_KEYS | frozenset(PAIR_KEYS)
 
 
-def build_roll_names(geometry: dict[str, np.ndarray]) -> np.ndarray:
-    det_ids = np.column_stack([geometry[key] for key in RPC_GEOMETRY_KEYS])
-    unique_det_ids, inverse = np.unique(det_ids, axis=0, return_inverse=True)
-    unique_names = np.asarray([
-        get_roll_name(*(int(value) for value in det_id))
-        for det_id in unique_det_ids
-    ], dtype=str)
-    return unique_names[inverse]
+@dataclass
+class BaseTable:
+    """Certified NanoAOD entries as flat per-crossing columns plus entry offsets."""
 
+    run: np.ndarray
+    luminosityBlock: np.ndarray
+    offsets: np.ndarray
+    content: dict[str, np.ndarray]
 
-def _flatten_branch(base_tree, key: str) -> np.ndarray:
-    return ak.to_numpy(ak.flatten(base_tree[key], axis=1))
+    def __len__(self) -> int:
+        return len(self.run)
+
+    @property
+    def size(self) -> np.ndarray:
+        return np.diff(self.offsets)
+
+    @classmethod
+    def concatenate(cls, tables: Sequence[BaseTable]) -> BaseTable:
+        if len(tables) == 1:
+            return tables[0]
+        sizes = np.concatenate([table.size for table in tables])
+        return cls(
+            np.concatenate([table.run for table in tables]),
+            np.concatenate([table.luminosityBlock for table in tables]),
+            np.concatenate(([0], np.cumsum(sizes, dtype=np.int64))),
+            {key: np.concatenate([table.content[key] for table in tables]) for key in tables[0].content},
+        )
 
 
 def _add_probe_momentum(tree: dict[str, np.ndarray]) -> None:
-    tree["probe_p"] = tree["probe_pt"] * np.cosh(tree["probe_eta"])
+    """Derived ``probe_p`` and ``probe_q_over_p`` in float64.
+
+    They are binned as computed: rounding them to float32 can move a value
+    that lies just below a bin edge onto it.
+    """
+    if "probe_pt" not in tree or "probe_eta" not in tree:
+        return
+    probe_p = tree["probe_pt"].astype(np.float64) * np.cosh(tree["probe_eta"].astype(np.float64))
+    tree["probe_p"] = probe_p
+    if "probe_q" not in tree:
+        return
     tree["probe_q_over_p"] = np.divide(
         tree["probe_q"],
-        tree["probe_p"],
-        out=np.full_like(tree["probe_p"], np.nan, dtype=np.float64),
-        where=tree["probe_p"] > 0.0,
+        probe_p,
+        out=np.full_like(probe_p, np.nan),
+        where=probe_p > 0.0,
     )
 
 
-def build_rpc_tree(base_tree) -> dict[str, np.ndarray]:
-    size = np.asarray(ak.to_numpy(base_tree["size"]), dtype=np.int32)
+def build_rpc_tree(base_table: BaseTable, keys: Iterable[str] = REQUIRED_RPC_KEYS) -> dict[str, np.ndarray]:
+    """Per-crossing columns in compact dtypes.
+
+    Floats stay float32 as stored, except the derived momentum columns, the
+    detector id is packed into one uint32 ``geometry_key`` and the run is
+    reached through ``pair_index``.
+    """
+    keys = set(keys)
+    content = base_table.content
+    size = base_table.size
     rpc_tree = {
-        key: np.asarray(_flatten_branch(base_tree, key), dtype=np.float64)
+        key: content[key].astype(np.float32, copy=False)
         for key in RPC_FLOAT_KEYS
+        if key in keys
     }
-    geometry = {}
-    for key in (*RPC_GEOMETRY_KEYS, *RPC_INT_KEYS):
-        value = np.asarray(_flatten_branch(base_tree, key), dtype=np.int32)
-        rpc_tree[key] = value
-        if key in RPC_GEOMETRY_KEYS:
-            geometry[key] = value
-    rpc_tree["roll_name"] = build_roll_names(geometry)
+    rpc_tree.update(
+        (key, content[key].astype(dtype, copy=False))
+        for key, dtype in RPC_INT_DTYPES.items()
+        if key in keys
+    )
+    rpc_tree["geometry_key"] = pack_geometry_key(content)
     for key in RPC_BOOL_KEYS:
-        rpc_tree[key] = np.asarray(_flatten_branch(base_tree, key), dtype=np.bool_)
+        if key not in keys:
+            continue
+        rpc_tree[key] = content[key].astype(np.bool_, copy=False)
     _add_probe_momentum(rpc_tree)
-    rpc_tree["pair_index"] = np.repeat(np.arange(len(size), dtype=np.int64), size)
-    rpc_tree["run"] = np.asarray(np.repeat(ak.to_numpy(base_tree["run"]), size), dtype=np.uint32)
+    rpc_tree["pair_index"] = np.repeat(np.arange(len(size), dtype=np.int32), size)
     return rpc_tree
 
 
-def build_pair_tree(base_tree) -> dict[str, np.ndarray]:
+def build_pair_tree(base_table: BaseTable, keys: Iterable[str] = PAIR_KEYS) -> dict[str, np.ndarray]:
+    keys = set(keys)
+    first = base_table.offsets[:-1]
     pair_tree = {
-        key: np.asarray(ak.to_numpy(ak.firsts(base_tree[key], axis=1)), dtype=np.float64)
+        key: base_table.content[key][first]
         for key in PAIR_KEYS
+        if key in keys
     }
     _add_probe_momentum(pair_tree)
-    pair_tree["run"] = np.asarray(ak.to_numpy(base_tree["run"]), dtype=np.uint32)
+    pair_tree["run"] = np.asarray(base_table.run, dtype=np.uint32)
     return pair_tree
 
 
-class LumiBlockChecker:
-    """https://twiki.cern.ch/twiki/bin/view/CMSPublic/SWGuideGoodLumiSectionsJSONFile"""
+def _selected_branches(tree, keys: frozenset[str]) -> dict[str, str]:
+    available = {
+        key.removeprefix(f"{TABLE_NAME}_"): key
+        for key in tree.keys()
+        if key.startswith(f"{TABLE_NAME}_")
+    }
+    missing = sorted(keys - set(available))
+    if missing:
+        raise RuntimeError(f"Missing NanoAOD branches: {', '.join(missing)}")
+    return {key: available[key] for key in sorted(keys)}
 
-    def __init__(self, cert: dict[np.uint32, npt.NDArray[np.uint32]]):
-        self.cert = cert
 
-    @staticmethod
-    def _transform_lumi_ranges(lumi: list[tuple[int, int]]) -> npt.NDArray[np.uint32]:
-        flat_lumi = np.array(lumi, dtype=np.uint32).flatten()
-        flat_lumi[::2] -= 1
-        return flat_lumi
+def _read_header(tree) -> dict[str, np.ndarray]:
+    return tree.arrays(["run", "luminosityBlock", f"n{TABLE_NAME}"], library="np")
 
-    @classmethod
-    def from_json(cls, path: Path):
-        with path.open() as stream:
-            cert = json.load(stream)
-        return cls({
-            np.uint32(run): cls._transform_lumi_ranges(lumi_ranges)
-            for run, lumi_ranges in cert.items()
-        })
-
-    @staticmethod
-    def _get_lumi_mask(lumi: npt.NDArray[np.uint32], ranges: npt.NDArray[np.uint32]) -> npt.NDArray[np.bool_]:
-        return (np.searchsorted(ranges, lumi) & 0x1).astype(bool)
-
-    def get_lumi_mask(self, run, lumi: npt.NDArray[np.uint32]) -> npt.NDArray[np.bool_]:
-        if np.isscalar(run):
-            run = np.uint32(run)
-            if run not in self.cert:
-                return np.full_like(lumi, fill_value=False, dtype=bool)
-            return self._get_lumi_mask(lumi, self.cert[run])
-
-        run_values = np.asarray(run, dtype=np.uint32)
-        mask = np.full_like(lumi, fill_value=False, dtype=bool)
-        for each in np.unique(run_values):
-            selected = run_values == each
-            mask[selected] = self.get_lumi_mask(each, lumi[selected])
-        return mask
-
-
-def read_nanoaod_base(path: Path, cert_path: Path):
+
+def _certified_entries(header: dict[str, np.ndarray], lumi_checker: LumiBlockChecker) -> np.ndarray:
+    run = np.asarray(header["run"], dtype=np.uint32)
+    lumi = np.asarray(header["luminosityBlock"], dtype=np.uint32)
+    return (np.asarray(header[f"n{TABLE_NAME}"]) > 0) & lumi_checker.get_lumi_mask(run, lumi)
+
+
+def _cluster_ranges(tree, branch_names: list[str], selected: np.ndarray) -> list[tuple[int, int]]:
+    boundaries = np.asarray(tree.common_entry_offsets(filter_name=branch_names), dtype=np.int64)
+    selected_sum = np.concatenate(([0], np.cumsum(selected, dtype=np.int64)))
+    keep = selected_sum[boundaries[1:]] > selected_sum[boundaries[:-1]]
+    previous = np.concatenate(([False], keep[:-1]))
+    following = np.concatenate((keep[1:], [False]))
+    starts = boundaries[:-1][keep & ~previous]
+    stops = boundaries[1:][keep & ~following]
+    return list(zip(starts.tolist(), stops.tolist()))
+
+
+def _basket_bytes(tree, branch_names: list[str], ranges: list[tuple[int, int]]) -> dict[str, tuple[int, int]]:
+    covered = np.zeros(tree.num_entries + 1, dtype=np.int64)
+    for start, stop in ranges:
+        covered[start] += 1
+        covered[stop] -= 1
+    covered_sum = np.concatenate(([0], np.cumsum(np.cumsum(covered[:-1]) > 0, dtype=np.int64)))
+    bytes_by_branch = {}
+    for name in branch_names:
+        branch = tree[name]
+        offsets = np.asarray(branch.entry_offsets, dtype=np.int64)
+        read_bytes = 0
+        skipped_bytes = 0
+        for basket_num, (start, stop) in enumerate(zip(offsets[:-1], offsets[1:])):
+            if covered_sum[stop] > covered_sum[start]:
+                read_bytes += branch.basket_compressed_bytes(basket_num)
+            else:
+                skipped_bytes += branch.basket_compressed_bytes(basket_num)
+        bytes_by_branch[name] = read_bytes, skipped_bytes
+    return bytes_by_branch
+
+
+def _print_read_summary(selected: np.ndarray, ranges: list[tuple[int, int]], bytes_by_branch: dict[str, tuple[int, int]]) -> None:
+    read_bytes = sum(read for read, _ in bytes_by_branch.values())
+    skipped_bytes = sum(skipped for _, skipped in bytes_by_branch.values())
+    print(
+        f"[info] certified entries={int(np.sum(selected))}/{len(selected)} ranges={len(ranges)} "
+        f"payload read={read_bytes / 1e6:.1f} MB skipped={skipped_bytes / 1e6:.1f} MB",
+        flush=True,
+    )
+    per_branch = " ".join(
+        f"{name.removeprefix(f'{TABLE_NAME}_')}={read / 1e6:.2f}"
+        for name, (read, _) in sorted(bytes_by_branch.items(), key=lambda item: -item[1][0])
+    )
+    print(f"[info] payload read MB by branch: {per_branch}", flush=True)
+
+
+def _step_entries(tree, branch_names: list[str], step_size: int | str | None) -> int | None:
+    if step_size is None or isinstance(step_size, int):
+        return step_size
+    return max(1, tree.num_entries_for(step_size, filter_name=branch_names))
+
+
+def _read_content(branch, entry_start: int, entry_stop: int, offsets: np.ndarray) -> np.ndarray:
+    """Decode the flat content of a jagged branch for ``[entry_start, entry_stop)``.
+
+    NanoAOD table columns are fixed-width values behind a shared counter, so the
+    uncompressed basket payloads concatenate to the flat content; ``offsets``
+    are the file-wide content offsets built from that counter.
+    """
+    dtype = branch.interpretation.content.from_dtype
+    entry_offsets = np.asarray(branch.entry_offsets, dtype=np.int64)
+    first = int(np.searchsorted(entry_offsets, entry_start, side="right")) - 1
+    last = int(np.searchsorted(entry_offsets, entry_stop, side="left"))
+    data = [np.frombuffer(branch.basket(basket_num).data, dtype=dtype) for basket_num in range(first, last)]
+    content = data[0] if len(data) == 1 else np.concatenate(data)
+    base = offsets[entry_offsets[first]]
+    content = content[offsets[entry_start] - base:offsets[entry_stop] - base]
+    return content.astype(dtype.newbyteorder("="), copy=False)
+
+
+def _read_table(
+    tree,
+    branches: dict[str, str],
+    header: dict[str, np.ndarray],
+    offsets: np.ndarray,
+    selected: np.ndarray,
+    entry_start: int,
+    entry_stop: int,
+) -> BaseTable:
+    entry_mask = selected[entry_start:entry_stop]
+    sizes = np.diff(offsets[entry_start:entry_stop + 1])
+    content = {
+        key: _read_content(tree[name], entry_start, entry_stop, offsets)
+        for key, name in branches.items()
+    }
+    if not np.all(entry_mask):
+        content_mask = np.repeat(entry_mask, sizes)
+        content = {key: value[content_mask] for key, value in content.items()}
+        sizes = sizes[entry_mask]
+    return BaseTable(
+        np.asarray(header["run"][entry_start:entry_stop][entry_mask], dtype=np.uint32),
+        np.asarray(header["luminosityBlock"][entry_start:entry_stop][entry_mask], dtype=np.uint32),
+        np.concatenate(([0], np.cumsum(sizes, dtype=np.int64))),
+        content,
+    )
+
+
+def _empty_table(tree, branches: dict[str, str]) -> BaseTable:
+    return BaseTable(
+        np.zeros(0, dtype=np.uint32),
+        np.zeros(0, dtype=np.uint32),
+        np.zeros(1, dtype=np.int64),
+        {
+            key: np.zeros(0, dtype=tree[name].interpretation.content.from_dtype.newbyteorder("="))
+            for key, name in branches.items()
+        },
+    )
+
+
+def _iterate_certified(tree, lumi_checker: LumiBlockChecker, step_size: int | str | None, keys: frozenset[str]):
+    branches = _selected_branches(tree, keys)
+    payload_branches = sorted(branches.values())
+    header = _read_header(tree)
+    selected = _certified_entries(header, lumi_checker)
+    offsets = np.concatenate(([0], np.cumsum(header[f"n{TABLE_NAME}"], dtype=np.int64)))
+    ranges = _cluster_ranges(tree, payload_branches, selected)
+    _print_read_summary(selected, ranges, _basket_bytes(tree, payload_branches, ranges))
+    if not ranges:
+        yield _empty_table(tree, branches)
+        return
+
+    step_entries = _step_entries(tree, payload_branches, step_size)
+    for range_start, range_stop in ranges:
+        step = range_stop - range_start if step_entries is None else step_entries
+        for entry_start in range(range_start, range_stop, step):
+            entry_stop = min(entry_start + step, range_stop)
+            yield _read_table(tree, branches, header, offsets, selected, entry_start, entry_stop)
+
+
+def iterate_nanoaod_base(
+    path: Path,
+    cert_path: Path,
+    step_size: int | str = "100 MB",
+    keys: Iterable[str] = REQUIRED_BASE_KEYS,
+):
+    """Yield certified chunks of at most ``step_size`` entries (int) or bytes ("100 MB").
+
+    The run, lumi and size branches are read first; payload branches are then
+    decompressed only for the basket clusters that contain certified entries.
+    Only the table columns in ``keys`` are read.
+    """
+    lumi_checker = load_lumi_checker(cert_path)
     with uproot.open(path) as input_file:
-        tree = input_file[TREE_PATH]
-        tree_keys = list(tree.keys())
-        aliases = {
-            key.removeprefix(f"{TABLE_NAME}_"): key
-            for key in tree_keys
-            if key.startswith(f"{TABLE_NAME}_")
-        }
-        aliases["size"] = f"n{TABLE_NAME}"
-        missing = sorted(REQUIRED_BASE_KEYS - set(aliases))
-        if missing:
-            raise RuntimeError(f"Missing NanoAOD branches: {', '.join(missing)}")
-        selected_aliases = {key: aliases[key] for key in sorted(REQUIRED_BASE_KEYS)}
-        selected_aliases["size"] = aliases["size"]
-        base_tree = tree.arrays(
-            expressions=list(selected_aliases) + ["run", "luminosityBlock"],
-            aliases=selected_aliases,
-            cut=f"(n{TABLE_NAME} > 0)",
-            library="ak",
-        )
+        yield from _iterate_certified(input_file[TREE_PATH], lumi_checker, step_size, frozenset(keys))
 
-    run = np.asarray(ak.to_numpy(base_tree["run"]), dtype=np.uint32)
-    lumi = np.asarray(ak.to_numpy(base_tree["luminosityBlock"]), dtype=np.uint32)
-    return base_tree[LumiBlockChecker.from_json(cert_path).get_lumi_mask(run, lumi)]
+
+def read_nanoaod_base(path: Path, cert_path: Path, keys: Iterable[str] = REQUIRED_BASE_KEYS) -> BaseTable:
+    lumi_checker = load_lumi_checker(cert_path)
+    with uproot.open(path) as input_file:
+        chunks = list(_iterate_certified(input_file[TREE_PATH], lumi_checker, None, frozenset(keys)))
+    return BaseTable.concatenate(chunks)
@@ -6,10 +6,12 @@ SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
 source "${SCRIPT_DIR}/rpc-tnp-common.sh"
 
 usage() {
-    echo "Usage: $0 CMSSW_BASE INPUT_EOS[|INPUT_EOS...] CERT_PATH ROLL_BLACKLIST_PATH RUN_BLACKLIST_PATH OUTPUT_EOS [default|tight] [apply-roll|skip-roll] [apply-run|skip-run] [probe-pt-gt15:0|1, default:1] [bx-zero:0|1]" >&2
+    echo "Usage: $0 CMSSW_BASE INPUT_EOS[|INPUT_EOS...] CERT_PATH ROLL_BLACKLIST_PATH RUN_BLACKLIST_PATH OUTPUT_EOS [default|tight] [apply-roll|skip-roll] [apply-run|skip-run] [probe-pt-gt15:0|1, default:1] [bx-zero:0|1] [minimal|standard|full] [CODEC:LEVEL, default:zlib:1] [MATCH_POLICY[,MATCH_POLICY...]|none] [VARIANT[,VARIANT...]]" >&2
+    echo "With VARIANTS (e.g. default,tight,tight+bx-zero) one read writes every variant; OUTPUT_EOS names the first one and the selection arguments are ignored." >&2
+    echo "MATCH_POLICIES (default, tight, bx-zero, tight+bx-zero or all) also fill those numerators into every shard." >&2
 }
 
-[[ $# -ge 6 && $# -le 11 ]] || { usage; exit 2; }
+[[ $# -ge 6 && $# -le 15 ]] || { usage; exit 2; }
 
 CMSSW_BASE="$1"
 INPUT_EOS_ARG="$2"
@@ -22,12 +24,20 @@ ROLL_BLACKLIST_MODE="${8:-apply-roll}"
 RUN_BLACKLIST_MODE="${9:-apply-run}"
 PROBE_PT_GT15="${10:-1}"
 BX_ZERO="${11:-0}"
+PROFILE="${12:-full}"
+COMPRESSION="${13:-zlib:1}"
+MATCH_POLICIES_ARG="${14:-none}"
+VARIANTS_ARG="${15:-}"
+
+STEP_SIZE="100 MB"
 
 WORK_DIR="$(mktemp -d "${TMPDIR:-/tmp}/rpc-tnp-analyze-XXXXXX")"
 OUTPUT_LOCAL="${WORK_DIR}/output.root"
 ANALYZE_SCRIPT="${CMSSW_BASE}/src/RPCDPGAnalysis/NanoAODTnP/scripts/rpc-tnp-analyze.py"
 INPUT_EOS_LIST=()
-OUTPUT_PARTS=()
+VARIANTS=()
+VARIANT_SUFFIXES=()
+MATCH_POLICIES=()
 
 cleanup() {
     rm -rf -- "${WORK_DIR}"
@@ -41,6 +51,9 @@ validate_inputs() {
     [[ "${RUN_BLACKLIST_MODE}" == "apply-run" || "${RUN_BLACKLIST_MODE}" == "skip-run" ]] || die "unknown run blacklist mode: ${RUN_BLACKLIST_MODE}"
     [[ "${PROBE_PT_GT15}" == "0" || "${PROBE_PT_GT15}" == "1" ]] || die "probe-pt-gt15 must be 0 or 1: ${PROBE_PT_GT15}"
     [[ "${BX_ZERO}" == "0" || "${BX_ZERO}" == "1" ]] || die "bx-zero must be 0 or 1: ${BX_ZERO}"
+    [[ "${PROFILE}" == "minimal" || "${PROFILE}" == "standard" || "${PROFILE}" == "full" ]] || die "unknown histogram profile: ${PROFILE}"
+    HADD_COMPRESSION="$(hadd_compression_setting "${COMPRESSION}")"
+    [[ -z "${VARIANTS_ARG}" ]] || require_file "${ROLL_BLACKLIST_PATH}"
     require_dir "${CMSSW_BASE}/src"
     require_file "${CERT_PATH}"
     if [[ "${ROLL_BLACKLIST_MODE}" == "apply-roll" ]]; then
@@ -57,6 +70,28 @@ split_input_list() {
     [[ ${#INPUT_EOS_LIST[@]} -gt 0 && -n "${INPUT_EOS_LIST[0]}" ]] || die "empty input list"
 }
 
+split_match_policy_list() {
+    [[ "${MATCH_POLICIES_ARG}" == "none" ]] && return
+    IFS=',' read -r -a MATCH_POLICIES <<< "${MATCH_POLICIES_ARG}"
+    [[ ${#MATCH_POLICIES[@]} -gt 0 && -n "${MATCH_POLICIES[0]}" ]] || die "empty match policy list"
+}
+
+split_variant_list() {
+    local variant=""
+
+    if [[ -n "${VARIANTS_ARG}" ]]; then
+        IFS=',' read -r -a VARIANTS <<< "${VARIANTS_ARG}"
+        [[ ${#VARIANTS[@]} -gt 0 && -n "${VARIANTS[0]}" ]] || die "empty variant list"
+    fi
+    if [[ ${#VARIANTS[@]} -eq 0 ]]; then
+        VARIANT_SUFFIXES=("")
+        return
+    fi
+    for variant in "${VARIANTS[@]}"; do
+        VARIANT_SUFFIXES+=("$(variant_suffix "${variant}")")
+    done
+}
+
 setup_cmssw_runtime() {
     # shellcheck source=/dev/null
     source /cvmfs/cms.cern.ch/cmsset_default.sh
@@ -86,9 +121,25 @@ run_analysis_once() {
         --input "${input_local}"
         --cert "${CERT_PATH}"
         --output "${output_part}"
+        --step-size "${STEP_SIZE}"
+        --profile "${PROFILE}"
+        --compression "${COMPRESSION}"
     )
+    local variant=""
+    local policy=""
+    local suffix=""
 
-    if [[ "${ROLL_BLACKLIST_MODE}" == "apply-roll" ]]; then
+    if [[ ${#MATCH_POLICIES[@]} -gt 0 ]]; then
+        for policy in "${MATCH_POLICIES[@]}"; do
+            analyze_args+=(--match-policy "${policy}")
+        done
+    fi
+    if [[ ${#VARIANTS[@]} -gt 0 ]]; then
+        analyze_args+=(--roll-blacklist-path "${ROLL_BLACKLIST_PATH}" --run-blacklist-path "${RUN_BLACKLIST_PATH}")
+        for variant in "${VARIANTS[@]}"; do
+            analyze_args+=(--variant "${variant}")
+        done
+    elif [[ "${ROLL_BLACKLIST_MODE}" == "apply-roll" ]]; then
         analyze_args+=(--roll-blacklist-path "${ROLL_BLACKLIST_PATH}")
     else
         analyze_args+=(--no-roll-blacklist)
@@ -108,9 +159,19 @@ run_analysis_once() {
         analyze_args+=(--bx-zero)
     fi
 
-    rm -f -- "${output_part}"
+    for suffix in "${VARIANT_SUFFIXES[@]}"; do
+        rm -f -- "$(variant_part_path "${output_part}" "${suffix}")"
+    done
     python3 "${ANALYZE_SCRIPT}" "${analyze_args[@]}" || return $?
-    [[ -s "${output_part}" ]]
+    for suffix in "${VARIANT_SUFFIXES[@]}"; do
+        [[ -s "$(variant_part_path "${output_part}" "${suffix}")" ]] || return 1
+    done
+}
+
+variant_part_path() {
+    local output_part="$1"
+    local suffix="$2"
+    printf '%s\n' "${output_part%.root}${suffix}.root"
 }
 
 analyze_one_input() {
@@ -122,7 +183,6 @@ analyze_one_input() {
     echo "[info] input[${index}]=${input_eos}"
     retry_command "copy input[${index}]" copy_input_once "${input_eos}" "${input_local}"
     retry_command "analyze input[${index}]" run_analysis_once "${input_local}" "${output_part}"
-    OUTPUT_PARTS+=("${output_part}")
 }
 
 copy_single_part_once() {
@@ -139,16 +199,24 @@ merge_parts_once() {
     shift
 
     rm -f -- "${output_local}"
-    hadd -T -fk101 -v 0 "${output_local}" "$@" || return $?
+    hadd "-fk${HADD_COMPRESSION}" -v 0 "${output_local}" "$@" || return $?
     [[ -s "${output_local}" ]]
 }
 
 merge_output_parts() {
-    [[ ${#OUTPUT_PARTS[@]} -gt 0 ]] || die "no histogram shards were produced"
-    if [[ ${#OUTPUT_PARTS[@]} -eq 1 ]]; then
-        retry_command "copy single output part" copy_single_part_once "${OUTPUT_PARTS[0]}" "${OUTPUT_LOCAL}"
+    local output_local="$1"
+    local suffix="$2"
+    local output_parts=()
+    local index=""
+
+    for index in "${!INPUT_EOS_LIST[@]}"; do
+        output_parts+=("$(variant_part_path "${WORK_DIR}/output_${index}.root" "${suffix}")")
+    done
+    [[ ${#output_parts[@]} -gt 0 ]] || die "no histogram shards were produced"
+    if [[ ${#output_parts[@]} -eq 1 ]]; then
+        retry_command "copy single output part${suffix}" copy_single_part_once "${output_parts[0]}" "${output_local}"
     else
-        retry_command "merge output parts" merge_parts_once "${OUTPUT_LOCAL}" "${OUTPUT_PARTS[@]}"
+        retry_command "merge output parts${suffix}" merge_parts_once "${output_local}" "${output_parts[@]}"
     fi
 }
 
@@ -164,13 +232,31 @@ copy_output_once() {
 }
 
 copy_output_to_eos() {
-    retry_command "create EOS output directory" create_output_dir_once "${OUTPUT_EOS}"
-    retry_command "copy output to EOS" copy_output_once "${OUTPUT_LOCAL}" "${OUTPUT_EOS}"
+    local output_local="$1"
+    local output_eos="$2"
+    retry_command "create EOS output directory" create_output_dir_once "${output_eos}"
+    retry_command "copy output to EOS" copy_output_once "${output_local}" "${output_eos}"
+}
+
+write_variant_outputs() {
+    local suffix=""
+    local output_local=""
+    local output_eos=""
+
+    for suffix in "${VARIANT_SUFFIXES[@]}"; do
+        output_local="$(variant_part_path "${OUTPUT_LOCAL}" "${suffix}")"
+        output_eos="$(variant_output_path "${OUTPUT_EOS}" "${VARIANT_SUFFIXES[0]}" "${suffix}")"
+        merge_output_parts "${output_local}" "${suffix}"
+        copy_output_to_eos "${output_local}" "${output_eos}"
+        echo "[done] ${output_eos}"
+    done
 }
 
 main() {
     validate_inputs
     split_input_list
+    split_variant_list
+    split_match_policy_list
 
     echo "[info] host=${HOSTNAME}"
     echo "[info] hist_output=${OUTPUT_EOS}"
@@ -179,15 +265,18 @@ main() {
     echo "[info] match_mode=${MATCH_MODE}"
     echo "[info] probe_pt_gt15=${PROBE_PT_GT15}"
     echo "[info] bx_zero=${BX_ZERO}"
+    echo "[info] step_size=${STEP_SIZE}"
+    echo "[info] profile=${PROFILE}"
+    echo "[info] compression=${COMPRESSION}"
     echo "[info] inputs=${#INPUT_EOS_LIST[@]}"
+    echo "[info] match_policies=${MATCH_POLICIES_ARG}"
+    echo "[info] variants=${VARIANTS_ARG:-none}"
 
     setup_cmssw_runtime
     for index in "${!INPUT_EOS_LIST[@]}"; do
         analyze_one_input "${index}" "${INPUT_EOS_LIST[$index]}"
     done
-    merge_output_parts
-    copy_output_to_eos
-    echo "[done] ${OUTPUT_EOS}"
+    write_variant_outputs
 }
 
 main "$@"
@@ -24,6 +24,17 @@ Options:
   --tight-match           Use abs(residual_x) <= 20 cm or abs(pull_x) <= 4 as the matched selection
   --all-probe-pt          Disable the default pT > 15 GeV probe selection
   --bx-zero               Require BX == 0 in the efficiency numerator; the fiducial denominator is unchanged
+  --variants LIST         Comma-separated variants written from one read per job, e.g.
+                          default,tight,bx-zero,tight+bx-zero (tokens: tight, all-probe-pt,
+                          bx-zero, wo-blacklist, wo-run-blacklist); each variant goes to the
+                          output base with its suffix. Cannot be combined with the selection flags
+  --profile NAME          Histogram profile: minimal (roll and run-station counts), standard
+                          (everything except the 3D kinematic families), or full (default)
+  --compression SPEC      Shard compression as CODEC:LEVEL, CODEC one of zlib, lzma, lz4, zstd
+                          (default: zlib:1)
+  --match-policies LIST   Comma-separated extra numerator matching policies filled into every
+                          shard, e.g. tight,bx-zero or all (policies: default, tight, bx-zero,
+                          tight+bx-zero); plot them with rpc-tnp-plot.py --match-policy
   --files-per-job N       Number of NanoAOD files per job in all mode (default: 100);
                           resubmit mode reuses the chunks saved in items_all
   -h, --help              Show this help
@@ -113,6 +124,26 @@ parse_args() {
                 BX_ZERO=1
                 shift
                 ;;
+            --variants)
+                [[ $# -ge 2 ]] || usage_error
+                VARIANTS="$2"
+                shift 2
+                ;;
+            --profile)
+                [[ $# -ge 2 ]] || usage_error
+                PROFILE="$2"
+                shift 2
+                ;;
+            --compression)
+                [[ $# -ge 2 ]] || usage_error
+                COMPRESSION="$2"
+                shift 2
+                ;;
+            --match-policies)
+                [[ $# -ge 2 ]] || usage_error
+                MATCH_POLICIES="$2"
+                shift 2
+                ;;
             --files-per-job)
                 [[ $# -ge 2 ]] || usage_error
                 FILES_PER_JOB="$2"
@@ -163,6 +194,9 @@ configure_paths() {
     if [[ "${NO_RUN_BLACKLIST}" -eq 1 ]]; then
         item_mode="${item_mode:+${item_mode}-}no-run-blacklist"
     fi
+    if [[ -n "${VARIANTS}" ]]; then
+        item_mode="variants-${VARIANTS//[,+]/_}"
+    fi
     if [[ -n "${item_mode}" ]]; then
         ITEMS_ALL_BASE="${LOG_BASE}/items/${item_mode}/all"
         ITEMS_RESUBMIT_BASE="${LOG_BASE}/items/${item_mode}/resubmit"
@@ -179,7 +213,17 @@ configure_blacklist() {
     if [[ "${NO_RUN_BLACKLIST}" -eq 1 && -n "${RUN_BLACKLIST_PATH}" ]]; then
         die "--no-run-blacklist and --run-blacklist cannot be used together"
     fi
-    if [[ "${OUTPUT_BASE_SET}" -eq 0 ]]; then
+    if [[ -n "${VARIANTS}" ]]; then
+        if [[ "${TIGHT_MATCH}" -eq 1 || "${PROBE_PT_GT15}" -eq 0 || "${BX_ZERO}" -eq 1 || "${NO_BLACKLIST}" -eq 1 || "${NO_RUN_BLACKLIST}" -eq 1 ]]; then
+            die "--variants cannot be combined with the individual selection flags"
+        fi
+        # Job outputs name the first variant; the Condor payload derives the others from it.
+        local first_suffix=""
+        first_suffix="$(variant_suffix "${VARIANTS%%,*}")"
+        if [[ "${OUTPUT_BASE_SET}" -eq 0 ]]; then
+            OUTPUT_BASE="/eos/user/j/joshin/rpc/tnp-hist${first_suffix}"
+        fi
+    elif [[ "${OUTPUT_BASE_SET}" -eq 0 ]]; then
         OUTPUT_BASE="/eos/user/j/joshin/rpc/tnp-hist$(histogram_mode_suffix "${TIGHT_MATCH}" "${PROBE_PT_GT15}" "${BX_ZERO}" "${NO_BLACKLIST}" "${NO_RUN_BLACKLIST}")"
     fi
 
@@ -203,6 +247,23 @@ configure_blacklist() {
 }
 
 validate_config() {
+    case "${PROFILE}" in
+        minimal|standard|full) ;;
+        *) die "--profile must be minimal, standard, or full: ${PROFILE}" ;;
+    esac
+    hadd_compression_setting "${COMPRESSION}" >/dev/null
+    local policies=()
+    local policy=""
+    if [[ "${MATCH_POLICIES}" != "none" ]]; then
+        IFS=',' read -r -a policies <<< "${MATCH_POLICIES}"
+        [[ ${#policies[@]} -gt 0 ]] || die "--match-policies must not be empty"
+        for policy in "${policies[@]}"; do
+            case "${policy}" in
+                default|tight|bx-zero|tight+bx-zero|all) ;;
+                *) die "--match-policies entries must be default, tight, bx-zero, tight+bx-zero, or all: ${policy}" ;;
+            esac
+        done
+    fi
     is_positive_int "${FILES_PER_JOB}" || die "--files-per-job must be a positive integer: ${FILES_PER_JOB}"
     require_command jq
     require_command python3
@@ -292,6 +353,10 @@ submit_items_for_dataset() {
         RUN_BLACKLIST_MODE="${RUN_BLACKLIST_MODE}" \
         PROBE_PT_GT15="${PROBE_PT_GT15}" \
         BX_ZERO="${BX_ZERO}" \
+        PROFILE="${PROFILE}" \
+        COMPRESSION="${COMPRESSION}" \
+        MATCH_POLICIES="${MATCH_POLICIES}" \
+        VARIANTS="${VARIANTS}" \
         "${SUB_FILE}" 2>&1)" || {
         printf '%s\n' "${submit_output}" >&2
         exit 1
@@ -319,6 +384,14 @@ print_dataset_header() {
     echo "          match mode : ${MATCH_MODE}"
     echo "          probe pT   : $([[ "${PROBE_PT_GT15}" -eq 1 ]] && echo '> 15 GeV' || echo 'all')"
     echo "          RPC BX     : $([[ "${BX_ZERO}" -eq 1 ]] && echo '0 (numerator only)' || echo 'all')"
+    echo "          profile    : ${PROFILE}"
+    echo "          compression: ${COMPRESSION}"
+    if [[ "${MATCH_POLICIES}" != "none" ]]; then
+        echo "          match pol. : ${MATCH_POLICIES}"
+    fi
+    if [[ -n "${VARIANTS}" ]]; then
+        echo "          variants   : ${VARIANTS}"
+    fi
     if [[ "${MODE}" == "all" ]]; then
         echo "          files/job  : ${FILES_PER_JOB}"
     else
@@ -358,6 +431,10 @@ main() {
     TIGHT_MATCH=0
     PROBE_PT_GT15=1
     BX_ZERO=0
+    VARIANTS=""
+    PROFILE="full"
+    COMPRESSION="zlib:1"
+    MATCH_POLICIES="none"
     FILES_PER_JOB=100
     DATASETS=()
 
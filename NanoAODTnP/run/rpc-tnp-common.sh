@@ -54,6 +54,24 @@ is_non_negative_int() {
     [[ "$1" =~ ^[0-9]+$ ]]
 }
 
+# CODEC:LEVEL (zlib, lzma, lz4 or zstd; level 1-9) -> ROOT compression setting for hadd -fk.
+hadd_compression_setting() {
+    local spec="$1"
+    local codec="${spec%%:*}"
+    local level="${spec#*:}"
+    local algorithm=""
+
+    case "${codec}" in
+        zlib) algorithm=1 ;;
+        lzma) algorithm=2 ;;
+        lz4) algorithm=4 ;;
+        zstd) algorithm=5 ;;
+        *) die "unknown compression codec: ${spec}" ;;
+    esac
+    [[ "${spec}" == *:* && "${level}" =~ ^[1-9]$ ]] || die "compression must be CODEC:LEVEL with LEVEL 1-9: ${spec}"
+    printf '%s\n' "$((algorithm * 100 + level))"
+}
+
 canonical_eos_path() {
     local path="$1"
     if [[ "${path}" =~ ^/eos/home-([^/]+)/([^/]+)(/.*)?$ ]]; then
@@ -80,6 +98,48 @@ histogram_mode_suffix() {
     printf '%s\n' "${suffix}"
 }
 
+variant_suffix() {
+    local spec="$1"
+    local tight_match=0
+    local probe_pt_gt15=1
+    local bx_zero=0
+    local no_blacklist=0
+    local no_run_blacklist=0
+    local tokens=()
+    local token=""
+
+    IFS='+' read -r -a tokens <<< "${spec}"
+    [[ ${#tokens[@]} -gt 0 ]] || die "empty histogram variant"
+    for token in "${tokens[@]}"; do
+        case "${token}" in
+            default) ;;
+            tight) tight_match=1 ;;
+            all-probe-pt) probe_pt_gt15=0 ;;
+            bx-zero) bx_zero=1 ;;
+            wo-blacklist) no_blacklist=1 ;;
+            wo-run-blacklist) no_run_blacklist=1 ;;
+            *) die "unknown histogram variant token: ${token}" ;;
+        esac
+    done
+    histogram_mode_suffix "${tight_match}" "${probe_pt_gt15}" "${bx_zero}" "${no_blacklist}" "${no_run_blacklist}"
+}
+
+# OUTPUT_BASE/PD/DATASET/FILE written for FROM_SUFFIX -> the same file under OUTPUT_BASE with TO_SUFFIX.
+variant_output_path() {
+    local output_path="$1"
+    local from_suffix="$2"
+    local to_suffix="$3"
+    local dataset_dir=""
+    local pd_dir=""
+    local base_dir=""
+
+    dataset_dir="$(dirname "${output_path}")"
+    pd_dir="$(dirname "${dataset_dir}")"
+    base_dir="$(dirname "${pd_dir}")"
+    [[ "${base_dir}" == *"${from_suffix}" ]] || die "output base does not end in ${from_suffix}: ${base_dir}"
+    printf '%s\n' "${base_dir%"${from_suffix}"}${to_suffix}/$(basename "${pd_dir}")/$(basename "${dataset_dir}")/$(basename "${output_path}")"
+}
+
 annual_recorded_lumi() {
     local run_meta_path="$1"
     local year="$2"
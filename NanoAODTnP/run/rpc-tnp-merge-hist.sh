@@ -6,6 +6,7 @@ SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
 # shellcheck source=run/rpc-tnp-common.sh
 source "${SCRIPT_DIR}/rpc-tnp-common.sh"
 PACKAGE_DIR="$(cd "${SCRIPT_DIR}/.." && pwd)"
+MERGE_SCRIPT="${PACKAGE_DIR}/scripts/rpc-tnp-merge.py"
 
 usage() {
     cat >&2 <<EOF
@@ -21,7 +22,13 @@ Options:
   --tight-match       Use tight-match input/output defaults
   --all-probe-pt      Use full-probe-pT histogram input/output defaults
   --bx-zero           Use BX == 0 numerator histogram input/output defaults
-  -j, --jobs JOBS     Number of hadd worker processes; 0 disables multiprocessing (default: ${HADD_JOBS})
+  --incremental       Add only new shards to the existing merged outputs; datasets with
+                      removed or changed shards are re-merged, unchanged ones are skipped
+  --hadd              Merge with ROOT hadd instead of scripts/rpc-tnp-merge.py; cannot be combined
+                      with --incremental
+  -j, --jobs JOBS     Number of merge worker processes; 0 disables multiprocessing (default: ${MERGE_JOBS})
+  --compression SPEC  Merged output compression as CODEC:LEVEL, CODEC one of zlib, lzma, lz4, zstd
+                      (default: ${COMPRESSION})
   -h, --help          Show this help
 EOF
 }
@@ -81,9 +88,22 @@ parse_args() {
                 BX_ZERO=1
                 shift
                 ;;
+            --incremental)
+                INCREMENTAL=1
+                shift
+                ;;
+            --hadd)
+                USE_HADD=1
+                shift
+                ;;
             -j|--jobs)
                 [[ $# -ge 2 ]] || usage_error
-                HADD_JOBS="$2"
+                MERGE_JOBS="$2"
+                shift 2
+                ;;
+            --compression)
+                [[ $# -ge 2 ]] || usage_error
+                COMPRESSION="$2"
                 shift 2
                 ;;
             -h|--help)
@@ -112,13 +132,19 @@ apply_defaults() {
 }
 
 validate_config() {
-    is_non_negative_int "${HADD_JOBS}" || die "HADD_JOBS must be a non-negative integer: ${HADD_JOBS}"
-    require_command hadd
+    is_non_negative_int "${MERGE_JOBS}" || die "MERGE_JOBS must be a non-negative integer: ${MERGE_JOBS}"
+    HADD_COMPRESSION="$(hadd_compression_setting "${COMPRESSION}")"
+    if [[ "${USE_HADD}" -eq 1 ]]; then
+        [[ "${INCREMENTAL}" -eq 0 ]] || die "--incremental needs the merge manifest written by rpc-tnp-merge.py; drop --hadd"
+        require_command hadd
+        require_command rootls
+    fi
     require_command jq
-    require_command rootls
+    require_command python3
     require_command xrdcp
     require_command xrdfs
     require_file "${DATASET_CONFIG}"
+    require_file "${MERGE_SCRIPT}"
 }
 
 load_datasets() {
@@ -203,42 +229,61 @@ run_hadd_logged_once() {
     validate_merged_root "${tmp_output}" "${reference}"
 }
 
-merge_root_files() {
+hadd_root_files() {
     local output="$1"
-    shift
-    [[ $# -gt 0 ]] || die "no input files for merge output: ${output}"
-
-    mkdir -p "$(dirname "${output}")"
+    local input_list="$2"
+    local reference="$3"
     local tmp_output="${output%.root}.tmp.root"
-    local input_list="${output%.root}.inputs.txt"
     local log_file="${output%.root}.hadd.log"
-    rm -f -- "${tmp_output}" "${input_list}" "${log_file}"
-    printf '%s\n' "$@" > "${input_list}"
+    rm -f -- "${tmp_output}" "${log_file}"
 
-    local command=(hadd -T -fk101 -v 0)
-    if [[ "${HADD_JOBS}" -gt 0 ]]; then
-        command+=(-j "${HADD_JOBS}" -d "$(dirname "${tmp_output}")")
+    local command=(hadd "-fk${HADD_COMPRESSION}" -v 0)
+    if [[ "${MERGE_JOBS}" -gt 0 ]]; then
+        command+=(-j "${MERGE_JOBS}" -d "$(dirname "${tmp_output}")")
     fi
     command+=("${tmp_output}" "@${input_list}")
 
-    local start_seconds=${SECONDS}
-    if [[ "${HADD_JOBS}" -gt 0 ]]; then
+    if [[ "${MERGE_JOBS}" -gt 0 ]]; then
         local status=0
-        run_hadd_logged_once "${tmp_output}" "${log_file}" "$1" "${command[@]}" || status=$?
+        run_hadd_logged_once "${tmp_output}" "${log_file}" "${reference}" "${command[@]}" || status=$?
         if [[ "${status}" -eq 42 ]]; then
             echo "  [warn] parallel hadd reported TFileMerger merge errors; retrying serial hadd" >&2
-            local serial_command=(hadd -T -fk101 -v 0 "${tmp_output}" "@${input_list}")
-            retry_command "serial hadd $(basename "${output}")" run_hadd_once "${tmp_output}" "$1" "${serial_command[@]}"
+            local serial_command=(hadd "-fk${HADD_COMPRESSION}" -v 0 "${tmp_output}" "@${input_list}")
+            retry_command "serial hadd $(basename "${output}")" run_hadd_once "${tmp_output}" "${reference}" "${serial_command[@]}"
         elif [[ "${status}" -ne 0 ]]; then
             echo "  [warn] parallel hadd failed or produced an invalid ROOT file (exit ${status}); retrying serial hadd" >&2
-            local serial_command=(hadd -T -fk101 -v 0 "${tmp_output}" "@${input_list}")
-            retry_command "serial hadd $(basename "${output}")" run_hadd_once "${tmp_output}" "$1" "${serial_command[@]}"
+            local serial_command=(hadd "-fk${HADD_COMPRESSION}" -v 0 "${tmp_output}" "@${input_list}")
+            retry_command "serial hadd $(basename "${output}")" run_hadd_once "${tmp_output}" "${reference}" "${serial_command[@]}"
         fi
     else
-        retry_command "hadd $(basename "${output}")" run_hadd_once "${tmp_output}" "$1" "${command[@]}"
+        retry_command "hadd $(basename "${output}")" run_hadd_once "${tmp_output}" "${reference}" "${command[@]}"
     fi
     mv -f -- "${tmp_output}" "${output}"
-    rm -f -- "${input_list}" "${log_file}"
+    rm -f -- "${log_file}"
+}
+
+merge_root_files() {
+    local output="$1"
+    shift
+    [[ $# -gt 0 ]] || die "no input files for merge output: ${output}"
+
+    mkdir -p "$(dirname "${output}")"
+    local input_list="${output%.root}.inputs.txt"
+    rm -f -- "${input_list}"
+    printf '%s\n' "$@" > "${input_list}"
+
+    local start_seconds=${SECONDS}
+    if [[ "${USE_HADD}" -eq 1 ]]; then
+        hadd_root_files "${output}" "${input_list}" "$1"
+    else
+        # rpc-tnp-merge.py checks every shard against the first and renames the output into place only on success.
+        local merge_args=(-o "${output}" -j "$((MERGE_JOBS > 0 ? MERGE_JOBS : 1))" --compression "${COMPRESSION}")
+        if [[ "${INCREMENTAL}" -eq 1 ]]; then
+            merge_args+=(--incremental)
+        fi
+        retry_command "merge $(basename "${output}")" python3 "${MERGE_SCRIPT}" "${merge_args[@]}" "@${input_list}"
+    fi
+    rm -f -- "${input_list}"
     echo "  [merge-done] $(basename "${output}") elapsed=$((SECONDS - start_seconds))s size=$(du -h "${output}" | cut -f1)"
 }
 
@@ -253,6 +298,12 @@ copy_merged_once() {
     xrdcp -f "${local_file}" "$(to_xrootd_url "${eos_file}")"
 }
 
+fetch_merged_once() {
+    local eos_file="$1"
+    local local_file="$2"
+    xrdcp -f "$(to_xrootd_url "${eos_file}")" "${local_file}"
+}
+
 copy_merged_file() {
     local local_file="$1"
     local pd="$2"
@@ -280,7 +331,19 @@ merge_dataset() {
     reset_work_dir "${work_dir}"
     collect_input_files "${dataset_dir}"
     echo "  [merge-dataset] ${dataset_name} (${#INFILES[@]} files from ${CHUNK_COUNT} chunks)"
+
+    # The merged output lists its shards, so an incremental merge starts from the published file.
+    local eos_file="${OUTPUT_BASE}/${pd}/${dataset_name}.root"
+    local previous_checksum=""
+    if [[ "${INCREMENTAL}" -eq 1 && -f "${eos_file}" ]]; then
+        retry_command "fetch merged output" fetch_merged_once "${eos_file}" "${final_local}"
+        previous_checksum="$(cksum < "${final_local}")"
+    fi
     merge_root_files "${final_local}" "${INFILES[@]}"
+    if [[ -n "${previous_checksum}" && "$(cksum < "${final_local}")" == "${previous_checksum}" ]]; then
+        echo "  [skip] ${eos_file} is up to date"
+        return
+    fi
     copy_merged_file "${final_local}" "${pd}" "${dataset_name}"
 }
 
@@ -288,7 +351,10 @@ main() {
     INPUT_BASE="/eos/user/j/joshin/rpc/tnp-hist"
     OUTPUT_BASE="/eos/user/j/joshin/rpc/tnp-hist-merged"
     TMP_BASE="${TMPDIR:-/tmp}/${USER}/rpc-tnp-merge-hist"
-    HADD_JOBS=2
+    MERGE_JOBS=2
+    INCREMENTAL=0
+    USE_HADD=0
+    COMPRESSION="zlib:1"
     INPUT_BASE_SET=0
     OUTPUT_BASE_SET=0
     NO_BLACKLIST=0
@@ -304,7 +370,7 @@ main() {
     load_datasets
 
     mkdir -p "${TMP_BASE}"
-    echo "[config] year=${YEAR} datasets=${#DATASETS[@]} tight_match=${TIGHT_MATCH} probe_pt_gt15=${PROBE_PT_GT15} bx_zero=${BX_ZERO} no_blacklist=${NO_BLACKLIST} no_run_blacklist=${NO_RUN_BLACKLIST} input_base=${INPUT_BASE} output_base=${OUTPUT_BASE} hadd_jobs=${HADD_JOBS} tmp_base=${TMP_BASE}"
+    echo "[config] year=${YEAR} datasets=${#DATASETS[@]} tight_match=${TIGHT_MATCH} probe_pt_gt15=${PROBE_PT_GT15} bx_zero=${BX_ZERO} no_blacklist=${NO_BLACKLIST} no_run_blacklist=${NO_RUN_BLACKLIST} input_base=${INPUT_BASE} output_base=${OUTPUT_BASE} merge_jobs=${MERGE_JOBS} hadd=${USE_HADD} incremental=${INCREMENTAL} compression=${COMPRESSION} tmp_base=${TMP_BASE}"
     for dataset in "${DATASETS[@]}"; do
         merge_dataset "${dataset}"
     done
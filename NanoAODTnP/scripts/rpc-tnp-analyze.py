@@ -4,20 +4,50 @@ from __future__ import annotations
 import argparse
 from pathlib import Path
 
-from RPCDPGAnalysis.NanoAODTnP.Analyze import analyze  # type: ignore
+from RPCDPGAnalysis.NanoAODTnP.Analyze import analyze, analyze_skim  # type: ignore
+from RPCDPGAnalysis.NanoAODTnP.HistBuild import (  # type: ignore
+    DEFAULT_HISTOGRAM_COMPRESSION,
+    FULL_PROFILE,
+    HISTOGRAM_PROFILES,
+    MATCH_POLICIES,
+    HistogramVariant,
+    MatchPolicy,
+    parse_compression,
+)
 
 PACKAGE_DIR = Path(__file__).resolve().parents[1]
 DEFAULT_RUN_BLACKLIST_PATH = PACKAGE_DIR / "data" / "blacklist" / "run" / "blackList.txt"
 
 
+def parse_step_size(value: str) -> int | str:
+    value = value.strip()
+    return int(value) if value.isdigit() else value
+
+
+def parse_variant(value: str) -> HistogramVariant:
+    try:
+        return HistogramVariant.parse(value)
+    except ValueError as error:
+        raise argparse.ArgumentTypeError(str(error)) from error
+
+
+def parse_match_policies(value: str) -> list[MatchPolicy]:
+    if value.strip() == "all":
+        return list(MATCH_POLICIES)
+    try:
+        return [MatchPolicy.parse(value)]
+    except ValueError as error:
+        raise argparse.ArgumentTypeError(str(error)) from error
+
+
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(
         description="Analyze one RPC TnP NanoAOD file and write a histogram ROOT shard."
     )
     parser.add_argument("-i", "--input", dest="input_path", required=True, type=Path,
-                        help="Input NanoAOD ROOT file.")
-    parser.add_argument("-c", "--cert", dest="cert_path", required=True, type=Path,
-                        help="Certification JSON file.")
+                        help="Input NanoAOD ROOT file, or a skim file with --from-skim.")
+    parser.add_argument("-c", "--cert", dest="cert_path", type=Path,
+                        help="Certification JSON file. Required unless --from-skim is set.")
     parser.add_argument("-o", "--output", dest="output_path", required=True, type=Path,
                         help="Histogram ROOT output path.")
     parser.add_argument("--roll-blacklist-path", type=Path,
@@ -34,32 +64,82 @@ def parse_args() -> argparse.Namespace:
                         help="Disable the default pT > 15 GeV probe selection.")
     parser.add_argument("--bx-zero", action="store_true",
                         help="Require BX == 0 for matched RPC hits; fiducial efficiency denominators are unchanged.")
+    parser.add_argument("--step-size", type=parse_step_size,
+                        help="Stream the input in chunks of N entries or a byte size such as '100 MB'. Default: read the whole file.")
+    parser.add_argument("--skim", dest="skim_path", type=Path,
+                        help="Also write the certified pair and RPC-crossing columns to this skim ROOT file.")
+    parser.add_argument("--from-skim", action="store_true",
+                        help="Treat --input as a skim written with --skim and rebuild the histogram shard from it.")
+    parser.add_argument("--variant", dest="variants", action="append", type=parse_variant,
+                        help="Write one shard per variant from a single read, e.g. default, tight, tight+bx-zero. "
+                             "Tokens: tight, all-probe-pt, bx-zero, wo-blacklist, wo-run-blacklist. Each shard "
+                             "is written next to --output with the campaign suffix, e.g. output-tight.root. "
+                             "Repeatable; replaces the individual selection flags.")
+    parser.add_argument("--threads", type=int, default=1,
+                        help="Fill histograms on N threads; the output is bit-identical to one thread. Default: 1")
+    parser.add_argument("--profile", choices=tuple(HISTOGRAM_PROFILES), default=FULL_PROFILE,
+                        help="Histogram set to write: minimal (roll and run-station counts), standard (everything "
+                             f"except the 3D kinematic families), or full. Default: {FULL_PROFILE}")
+    parser.add_argument("--integer-counts", action="store_true",
+                        help="Store count histograms as TH1I/TH2I/TH3I instead of TH*D; profiles keep weighted storage. "
+                             "Shards merged together must all use the same storage.")
+    parser.add_argument("--compression", type=parse_compression, default=DEFAULT_HISTOGRAM_COMPRESSION,
+                        help="Shard compression as CODEC:LEVEL with CODEC zlib, lzma, lz4 or zstd and LEVEL 1-9. "
+                             f"Default: {DEFAULT_HISTOGRAM_COMPRESSION}")
+    parser.add_argument("--match-policy", dest="match_policies", action="append", type=parse_match_policies,
+                        help="Also fill the matched-selection histograms under this matching definition in the same "
+                             "shard: default, tight, bx-zero, tight+bx-zero, or all. Plot them with "
+                             "rpc-tnp-plot.py --match-policy. Repeatable.")
     return parser.parse_args()
 
 
 def main() -> None:
     args = parse_args()
     if not args.input_path.is_file():
-        raise FileNotFoundError(f"Input NanoAOD file does not exist: {args.input_path}")
-    if not args.cert_path.is_file():
+        raise FileNotFoundError(f"Input file does not exist: {args.input_path}")
+    if not args.from_skim and args.cert_path is None:
+        raise ValueError("--cert is required unless --from-skim is set")
+    if not args.from_skim and not args.cert_path.is_file():
         raise FileNotFoundError(f"Certification JSON does not exist: {args.cert_path}")
-    if not args.no_roll_blacklist and args.roll_blacklist_path is None:
+    if args.from_skim and args.skim_path is not None:
+        raise ValueError("--skim cannot be combined with --from-skim")
+    if args.threads < 1:
+        raise ValueError(f"--threads must be at least 1: {args.threads}")
+    if args.variants and (args.tight_match or not args.probe_pt_gt15 or args.bx_zero or args.no_roll_blacklist or args.no_run_blacklist):
+        raise ValueError("--variant cannot be combined with the individual selection flags")
+    apply_roll_blacklist = any(variant.apply_roll_blacklist for variant in args.variants) if args.variants else not args.no_roll_blacklist
+    apply_run_blacklist = any(variant.apply_run_blacklist for variant in args.variants) if args.variants else not args.no_run_blacklist
+    if apply_roll_blacklist and args.roll_blacklist_path is None:
         raise ValueError("--roll-blacklist-path is required unless --no-roll-blacklist is set")
-    if not args.no_roll_blacklist and not args.roll_blacklist_path.is_file():
+    if apply_roll_blacklist and not args.roll_blacklist_path.is_file():
         raise FileNotFoundError(f"Roll blacklist does not exist: {args.roll_blacklist_path}")
-    if not args.no_run_blacklist and not args.run_blacklist_path.is_file():
+    if apply_run_blacklist and not args.run_blacklist_path.is_file():
         raise FileNotFoundError(f"Run blacklist does not exist: {args.run_blacklist_path}")
+    options = {
+        "roll_blacklist_path": args.roll_blacklist_path,
+        "run_blacklist_path": args.run_blacklist_path,
+        "apply_roll_blacklist": not args.no_roll_blacklist,
+        "apply_run_blacklist": not args.no_run_blacklist,
+        "tight_match": args.tight_match,
+        "probe_pt_gt15": args.probe_pt_gt15,
+        "bx_zero": args.bx_zero,
+        "variants": args.variants,
+        "threads": args.threads,
+        "profile": args.profile,
+        "integer_counts": args.integer_counts,
+        "compression": args.compression,
+        "match_policies": tuple(dict.fromkeys(policy for group in args.match_policies or () for policy in group)),
+    }
+    if args.from_skim:
+        analyze_skim(skim_path=args.input_path, output_path=args.output_path, **options)
+        return
     analyze(
         input_path=args.input_path,
         cert_path=args.cert_path,
         output_path=args.output_path,
-        roll_blacklist_path=args.roll_blacklist_path,
-        run_blacklist_path=args.run_blacklist_path,
-        apply_roll_blacklist=not args.no_roll_blacklist,
-        apply_run_blacklist=not args.no_run_blacklist,
-        tight_match=args.tight_match,
-        probe_pt_gt15=args.probe_pt_gt15,
-        bx_zero=args.bx_zero,
+        step_size=args.step_size,
+        skim_path=args.skim_path,
+        **options,
     )
 
 
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""Rewrite one histogram shard with each compression codec and time its write and HistIO load."""
+from __future__ import annotations
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import uproot
+
+from RPCDPGAnalysis.NanoAODTnP.HistBuild import DEFAULT_HISTOGRAM_COMPRESSION, parse_compression  # type: ignore
+from RPCDPGAnalysis.NanoAODTnP.HistFill import is_sparse  # type: ignore
+from RPCDPGAnalysis.NanoAODTnP.HistIO import _load_paths  # type: ignore
+
+DEFAULT_CODECS = (DEFAULT_HISTOGRAM_COMPRESSION, "zlib:4", "lz4:1", "lz4:4", "zstd:1", "zstd:5", "lzma:1")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-i", "--input", dest="input_path", required=True, type=Path,
+                        help="Representative histogram shard written by rpc-tnp-analyze.py.")
+    parser.add_argument("--codec", dest="codecs", action="append",
+                        help=f"CODEC:LEVEL to compare; repeatable. Default: {', '.join(DEFAULT_CODECS)}")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="Timed repetitions per codec; the fastest is reported. Default: 3")
+    parser.add_argument("--bandwidth", type=float, default=100.0,
+                        help="Transfer rate in MB/s used to estimate the EOS copy time. Default: 100")
+    parser.add_argument("--work-dir", type=Path,
+                        help="Directory for the rewritten shards. Default: a temporary directory.")
+    return parser.parse_args()
+
+
+def read_shard(path: Path) -> dict[str, object]:
+    """Histogram models, and sparse trees as (title, columns), keyed by name."""
+    objects: dict[str, object] = {}
+    with uproot.open(path) as root_file:
+        for name in root_file.keys(cycle=False):
+            source = root_file[name]
+            objects[name] = (source.title, source.arrays(library="np")) if is_sparse(source) else source
+    return objects
+
+
+def write_shard(path: Path, objects: dict[str, object], compression) -> None:
+    with uproot.recreate(path, compression=compression) as output:
+        for name, source in objects.items():
+            if isinstance(source, tuple):
+                title, columns = source
+                output.mktree(name, {key: value.dtype for key, value in columns.items()}, title=title)
+                if len(columns["value"]):
+                    output[name].extend(columns)
+            else:
+                output[name] = source
+
+
+def best_time(function, repeat: int, *args) -> float:
+    best = np.inf
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    args = parse_args()
+    codecs = args.codecs or list(DEFAULT_CODECS)
+    settings = {codec: parse_compression(codec) for codec in codecs}
+    objects = read_shard(args.input_path)
+    print(f"[info] input={args.input_path} objects={len(objects)} size={args.input_path.stat().st_size / 1e6:.2f} MB", flush=True)
+
+    with tempfile.TemporaryDirectory(dir=args.work_dir) as work_dir:
+        print(f"{'codec':>8} {'size MB':>9} {'write s':>8} {'transfer s':>10} {'load s':>7} {'total s':>8}", flush=True)
+        for codec, compression in settings.items():
+            path = Path(work_dir) / f"shard-{codec.replace(':', '-')}.root"
+            write_seconds = best_time(write_shard, args.repeat, path, objects, compression)
+            # Bypass the lru_cache so every repetition reads and decompresses the file.
+            load_seconds = best_time(_load_paths.__wrapped__, args.repeat, (str(path),))
+            size = path.stat().st_size / 1e6
+            transfer_seconds = size / args.bandwidth
+            total = write_seconds + transfer_seconds + load_seconds
+            print(
+                f"{codec:>8} {size:9.3f} {write_seconds:8.3f} {transfer_seconds:10.3f} {load_seconds:7.3f} {total:8.3f}",
+                flush=True,
+            )
+
+
+if __name__ == "__main__":
+    main()
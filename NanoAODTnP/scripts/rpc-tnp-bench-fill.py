@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""Time one shard's histogram fill: per-histogram boost-histogram fills versus the bin-index engine."""
+from __future__ import annotations
+
+import argparse
+import importlib.util
+import time
+from pathlib import Path
+
+import hist
+import numpy as np
+
+from RPCDPGAnalysis.NanoAODTnP.HistFill import BinnedHistogram, FillPool, KeyAxis, key_axis  # type: ignore
+from RPCDPGAnalysis.NanoAODTnP.HistBuild import (  # type: ignore
+    CLS_PROFILE_BRANCHES,
+    CLS_ROLL_PROFILE,
+    CLS_RUN_ROLL_PROFILE,
+    CLS_RUN_STATION_PROFILE,
+    COUNT_Q_OVER_P_EDGES,
+    FIDUCIAL_SELECTION,
+    KINEMATIC_2D_AXES,
+    MATCHED_SELECTION,
+    PAIR_MASS_EDGES,
+    PAIR_MASS_HISTOGRAM,
+    PAIR_MUON_PHI_EDGES,
+    PAIR_MUON_PT_EDGES,
+    PAIR_Q_OVER_P_HISTOGRAM,
+    PROBE_ABS_ETA_MAX,
+    PROBE_ETA_EDGES,
+    PROBE_PT_THRESHOLD_GEV,
+    RMS_PROFILE_BRANCHES,
+    RPC_AXIS_EDGES,
+    RPC_SELECTION_BRANCHES,
+    STATION_NAMES,
+    TAG_ETA_EDGES,
+    HistogramVariant,
+    build_variant_histograms,
+    cls_profile_2d_station_name,
+    cls_profile_station_name,
+    count_2d_station_name,
+    count_roll_name,
+    count_run_roll_name,
+    count_run_station_name,
+    count_station_name,
+    pair_eta_phi_name,
+    pair_kinematics_name,
+    profile_1d_station_name,
+    roll_indices,
+    roll_lookup,
+    roll_names,
+    run_categories,
+)
+from RPCDPGAnalysis.NanoAODTnP.SyntheticTrees import synthetic_trees  # type: ignore
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pairs", type=int, default=1_000_000,
+                        help="Number of synthetic tag-probe pairs. Default: 1000000")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="Timed repetitions per fill path; the fastest is reported. Default: 3")
+    parser.add_argument("--threads", type=int, default=1,
+                        help="Also time the engine on a pool of N threads when N > 1. Default: 1")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--baseline", type=Path,
+                        help="NanoAODTnP directory of another checkout, e.g. the baseline commit from "
+                             "git worktree add; its build_histograms is timed on the same trees.")
+    return parser.parse_args()
+
+
+def boost_fill(name: str, axes: list[tuple[str, np.ndarray, np.ndarray]], mask: np.ndarray, weights: np.ndarray | None = None) -> hist.Hist:
+    """The former per-histogram fill: widen, mask non-finite values, let boost-histogram locate bins."""
+    values = [np.asarray(value, dtype=np.float64) for _, _, value in axes]
+    selected = np.asarray(mask, dtype=bool)
+    for value in values:
+        selected = selected & np.isfinite(value)
+    storage = hist.storage.Double()
+    if weights is not None:
+        weights = np.asarray(weights, dtype=np.float64)
+        selected &= np.isfinite(weights)
+        storage = hist.storage.Weight()
+    histogram = hist.Hist(
+        *(hist.axis.Variable(edges, name=axis_name, label=axis_name) for axis_name, edges, _ in axes),
+        storage=storage,
+        name=name,
+    )
+    histogram.fill(*(value[selected] for value in values), weight=None if weights is None else weights[selected])
+    return histogram
+
+
+def boost_histograms(pair_tree: dict[str, np.ndarray], rpc_tree: dict[str, np.ndarray]) -> dict[str, hist.Hist]:
+    """Default selection without blacklists, reimplementing the former per-histogram boost-histogram fills."""
+    output: dict[str, hist.Hist] = {}
+    lookup = roll_lookup()
+    roll_index = roll_indices(rpc_tree["geometry_key"])
+    irpc = lookup.irpc[roll_index]
+    pair_index = rpc_tree["pair_index"]
+    pair_mask = np.zeros(len(pair_tree["run"]), dtype=bool)
+    pair_mask[pair_index[~irpc]] = True
+    pair_mask &= (np.abs(pair_tree["probe_eta"]) < PROBE_ABS_ETA_MAX) & (pair_tree["probe_pt"] > PROBE_PT_THRESHOLD_GEV)
+    output[PAIR_MASS_HISTOGRAM] = boost_fill(PAIR_MASS_HISTOGRAM, [("pair_mass", PAIR_MASS_EDGES, pair_tree["pair_mass"])], pair_mask)
+    output[PAIR_Q_OVER_P_HISTOGRAM] = boost_fill(
+        PAIR_Q_OVER_P_HISTOGRAM, [("probe_q_over_p", COUNT_Q_OVER_P_EDGES, pair_tree["probe_q_over_p"])], pair_mask,
+    )
+    for prefix, eta_edges in (("probe", PROBE_ETA_EDGES), ("tag", TAG_ETA_EDGES)):
+        eta = (f"{prefix}_eta", eta_edges, pair_tree[f"{prefix}_eta"])
+        name = pair_kinematics_name(prefix)
+        output[name] = boost_fill(name, [eta, (f"{prefix}_pt", PAIR_MUON_PT_EDGES, pair_tree[f"{prefix}_pt"])], pair_mask)
+        name = pair_eta_phi_name(prefix)
+        output[name] = boost_fill(name, [eta, (f"{prefix}_phi", PAIR_MUON_PHI_EDGES, pair_tree[f"{prefix}_phi"])], pair_mask)
+
+    runs = run_categories()
+    run_coordinate = {run: index + 0.5 for index, run in enumerate(runs)}
+    roll = ("roll_name", np.arange(len(lookup.station) + 1, dtype=np.float64), roll_index + 0.5)
+    station = ("station", np.arange(len(STATION_NAMES) + 1, dtype=np.float64), lookup.station[roll_index] + 0.5)
+    run_values = np.asarray([run_coordinate.get(run, np.nan) for run in pair_tree["run"]], dtype=np.float64)
+    run = ("run", np.arange(len(runs) + 1, dtype=np.float64), run_values[pair_index])
+
+    accepted = ~irpc & (np.abs(rpc_tree["probe_eta"]) < PROBE_ABS_ETA_MAX) & (rpc_tree["probe_pt"] > PROBE_PT_THRESHOLD_GEV)
+    fiducial = accepted & rpc_tree["is_fiducial"]
+    masks = {FIDUCIAL_SELECTION: fiducial, MATCHED_SELECTION: fiducial & rpc_tree["is_matched"]}
+    for selection, mask in masks.items():
+        for branch in RPC_SELECTION_BRANCHES[selection]:
+            name = count_station_name(selection, branch)
+            output[name] = boost_fill(name, [(branch, RPC_AXIS_EDGES[branch], rpc_tree[branch]), station], mask)
+        output[count_roll_name(selection)] = boost_fill(count_roll_name(selection), [roll], mask)
+        output[count_run_station_name(selection)] = boost_fill(count_run_station_name(selection), [run, station], mask)
+        output[count_run_roll_name(selection)] = boost_fill(count_run_roll_name(selection), [run, roll], mask)
+        for plot_name, (x_branch, x_edges, y_branch, y_edges) in KINEMATIC_2D_AXES.items():
+            name = count_2d_station_name(selection, plot_name)
+            output[name] = boost_fill(name, [(x_branch, x_edges, rpc_tree[x_branch]), (y_branch, y_edges, rpc_tree[y_branch]), station], mask)
+
+    matched = masks[MATCHED_SELECTION]
+    cls_values = rpc_tree["cls"]
+    output[CLS_ROLL_PROFILE] = boost_fill(CLS_ROLL_PROFILE, [roll], matched, cls_values)
+    for sample, branches in RMS_PROFILE_BRANCHES.items():
+        for branch in branches:
+            name = profile_1d_station_name(sample, branch)
+            output[name] = boost_fill(name, [(branch, RPC_AXIS_EDGES[branch], rpc_tree[branch]), station], matched, rpc_tree[sample])
+    for branch in CLS_PROFILE_BRANCHES:
+        name = cls_profile_station_name(branch)
+        output[name] = boost_fill(name, [(branch, RPC_AXIS_EDGES[branch], rpc_tree[branch]), station], matched, cls_values)
+    for plot_name, (x_branch, x_edges, y_branch, y_edges) in KINEMATIC_2D_AXES.items():
+        name = cls_profile_2d_station_name(plot_name)
+        output[name] = boost_fill(name, [(x_branch, x_edges, rpc_tree[x_branch]), (y_branch, y_edges, rpc_tree[y_branch]), station], matched, cls_values)
+    output[CLS_RUN_STATION_PROFILE] = boost_fill(CLS_RUN_STATION_PROFILE, [run, station], matched, cls_values)
+    output[CLS_RUN_ROLL_PROFILE] = boost_fill(CLS_RUN_ROLL_PROFILE, [run, roll], matched, cls_values)
+    return output
+
+
+def engine_fill(pair_tree: dict[str, np.ndarray], rpc_tree: dict[str, np.ndarray], pool: FillPool) -> dict[str, BinnedHistogram]:
+    variant = HistogramVariant(apply_roll_blacklist=False, apply_run_blacklist=False)
+    return build_variant_histograms(pair_tree, rpc_tree, None, None, (variant,), pool)[variant]
+
+
+def engine_histograms(histograms: dict[str, BinnedHistogram]) -> dict[str, hist.Hist]:
+    """Put each chunk's own run axis on the full run list, as the reference fill binned it; not timed."""
+    run_axis = key_axis("run", np.asarray(run_categories(), dtype=np.uint32))
+    return {
+        name: histogram.realigned(tuple(run_axis if isinstance(axis, KeyAxis) else axis for axis in histogram.axes)).to_hist()
+        for name, histogram in histograms.items()
+    }
+
+
+def load_baseline(checkout: Path):
+    """``HistBuild`` of ``checkout``, importing the rest of the package from this one."""
+    spec = importlib.util.spec_from_file_location("baseline_HistBuild", checkout / "python" / "HistBuild.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def baseline_rpc_tree(pair_tree: dict[str, np.ndarray], rpc_tree: dict[str, np.ndarray]) -> dict[str, np.ndarray]:
+    """Add the per-crossing ``run`` and ``roll_name`` columns the former TreeBuild wrote; not timed."""
+    return {
+        **rpc_tree,
+        "run": pair_tree["run"][rpc_tree["pair_index"]],
+        "roll_name": np.asarray(roll_names(), dtype=str)[roll_indices(rpc_tree["geometry_key"])],
+    }
+
+
+def best_time(function, repeat: int, *args):
+    best = np.inf
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def check_agreement(reference: dict[str, hist.Hist], actual: dict[str, hist.Hist], label: str) -> None:
+    for name in sorted(reference):
+        expected = reference[name].view(flow=True)
+        result = actual[name].view(flow=True)
+        fields = ("value", "variance") if expected.dtype.names else (None,)
+        for field in fields:
+            lhs = expected if field is None else expected[field]
+            rhs = result if field is None else result[field]
+            if not np.allclose(lhs, rhs, rtol=1e-12, atol=0.0):
+                raise RuntimeError(f"Engine output differs from {label} for {name}")
+    print(f"[info] {len(reference)} histograms agree with {label}", flush=True)
+
+
+def main() -> None:
+    args = parse_args()
+    pair_tree, rpc_tree = synthetic_trees(args.pairs, args.seed)
+    print(f"[info] pairs={len(pair_tree['run'])} crossings={len(rpc_tree['pair_index'])}", flush=True)
+
+    boost_seconds, before = best_time(boost_histograms, args.repeat, pair_tree, rpc_tree)
+    with FillPool() as pool:
+        engine_seconds, after = best_time(engine_fill, args.repeat, pair_tree, rpc_tree, pool)
+    after = engine_histograms(after)
+    print(f"[info] boost-histogram reimplementation: {boost_seconds:.3f} s", flush=True)
+    print(f"[info] bin-index engine:                 {engine_seconds:.3f} s ({boost_seconds / engine_seconds:.1f}x)", flush=True)
+    if args.threads > 1:
+        with FillPool(args.threads) as pool:
+            threaded_seconds, threaded = best_time(engine_fill, args.repeat, pair_tree, rpc_tree, pool)
+        threaded = engine_histograms(threaded)
+        print(f"[info] engine, {args.threads} threads:              {threaded_seconds:.3f} s ({boost_seconds / threaded_seconds:.1f}x)", flush=True)
+        for name, histogram in threaded.items():
+            if not np.array_equal(histogram.view(flow=True), after[name].view(flow=True)):
+                raise RuntimeError(f"Threaded fill is not bit-identical for {name}")
+
+    if set(before) != set(after):
+        raise RuntimeError(f"Histogram sets differ: {sorted(set(before) ^ set(after))}")
+    check_agreement(before, after, "the boost-histogram reimplementation")
+
+    if args.baseline is not None:
+        baseline = load_baseline(args.baseline)
+        baseline_tree = baseline_rpc_tree(pair_tree, rpc_tree)
+        baseline_seconds, reference = best_time(
+            baseline.build_histograms, args.repeat, pair_tree, baseline_tree, None, None, False, False,
+        )
+        print(f"[info] {args.baseline} build_histograms: {baseline_seconds:.3f} s "
+              f"(engine {baseline_seconds / engine_seconds:.1f}x faster)", flush=True)
+        # The baseline writes fewer histograms; compare the ones it has.
+        missing = sorted(set(reference) - set(after))
+        if missing:
+            raise RuntimeError(f"Histograms missing from the engine output: {missing}")
+        check_agreement(reference, after, "the baseline build_histograms")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,7 +3,6 @@ from __future__ import annotations
 
 import argparse
 import csv
-from collections import defaultdict
 from datetime import datetime, timezone
 import glob
 import json
@@ -12,6 +11,8 @@ import subprocess
 import tempfile
 from typing import Iterable, Sequence
 
+from RPCDPGAnalysis.NanoAODTnP.ReadCert import load_lumi_checker  # type: ignore
+
 
 PACKAGE_DIR = Path(__file__).resolve().parents[1]
 DEFAULT_INPUT = PACKAGE_DIR / "logs/lumi"
@@ -47,27 +48,12 @@ def resolve_golden_json_files(paths: Sequence[Path | str | Sequence[Path | str]]
     return files
 
 
-def _merge_ranges(ranges: list[list[int]]) -> list[list[int]]:
-    merged: list[list[int]] = []
-    for start, end in sorted(ranges):
-        if merged and start <= merged[-1][1] + 1:
-            merged[-1][1] = max(merged[-1][1], end)
-        else:
-            merged.append([start, end])
-    return merged
-
-
 def union_golden_lumis(paths: Sequence[Path | str | Sequence[Path | str]]) -> dict[str, list[list[int]]]:
-    by_run: defaultdict[str, list[list[int]]] = defaultdict(list)
+    union = None
     for path in resolve_golden_json_files(paths):
-        with path.open() as stream:
-            payload = json.load(stream)
-        for run, ranges in payload.items():
-            by_run[str(run)].extend([[int(start), int(end)] for start, end in ranges])
-    return {
-        run: _merge_ranges(ranges)
-        for run, ranges in sorted(by_run.items(), key=lambda item: int(item[0]))
-    }
+        checker = load_lumi_checker(path)
+        union = checker if union is None else union | checker
+    return union.to_ranges()
 
 
 def _iter_brilcalc_rows(path: Path):
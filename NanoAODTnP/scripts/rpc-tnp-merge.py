@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+
+from RPCDPGAnalysis.NanoAODTnP.HistBuild import DEFAULT_HISTOGRAM_COMPRESSION, parse_compression  # type: ignore
+from RPCDPGAnalysis.NanoAODTnP.HistMerge import (  # type: ignore
+    DEFAULT_MERGE_BATCH_SIZE,
+    DEFAULT_MERGE_WORKERS,
+    merge_shards,
+)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Merge histogram shards written by rpc-tnp-analyze.py into one ROOT file.",
+        fromfile_prefix_chars="@",
+    )
+    parser.add_argument("-o", "--output", dest="output_path", required=True, type=Path,
+                        help="Merged histogram ROOT output path; written through a temporary file and renamed.")
+    parser.add_argument("input_paths", nargs="+", type=Path,
+                        help="Histogram shards. @FILE reads one path per line, like hadd.")
+    parser.add_argument("-j", "--jobs", dest="workers", type=int, default=DEFAULT_MERGE_WORKERS,
+                        help=f"Worker processes, capped at the CPU count. Default: {DEFAULT_MERGE_WORKERS}")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_MERGE_BATCH_SIZE,
+                        help=f"Consecutive shards summed per worker task. Default: {DEFAULT_MERGE_BATCH_SIZE}")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Add only the shards missing from the existing --output manifest. "
+                             "Removed or changed shards rebuild the output from all inputs.")
+    parser.add_argument("--compression", type=parse_compression, default=DEFAULT_HISTOGRAM_COMPRESSION,
+                        help=f"Output compression as CODEC:LEVEL. Default: {DEFAULT_HISTOGRAM_COMPRESSION}")
+    args = parser.parse_args()
+    if args.workers < 1:
+        parser.error(f"--jobs must be at least 1: {args.workers}")
+    if args.batch_size < 1:
+        parser.error(f"--batch-size must be at least 1: {args.batch_size}")
+    return args
+
+
+def main() -> None:
+    merge_shards(**vars(parse_args()))
+
+
+if __name__ == "__main__":
+    main()
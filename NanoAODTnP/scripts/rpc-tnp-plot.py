@@ -3,12 +3,16 @@
 from __future__ import annotations
 
 import argparse
+import os
 from pathlib import Path
 
 
 PACKAGE_DIR = Path(__file__).resolve().parents[1]
 DEFAULT_RUN_META_PATH = PACKAGE_DIR / "data/lumi/run3.csv"
 DEFAULT_GEOM_PATH = PACKAGE_DIR / "data/geometry/run3.csv"
+DEFAULT_CACHE_DIR = Path(os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache")) / "rpc-tnp-plot"
+# Plot.PLOT_FAMILIES, repeated so --help does not import the plotting stack.
+PLOT_FAMILIES = ("rpc", "efficiency", "pair", "maps", "2d")
 
 
 def add_dataset_args(parser: argparse.ArgumentParser) -> None:
@@ -29,10 +33,26 @@ def add_dataset_args(parser: argparse.ArgumentParser) -> None:
                         help="Also draw per-year roll efficiency maps.")
     parser.add_argument("--roll-maps", action="store_true",
                         help="Also draw per-year roll mean-CLS maps.")
+    parser.add_argument("--family", dest="families", action="append", choices=PLOT_FAMILIES,
+                        help="Draw only this plot family; repeatable. Without 2d the 1D plots projected from the "
+                             "kinematic 2D histograms are skipped too; maps needs --roll-maps or --efficiency-maps. "
+                             "Only the histograms the families use are decoded. Default: all")
     parser.add_argument("--no-excluded-rolls", dest="show_excluded_rolls", action="store_false", default=True,
                         help="Do not hatch yearly blacklist rolls on roll map plots.")
     parser.add_argument("--all-probe-pt", dest="probe_pt_gt15", action="store_false", default=True,
                         help="Use the full probe-pT plotting range instead of starting at 15 GeV.")
+    parser.add_argument("--match-policy",
+                        help="Load the numerators stored with rpc-tnp-analyze.py --match-policy, e.g. tight or "
+                             "tight+bx-zero. Default: the shard's own matched selection.")
+    parser.add_argument("--load-workers", type=int, default=4,
+                        help="Decode up to N input files of one year in parallel worker processes. Default: 4")
+    parser.add_argument("--cache-dir", type=Path, default=DEFAULT_CACHE_DIR,
+                        help="Keep decoded histograms here, keyed by input path, size and mtime, and memory-map "
+                             f"them on later runs. Default: {DEFAULT_CACHE_DIR}")
+    parser.add_argument("--no-cache", dest="cache_dir", action="store_const", const=None,
+                        help="Always decode the ROOT inputs.")
+    parser.add_argument("--cache-size-gb", type=float, default=10.0,
+                        help="Evict least recently used cache entries beyond this size. Default: 10")
 
 
 def parse_args() -> argparse.Namespace:
@@ -45,6 +65,12 @@ def parse_args() -> argparse.Namespace:
     args = parser.parse_args()
     if not (len(args.input_groups) == len(args.years) == len(args.lumis)):
         parser.error("--input, --year, and --lumi must be repeated the same number of times")
+    if args.load_workers < 1:
+        parser.error(f"--load-workers must be at least 1: {args.load_workers}")
+    if args.families is None:
+        args.families = PLOT_FAMILIES
+    elif "maps" in args.families and not (args.roll_maps or args.efficiency_maps):
+        parser.error("--family maps needs --roll-maps or --efficiency-maps")
     return args
 
 
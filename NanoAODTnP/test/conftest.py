@@ -0,0 +1,24 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from RPCDPGAnalysis.NanoAODTnP.HistBuild import HistogramVariant, build_variant_histograms, write_histograms  # type: ignore
+from RPCDPGAnalysis.NanoAODTnP.SyntheticTrees import synthetic_trees as make_synthetic_trees  # type: ignore
+
+
+@pytest.fixture(scope="session")
+def synthetic_trees():
+    """Pair and RPC trees shaped like the skims, as used by the fill benchmark."""
+    return make_synthetic_trees(2000, seed=1)
+
+
+@pytest.fixture(scope="session")
+def histogram_shard(tmp_path_factory, synthetic_trees) -> Path:
+    """One histogram file as written by rpc-tnp-analyze.py."""
+    variant = HistogramVariant(apply_roll_blacklist=False, apply_run_blacklist=False)
+    histograms = build_variant_histograms(*synthetic_trees, None, None, (variant,))[variant]
+    path = tmp_path_factory.mktemp("shard") / "histograms.root"
+    write_histograms(path, histograms)
+    return path
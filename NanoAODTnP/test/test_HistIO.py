@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+import numpy as np
+
+from RPCDPGAnalysis.NanoAODTnP.HistIO import RUNS, HistogramCache, LazyHistograms  # type: ignore
+from RPCDPGAnalysis.NanoAODTnP.HistBuild import (  # type: ignore
+    MATCHED_SELECTION,
+    PAIR_MASS_HISTOGRAM,
+    RUN_CATEGORY_PATH,
+    count_run_station_name,
+)
+from RPCDPGAnalysis.NanoAODTnP.Plot import plot_all  # type: ignore
+
+
+def _unwritable_cache(tmp_path) -> HistogramCache:
+    # A regular file as parent fails for root too, unlike a read-only directory.
+    blocker = tmp_path / "blocker"
+    blocker.write_text("")
+    return HistogramCache(blocker / "cache")
+
+
+def test_unwritable_cache_falls_back_to_decoding(tmp_path, histogram_shard):
+    cache = _unwritable_cache(tmp_path)
+    with LazyHistograms((str(histogram_shard),), cache=cache) as histograms:
+        assert histograms[PAIR_MASS_HISTOGRAM].values.sum() > 0
+    cache.evict()
+
+
+def test_plot_through_unwritable_cache(tmp_path, histogram_shard):
+    paths = plot_all(
+        [[histogram_shard]],
+        [2024],
+        tmp_path / "plots",
+        [1.0],
+        None,
+        RUN_CATEGORY_PATH,
+        load_workers=1,
+        cache_dir=_unwritable_cache(tmp_path).directory,
+        families=("pair",),
+    )
+    assert paths and all(path.exists() for path in paths)
+
+
+def test_run_axes_follow_the_given_run_list(tmp_path, histogram_shard):
+    name = count_run_station_name(MATCHED_SELECTION)
+    with LazyHistograms((str(histogram_shard),)) as histograms:
+        reference = histograms[name].values
+    # Every other listed run, then one the package run list lacks.
+    runs = np.append(RUNS[::2], RUNS[-1] + 1)
+    cache = HistogramCache(tmp_path / "cache")
+    with LazyHistograms((str(histogram_shard),), cache=cache, runs=runs) as histograms:
+        assert histograms._key != cache.key((str(histogram_shard),))
+        values = histograms[name].values
+    assert values.shape == (len(runs), reference.shape[1])
+    np.testing.assert_array_equal(values[:-1], reference[::2])
+    assert not values[-1].any()
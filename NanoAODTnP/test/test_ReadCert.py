@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+import json
+
+import numpy as np
+
+from RPCDPGAnalysis.NanoAODTnP import ReadCert  # type: ignore
+
+
+def _write_cert(path, cert) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(cert))
+
+
+def test_same_named_certs_keep_their_cache_entries(tmp_path, monkeypatch):
+    monkeypatch.setattr(ReadCert, "CERT_CACHE_DIR", tmp_path / "cache")
+    first = tmp_path / "a" / "golden.json"
+    second = tmp_path / "b" / "golden.json"
+    _write_cert(first, {"1": [[1, 10]]})
+    _write_cert(second, {"2": [[5, 6]]})
+    for cert_path in (first, second):
+        ReadCert.load_lumi_checker.cache_clear()
+        ReadCert.load_lumi_checker(cert_path)
+    assert {path.name for path in (tmp_path / "cache").iterdir()} == {
+        ReadCert._cache_path(first).name,
+        ReadCert._cache_path(second).name,
+    }
+
+    # Rewriting one JSON replaces its own entry and leaves the other one alone.
+    _write_cert(first, {"1": [[1, 200]]})
+    ReadCert.load_lumi_checker.cache_clear()
+    checker = ReadCert.load_lumi_checker(first)
+    assert checker.num_lumis == 200
+    assert {path.name for path in (tmp_path / "cache").iterdir()} == {
+        ReadCert._cache_path(first).name,
+        ReadCert._cache_path(second).name,
+    }
+    assert np.array_equal(ReadCert.load_lumi_checker(second).edges, ReadCert.LumiBlockChecker.from_ranges({"2": [[5, 6]]}).edges)
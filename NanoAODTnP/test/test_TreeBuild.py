@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+import numpy as np
+
+from RPCDPGAnalysis.NanoAODTnP.HistBuild import COUNT_Q_OVER_P_EDGES  # type: ignore
+from RPCDPGAnalysis.NanoAODTnP.HistFill import BinAxis  # type: ignore
+from RPCDPGAnalysis.NanoAODTnP.TreeBuild import BaseTable, build_pair_tree  # type: ignore
+
+
+def test_probe_q_over_p_keeps_bins_next_to_edges():
+    # At eta = 0, q/p = q/pt: step float32 pt by a few ulps around 1/|edge|.
+    edges = COUNT_Q_OVER_P_EDGES[np.abs(COUNT_Q_OVER_P_EDGES) > 0.01]
+    steps = np.arange(-8, 9)
+    edge_pt = (1.0 / np.abs(edges)).astype(np.float32)
+    probe_pt = np.concatenate([edge_pt + step * np.spacing(edge_pt) for step in steps]).astype(np.float32)
+    probe_q = np.tile(-np.sign(edges), len(steps)).astype(np.int32)
+    entries = len(probe_pt)
+    table = BaseTable(
+        np.ones(entries, dtype=np.uint32),
+        np.ones(entries, dtype=np.uint32),
+        np.arange(entries + 1, dtype=np.int64),
+        {"probe_pt": probe_pt, "probe_eta": np.zeros(entries, dtype=np.float32), "probe_q": probe_q},
+    )
+    pair_tree = build_pair_tree(table, ("probe_pt", "probe_eta", "probe_q"))
+
+    axis = BinAxis("probe_q_over_p", COUNT_Q_OVER_P_EDGES)
+    expected = axis.index(probe_q / probe_pt.astype(np.float64))
+    # The sample must contain values that float32 rounding moves into the next bin.
+    assert np.any(axis.index((probe_q / probe_pt.astype(np.float64)).astype(np.float32)) != expected)
+    np.testing.assert_array_equal(
+        np.bincount(axis.index(pair_tree["probe_q_over_p"]), minlength=axis.size),
+        np.bincount(expected, minlength=axis.size),
+    )